@@ -1,7 +1,16 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, exc
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import QueuePool
+from sqlalchemy.sql.elements import TextClause
+from sqlalchemy.sql.selectable import Select, CompoundSelect
+from sqlalchemy.util import queue as sqla_queue
+from contextvars import ContextVar
+import asyncio
 import os
+import re
+import threading
+import time
 
 # Use relative paths - Docker sets WORKDIR to /app
 DATABASE_DIR = "data"
@@ -15,18 +24,138 @@ for directory in [DATABASE_DIR, SCHEDULER_DIR]:
 
 SQLALCHEMY_DATABASE_URL = f"sqlite:///{DATABASE_PATH}"
 
-engine = create_engine(
+READ_POOL_SIZE = int(os.getenv("DB_READ_POOL_SIZE", "10"))
+WRITER_QUEUE_TIMEOUT = int(os.getenv("DB_WRITER_QUEUE_TIMEOUT", "120"))
+WRITER_REQUEST_TIMEOUT = float(os.getenv("DB_WRITER_REQUEST_TIMEOUT", "5"))
+
+# Set for the duration of an HTTP request (see app.main) so request handlers
+# give up on a busy writer quickly; background jobs keep WRITER_QUEUE_TIMEOUT
+writer_timeout = ContextVar("writer_timeout", default=None)
+
+from app.utils.metrics import DB_WRITER_QUEUE_SECONDS, DB_WRITER_HOLD_SECONDS, DB_WRITERS_WAITING
+
+
+class WriterBusyError(exc.TimeoutError):
+    """The writer connection did not come free within the caller's timeout."""
+
+
+def _writer_owner():
+    # Coroutines on the event loop share one thread, so tell them apart by task
+    try:
+        task = asyncio.current_task()
+    except RuntimeError:
+        task = None
+    return (threading.get_ident(), id(task) if task is not None else None)
+
+
+class WriterPool(QueuePool):
+    """
+    Single-connection pool for the writer. Threads queue for the connection
+    here (FIFO, up to WRITER_QUEUE_TIMEOUT, or writer_timeout inside a
+    request) instead of racing for SQLite's write lock and retrying on
+    "database is locked".
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._holder = None
+
+    def _do_get(self):
+        if self._holder == _writer_owner():
+            # A second session in the same thread (or task) would wait on itself forever
+            raise RuntimeError(
+                "This thread already holds the database writer connection; "
+                "commit or close the first session before writing from another"
+            )
+
+        timeout = writer_timeout.get()
+        if timeout is None:
+            timeout = self._timeout
+
+        DB_WRITERS_WAITING.inc()
+        started = time.perf_counter()
+        try:
+            while True:
+                wait = self._overflow >= self._max_overflow
+                try:
+                    return self._pool.get(wait, timeout)
+                except sqla_queue.Empty:
+                    pass
+                if wait:
+                    raise WriterBusyError(
+                        f"The database writer was busy for more than {timeout:g} seconds",
+                        code="3o7r"
+                    )
+                # The connection has not been opened yet
+                if self._inc_overflow():
+                    try:
+                        return self._create_connection()
+                    except BaseException:
+                        self._dec_overflow()
+                        raise
+        finally:
+            DB_WRITERS_WAITING.dec()
+            DB_WRITER_QUEUE_SECONDS.observe(time.perf_counter() - started)
+
+
+# Readers: many connections; WAL lets them run alongside the writer
+read_engine = create_engine(
     SQLALCHEMY_DATABASE_URL,
     connect_args={
         "check_same_thread": False,
         "timeout": 30  # Increase timeout for busy database
-    }
+    },
+    pool_size=READ_POOL_SIZE,
+    max_overflow=READ_POOL_SIZE * 2
+)
+
+# Writer: exactly one connection, transactions start with BEGIN IMMEDIATE
+write_engine = create_engine(
+    SQLALCHEMY_DATABASE_URL,
+    connect_args={
+        "check_same_thread": False,
+        "timeout": 30,
+        "isolation_level": None  # Transactions are begun explicitly below
+    },
+    poolclass=WriterPool,
+    pool_size=1,
+    max_overflow=0,
+    pool_timeout=WRITER_QUEUE_TIMEOUT
 )
 
+# Connections that need to write outside a session (create_all, maintenance)
+engine = write_engine
+
 # Enable WAL mode for better concurrency and reduced locking
 from sqlalchemy import event
 from sqlalchemy.engine import Engine
 
+# Tunable per-connection pragmas (cache_size, mmap_size, temp_store), loaded
+# from settings at startup by app.utils.db_maintenance.load_connection_pragmas.
+# Changing them bumps the generation; pooled read and writer connections
+# re-apply them at their next checkout instead of the pools being disposed.
+CONNECTION_PRAGMAS = {}
+_pragma_generation = 0
+_pragma_lock = threading.Lock()
+
+def _apply_connection_pragmas(dbapi_conn, connection_record):
+    with _pragma_lock:
+        pragmas = list(CONNECTION_PRAGMAS.items())
+        generation = _pragma_generation
+    cursor = dbapi_conn.cursor()
+    for name, value in pragmas:
+        cursor.execute(f"PRAGMA {name}={value}")
+    cursor.close()
+    connection_record.info["pragma_generation"] = generation
+
+def set_connection_pragmas(pragmas):
+    """Replace the tunable pragmas; open connections pick them up at next checkout."""
+    global _pragma_generation
+    with _pragma_lock:
+        CONNECTION_PRAGMAS.clear()
+        CONNECTION_PRAGMAS.update(pragmas)
+        _pragma_generation += 1
+
 @event.listens_for(Engine, "connect")
 def set_sqlite_pragma(dbapi_conn, connection_record):
     cursor = dbapi_conn.cursor()
@@ -35,8 +164,109 @@ def set_sqlite_pragma(dbapi_conn, connection_record):
     cursor.execute("PRAGMA busy_timeout=30000")  # 30 second timeout
     cursor.execute("PRAGMA synchronous=NORMAL")  # Balance between safety and performance
     cursor.close()
+    _apply_connection_pragmas(dbapi_conn, connection_record)
+
+def _refresh_connection_pragmas(dbapi_conn, connection_record):
+    if connection_record.info.get("pragma_generation") != _pragma_generation:
+        _apply_connection_pragmas(dbapi_conn, connection_record)
+
+@event.listens_for(read_engine, "checkout")
+def reader_checked_out(dbapi_conn, connection_record, connection_proxy):
+    _refresh_connection_pragmas(dbapi_conn, connection_record)
+
+@event.listens_for(write_engine, "begin")
+def begin_immediate(conn):
+    # Take the write lock up front so a transaction never fails part-way
+    # through on lock upgrade
+    conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+@event.listens_for(write_engine, "checkout")
+def writer_checked_out(dbapi_conn, connection_record, connection_proxy):
+    _refresh_connection_pragmas(dbapi_conn, connection_record)
+    connection_record.info["writer_checkout_time"] = time.perf_counter()
+    write_engine.pool._holder = _writer_owner()
+
+@event.listens_for(write_engine, "checkin")
+def writer_checked_in(dbapi_conn, connection_record):
+    write_engine.pool._holder = None
+    started = connection_record.info.pop("writer_checkout_time", None)
+    if started is not None:
+        DB_WRITER_HOLD_SECONDS.observe(time.perf_counter() - started)
+
+_WRITE_KEYWORDS = re.compile(r"\b(INSERT|UPDATE|DELETE|REPLACE|CREATE|DROP|ALTER)\b", re.IGNORECASE)
+
+def _is_read(clause):
+    """True only for statements that cannot write: a SELECT, or a WITH query without DML."""
+    if isinstance(clause, (Select, CompoundSelect)):
+        return True
+    if isinstance(clause, TextClause):
+        sql = clause.text.lstrip()
+        first = sql.split(None, 1)[0].upper() if sql else ""
+        if first == "SELECT":
+            return True
+        if first == "WITH":
+            return not _WRITE_KEYWORDS.search(sql)
+    return False
+
+class RoutingSession(Session):
+    """
+    Session that reads from the read pool until its transaction does anything
+    other than a plain read (a flush, a DML statement, db.connection()). From
+    then until commit or rollback every statement goes to the writer, so the
+    transaction sees its own uncommitted changes.
+    """
+
+    _writing = False
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if self._writing or self._flushing or not _is_read(clause):
+            self._writing = True
+            return write_engine
+        return read_engine
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+@event.listens_for(RoutingSession, "after_transaction_end")
+def _reset_write_routing(session, transaction):
+    if transaction.parent is None:
+        session._writing = False
+
+SessionLocal = sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False)
+
+# Read-only engine for report generation: memory-mapped I/O sized to the
+# database and a large page cache, so long range scans avoid read() copies.
+# Set REPORT_READ_ENGINE=0 to run reports on the main engine instead.
+REPORT_ENGINE_ENABLED = os.getenv("REPORT_READ_ENGINE", "1") == "1"
+REPORT_CACHE_SIZE_KB = int(os.getenv("REPORT_CACHE_SIZE_KB", "65536"))
+REPORT_MMAP_MAX_MB = int(os.getenv("REPORT_MMAP_MAX_MB", "1024"))
+
+def report_mmap_size():
+    """mmap_size for report connections: the database size plus room to grow, capped."""
+    try:
+        db_size = os.path.getsize(DATABASE_PATH)
+    except OSError:
+        db_size = 0
+    return min(db_size * 2 + 64 * 1024 * 1024, REPORT_MMAP_MAX_MB * 1024 * 1024)
+
+if REPORT_ENGINE_ENABLED:
+    report_engine = create_engine(
+        SQLALCHEMY_DATABASE_URL,
+        connect_args={
+            "check_same_thread": False,
+            "timeout": 30
+        }
+    )
+
+    @event.listens_for(report_engine, "connect")
+    def set_report_pragma(dbapi_conn, connection_record):
+        # Runs after set_sqlite_pragma, so these override the tunable settings
+        cursor = dbapi_conn.cursor()
+        cursor.execute(f"PRAGMA mmap_size={report_mmap_size()}")
+        cursor.execute(f"PRAGMA cache_size=-{REPORT_CACHE_SIZE_KB}")
+        cursor.execute("PRAGMA query_only=1")  # Reports never write
+        cursor.close()
+else:
+    report_engine = read_engine
+
+ReportSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=report_engine)
 
 Base = declarative_base()
 
@@ -47,6 +277,14 @@ def get_db():
     finally:
         db.close()
 
+def get_report_db():
+    """Session on the read-only report engine (for routes that only read)."""
+    db = ReportSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
 def init_db():
     Base.metadata.create_all(bind=engine)
 
@@ -1,18 +1,28 @@
 from fastapi import FastAPI, Request, Depends
-from fastapi.responses import RedirectResponse, HTMLResponse
+from fastapi.responses import RedirectResponse, HTMLResponse, JSONResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from sqlalchemy.orm import Session
 from datetime import date
-from app.database import init_db, get_db
+from app.database import init_db, get_db, writer_timeout, WriterBusyError, WRITER_REQUEST_TIMEOUT
 from app.models import User, Position, TipEntryRequirement, Setting
 from app.auth.jwt_handler import get_current_user_from_cookie
-from app.routes import auth, admin, employees, daily_balance, positions, tip_requirements, reports, financial_items, scheduled_tasks, checks_efts
+from app.routes import auth, admin, employees, daily_balance, positions, tip_requirements, reports, financial_items, scheduled_tasks, checks_efts, metrics, analytics
 from app.utils.slugify import create_slug
 from app.utils.version import check_version
-from app.utils.logging_config import setup_error_logging
+from app.utils.logging_config import setup_error_logging, shutdown_logging
+from app.utils.log_index import start_log_indexer, stop_log_indexer
+from app.utils.startup_profiler import startup_phase, print_startup_summary
+from app.utils.sql_profiler import SQL_PROFILE_ENABLED, profile_request
+from app.utils.metrics import HTTP_REQUEST_SECONDS, HTTP_REQUESTS_IN_PROGRESS, DB_QUERIES_PER_REQUEST, DB_QUERY_SECONDS_PER_REQUEST, RequestQueryStats, current_query_stats
+from app.utils.db_maintenance import PRAGMA_SETTINGS, load_connection_pragmas, note_request_activity, schedule_maintenance_job
+from app.utils.execution_retention import RETENTION_SETTINGS, schedule_retention_job
+from app.services.email_outbox import start_email_worker, stop_email_worker
+from app.services.finalize_hooks import start_finalize_worker, stop_finalize_worker
 from app.scheduler import start_scheduler, shutdown_scheduler
 import logging
+import threading
+import time
 
 app = FastAPI(title="Internal Management System")
 
@@ -39,6 +49,50 @@ app.include_router(reports.router)
 app.include_router(financial_items.router)
 app.include_router(scheduled_tasks.router)
 app.include_router(checks_efts.router)
+app.include_router(metrics.router)
+app.include_router(analytics.router)
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Record per-route latency and SQL statement counts for /metrics."""
+    stats = RequestQueryStats()
+    token = current_query_stats.set(stats)
+    timeout_token = writer_timeout.set(WRITER_REQUEST_TIMEOUT)
+    HTTP_REQUESTS_IN_PROGRESS.inc()
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        elapsed = time.perf_counter() - started
+        HTTP_REQUESTS_IN_PROGRESS.dec()
+        note_request_activity()
+        current_query_stats.reset(token)
+        writer_timeout.reset(timeout_token)
+
+        # Label by route template (e.g. /employees/{slug}) to keep cardinality bounded
+        route = request.scope.get("route")
+        route_path = getattr(route, "path", None) or "unmatched"
+        if route_path != "/metrics":
+            HTTP_REQUEST_SECONDS.observe(elapsed, method=request.method, route=route_path, status=status)
+            DB_QUERIES_PER_REQUEST.observe(stats.count, route=route_path)
+            DB_QUERY_SECONDS_PER_REQUEST.observe(stats.seconds, route=route_path)
+
+@app.exception_handler(WriterBusyError)
+async def writer_busy_handler(request: Request, exc: WriterBusyError):
+    """Another request or job is holding the writer; ask the client to retry."""
+    print(f"Writer busy for {request.method} {request.url.path}: {exc}")
+    return JSONResponse(
+        status_code=503,
+        content={"success": False, "message": "The database is busy, please try again in a moment"},
+        headers={"Retry-After": str(max(1, int(WRITER_REQUEST_TIMEOUT)))}
+    )
+
+if SQL_PROFILE_ENABLED:
+    # Debug-only: per-request statement log with N+1 detection (see /admin/sql-profile)
+    app.middleware("http")(profile_request)
 
 def initialize_predefined_data():
     # No longer creating hardcoded positions and tip requirements
@@ -56,11 +110,17 @@ def initialize_default_settings():
             ("log_backup_count", "5", "Number of rotated log files to keep"),
             ("log_capture_info", "0", "Capture INFO level logs"),
             ("log_capture_debug", "0", "Capture DEBUG level logs"),
-        ]
+            ("log_structured", "0", "Write JSON-lines logs and index them for search"),
+            ("archive_horizon_days", "365", "Finalized days older than this are moved to archive databases"),
+        ] + PRAGMA_SETTINGS + RETENTION_SETTINGS
+
+        keys = [key for key, _, _ in default_settings]
+        existing_keys = {
+            row[0] for row in db.query(Setting.key).filter(Setting.key.in_(keys)).all()
+        }
 
         for key, value, description in default_settings:
-            existing = db.query(Setting).filter(Setting.key == key).first()
-            if not existing:
+            if key not in existing_keys:
                 db.add(Setting(key=key, value=value, description=description))
 
         db.commit()
@@ -70,21 +130,35 @@ def initialize_default_settings():
     finally:
         db.close()
 
+def initialize_connection_pragmas():
+    """Apply cache_size / mmap_size / temp_store settings to database connections."""
+    from app.database import SessionLocal
+    db = SessionLocal()
+    try:
+        pragmas = load_connection_pragmas(db)
+        print(f"✓ SQLite connection pragmas: {pragmas}")
+    except Exception as e:
+        print(f"Error loading SQLite pragma settings: {e}")
+    finally:
+        db.close()
+
 def initialize_error_logging():
     """Initialize error logging with settings from database."""
     from app.database import SessionLocal
     db = SessionLocal()
     try:
-        log_max_size = db.query(Setting).filter(Setting.key == "log_max_size_mb").first()
-        log_backup_count = db.query(Setting).filter(Setting.key == "log_backup_count").first()
-        log_capture_info = db.query(Setting).filter(Setting.key == "log_capture_info").first()
-        log_capture_debug = db.query(Setting).filter(Setting.key == "log_capture_debug").first()
+        settings = dict(
+            db.query(Setting.key, Setting.value).filter(Setting.key.in_([
+                "log_max_size_mb", "log_backup_count", "log_capture_info",
+                "log_capture_debug", "log_structured"
+            ])).all()
+        )
 
-        max_bytes = int(log_max_size.value) * 1024 * 1024 if log_max_size else 10485760
-        backup_count = int(log_backup_count.value) if log_backup_count else 5
+        max_bytes = int(settings["log_max_size_mb"]) * 1024 * 1024 if "log_max_size_mb" in settings else 10485760
+        backup_count = int(settings["log_backup_count"]) if "log_backup_count" in settings else 5
 
-        capture_info = log_capture_info and log_capture_info.value == "1"
-        capture_debug = log_capture_debug and log_capture_debug.value == "1"
+        capture_info = settings.get("log_capture_info") == "1"
+        capture_debug = settings.get("log_capture_debug") == "1"
 
         if capture_debug:
             log_level = logging.DEBUG
@@ -93,7 +167,11 @@ def initialize_error_logging():
         else:
             log_level = logging.WARNING
 
-        setup_error_logging(max_bytes=max_bytes, backup_count=backup_count, log_level=log_level)
+        structured = settings.get("log_structured") == "1"
+
+        setup_error_logging(max_bytes=max_bytes, backup_count=backup_count, log_level=log_level, structured=structured)
+        if structured:
+            start_log_indexer()
         logging.info("Error logging initialized successfully")
     except Exception as e:
         print(f"Error initializing logging: {e}")
@@ -101,19 +179,51 @@ def initialize_error_logging():
     finally:
         db.close()
 
+_scheduler_boot_thread = None
+
+def boot_scheduler():
+    """Start APScheduler and load scheduled tasks (runs off the startup path)."""
+    with startup_phase("scheduler start"):
+        start_scheduler()
+        schedule_maintenance_job()
+        schedule_retention_job()
+    with startup_phase("load scheduled tasks"):
+        from app.routes.scheduled_tasks import load_scheduled_tasks
+        load_scheduled_tasks()
+    print_startup_summary()
+
 @app.on_event("startup")
 def startup_event():
-    init_db()
+    global _scheduler_boot_thread
+
+    with startup_phase("init_db"):
+        init_db()
     initialize_predefined_data()
-    initialize_default_settings()
-    initialize_error_logging()
-    start_scheduler()
-    from app.routes.scheduled_tasks import load_scheduled_tasks
-    load_scheduled_tasks()
+    with startup_phase("default settings"):
+        initialize_default_settings()
+    with startup_phase("connection pragmas"):
+        initialize_connection_pragmas()
+    with startup_phase("error logging"):
+        initialize_error_logging()
+    with startup_phase("email worker"):
+        start_email_worker()
+    with startup_phase("finalize hook worker"):
+        start_finalize_worker()
+
+    # The scheduler jobstore and task loading don't need to block the first
+    # request (or the container health check), so they run in the background
+    _scheduler_boot_thread = threading.Thread(target=boot_scheduler, name="scheduler-boot", daemon=True)
+    _scheduler_boot_thread.start()
 
 @app.on_event("shutdown")
 async def shutdown_event():
+    if _scheduler_boot_thread is not None:
+        _scheduler_boot_thread.join(timeout=30)
     shutdown_scheduler()
+    stop_finalize_worker()
+    stop_email_worker()
+    stop_log_indexer()
+    shutdown_logging()
 
 @app.get("/", response_class=HTMLResponse)
 async def home(request: Request, db: Session = Depends(get_db)):
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Boolean, Integer, Float, Date, DateTime, ForeignKey, Text, JSON, Table
+from sqlalchemy import Column, String, Boolean, Integer, Float, Date, DateTime, ForeignKey, Text, JSON, Table, Index
 from sqlalchemy.orm import relationship
 from app.database import Base
 
@@ -110,6 +110,7 @@ class DailyBalance(Base):
     created_by_source = Column(String, default="user")
     edited_by_user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
     finalized_at = Column(DateTime, nullable=True)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
 
     employee_entries = relationship("DailyEmployeeEntry", back_populates="daily_balance", cascade="all, delete-orphan")
     financial_line_items = relationship("DailyFinancialLineItem", back_populates="daily_balance", cascade="all, delete-orphan")
@@ -118,6 +119,9 @@ class DailyBalance(Base):
     created_by_user = relationship("User", foreign_keys=[created_by_user_id])
     edited_by_user = relationship("User", foreign_keys=[edited_by_user_id])
 
+    # Archived rows keep their ids, so ids must never be reused
+    __table_args__ = {"sqlite_autoincrement": True}
+
 class DailyEmployeeEntry(Base):
     __tablename__ = "daily_employee_entries"
 
@@ -133,6 +137,8 @@ class DailyEmployeeEntry(Base):
     employee = relationship("Employee", back_populates="daily_entries")
     position = relationship("Position")
 
+    __table_args__ = {"sqlite_autoincrement": True}
+
     def get_tip_value(self, field_name: str, default=0.0):
         if self.tip_values and isinstance(self.tip_values, dict):
             return self.tip_values.get(field_name, default)
@@ -179,11 +185,16 @@ class DailyFinancialLineItem(Base):
     is_employee_tip = Column(Boolean, default=False)
     employee_id = Column(Integer, ForeignKey("employees.id"), nullable=True)
     employee_name_snapshot = Column(String, nullable=True)
+    # Tip lines: the position and tip field the line was built from
+    position_id = Column(Integer, ForeignKey("positions.id"), nullable=True)
+    tip_field_name = Column(String, nullable=True)
 
     daily_balance = relationship("DailyBalance", back_populates="financial_line_items")
     template = relationship("FinancialLineItemTemplate", back_populates="daily_line_items")
     employee = relationship("Employee")
 
+    __table_args__ = {"sqlite_autoincrement": True}
+
     @property
     def employee_display_name(self):
         """Return employee name, preferring snapshot for deleted employees."""
@@ -214,6 +225,7 @@ class ScheduledTask(Base):
     employee_id = Column(Integer, ForeignKey("employees.id"), nullable=True)
     starts_at = Column(DateTime, nullable=True)
     attach_csv = Column(Boolean, default=False)
+    job_fingerprint = Column(String, nullable=True)
 
     employee = relationship("Employee")
     executions = relationship("TaskExecution", back_populates="task", cascade="all, delete-orphan")
@@ -231,6 +243,10 @@ class TaskExecution(Base):
 
     task = relationship("ScheduledTask", back_populates="executions")
 
+    __table_args__ = (
+        Index("idx_task_executions_task_id_started", task_id, started_at.desc()),
+    )
+
 class Setting(Base):
     __tablename__ = "settings"
 
@@ -275,6 +291,8 @@ class DailyBalanceCheck(Base):
 
     daily_balance = relationship("DailyBalance", back_populates="checks")
 
+    __table_args__ = {"sqlite_autoincrement": True}
+
 class DailyBalanceEFT(Base):
     __tablename__ = "daily_balance_efts"
 
@@ -288,6 +306,8 @@ class DailyBalanceEFT(Base):
 
     daily_balance = relationship("DailyBalance", back_populates="efts")
 
+    __table_args__ = {"sqlite_autoincrement": True}
+
 class ScheduledCheck(Base):
     __tablename__ = "scheduled_checks"
 
@@ -311,3 +331,57 @@ class ScheduledEFT(Base):
     memo = Column(Text, nullable=True)
     is_active = Column(Boolean, default=True)
     created_at = Column(String, nullable=True)
+
+class ArchiveManifest(Base):
+    __tablename__ = "archive_manifest"
+
+    year = Column(Integer, primary_key=True)
+    file_path = Column(String, nullable=False)
+    first_date = Column(Date, nullable=False)
+    last_date = Column(Date, nullable=False)
+    day_count = Column(Integer, nullable=False, default=0)
+    archived_at = Column(DateTime, nullable=True)
+
+class EmailOutbox(Base):
+    __tablename__ = "email_outbox"
+
+    id = Column(Integer, primary_key=True)
+    idempotency_key = Column(String, unique=True, nullable=False)
+    report_type = Column(String, nullable=False)
+    from_email = Column(String, nullable=False)
+    to_email = Column(String, nullable=False)
+    subject = Column(String, nullable=False)
+    html_body = Column(Text, nullable=True)
+    attachment_path = Column(String, nullable=True)
+    status = Column(String, nullable=False, default="pending")
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text, nullable=True)
+    provider_message_id = Column(String, nullable=True)
+    created_at = Column(DateTime, nullable=False)
+    next_attempt_at = Column(DateTime, nullable=False)
+    sent_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("idx_email_outbox_status_next_attempt", status, next_attempt_at),
+    )
+
+class FinalizeHookRun(Base):
+    __tablename__ = "finalize_hook_runs"
+
+    id = Column(Integer, primary_key=True)
+    run_id = Column(String, nullable=False)
+    daily_balance_id = Column(Integer, ForeignKey("daily_balance.id", ondelete="CASCADE"), nullable=False)
+    hook = Column(String, nullable=False)
+    params = Column(Text, nullable=True)
+    status = Column(String, nullable=False, default="pending")
+    detail = Column(Text, nullable=True)
+    error = Column(Text, nullable=True)
+    requested_by_user_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    created_at = Column(DateTime, nullable=False)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("idx_finalize_hook_runs_status", status, id),
+        Index("idx_finalize_hook_runs_daily_balance", daily_balance_id, id),
+    )
@@ -1,13 +1,23 @@
-from fastapi import APIRouter, Depends, Request, Form, HTTPException
-from fastapi.responses import RedirectResponse, HTMLResponse, FileResponse
+from fastapi import APIRouter, Depends, Request, Form, HTTPException, UploadFile, File
+from fastapi.responses import RedirectResponse, HTMLResponse, FileResponse, JSONResponse
+from fastapi.concurrency import run_in_threadpool
 from fastapi.templating import Jinja2Templates
 from sqlalchemy.orm import Session
-from app.database import get_db
+from app.database import get_db, WriterBusyError
 from app.models import User, Setting
 from app.auth.jwt_handler import get_current_admin_user, get_password_hash
 from app.utils.slugify import create_slug, ensure_unique_slug
 from app.utils.backup import create_backup, list_backups, delete_backup, get_backup_path, restore_backup, get_backup_retention_count, cleanup_old_backups
-from app.utils.logging_config import get_log_files, read_log_file, get_log_stats, clear_log_file
+from app.utils.logging_config import read_log_page, get_log_stats, clear_log_file, LOG_LEVELS
+from app.utils.log_index import search_logs, get_index_stats
+from app.utils.sql_profiler import SQL_PROFILE_ENABLED, N1_THRESHOLD, get_recent_profiles, clear_recent_profiles
+from app.utils.db_maintenance import PRAGMA_SETTINGS, TEMP_STORE_VALUES, load_connection_pragmas, run_maintenance, get_last_maintenance
+from app.utils.ledger_import import IMPORT_DIR, import_ledger, get_last_import
+from app.utils.execution_retention import RETENTION_SETTINGS, prune_task_executions
+from app.services.email_outbox import get_outbox_summary, retry_dead_messages
+from datetime import datetime
+import os
+import shutil
 
 router = APIRouter()
 templates = Jinja2Templates(directory="app/templates")
@@ -21,6 +31,15 @@ async def admin_page(
     users = db.query(User).all()
     backups = list_backups()
     backup_retention_count = get_backup_retention_count()
+
+    db_tuning = {key: default for key, default, _ in PRAGMA_SETTINGS}
+    for setting in db.query(Setting).filter(Setting.key.in_(list(db_tuning))).all():
+        db_tuning[setting.key] = setting.value
+
+    execution_retention = {key: default for key, default, _ in RETENTION_SETTINGS}
+    for setting in db.query(Setting).filter(Setting.key.in_(list(execution_retention))).all():
+        execution_retention[setting.key] = setting.value
+
     return templates.TemplateResponse(
         "admin/users.html",
         {
@@ -28,6 +47,13 @@ async def admin_page(
             "users": users,
             "backups": backups,
             "backup_retention_count": backup_retention_count,
+            "db_tuning": db_tuning,
+            "execution_retention": execution_retention,
+            "temp_store_options": list(TEMP_STORE_VALUES),
+            "last_maintenance": get_last_maintenance(),
+            "last_import": get_last_import(),
+            "email_outbox": get_outbox_summary(),
+            "sql_profile_enabled": SQL_PROFILE_ENABLED,
             "current_user": current_user
         }
     )
@@ -44,7 +70,7 @@ async def new_user_page(
     )
 
 @router.post("/admin/users/new")
-async def create_user(
+def create_user(
     request: Request,
     username: str = Form(...),
     email: str = Form(None),
@@ -92,7 +118,7 @@ async def edit_user_page(
     )
 
 @router.post("/admin/users/{slug}/edit")
-async def update_user(
+def update_user(
     slug: str,
     request: Request,
     username: str = Form(...),
@@ -120,7 +146,7 @@ async def update_user(
     return RedirectResponse(url="/admin", status_code=302)
 
 @router.post("/admin/users/{slug}/delete")
-async def delete_user(
+def delete_user(
     slug: str,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_admin_user)
@@ -137,7 +163,7 @@ async def delete_user(
     return RedirectResponse(url="/admin", status_code=302)
 
 @router.post("/admin/backups/create")
-async def create_database_backup(
+def create_database_backup(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_admin_user)
 ):
@@ -173,7 +199,7 @@ async def delete_database_backup(
     return RedirectResponse(url="/admin", status_code=302)
 
 @router.post("/admin/backups/{filename}/restore")
-async def restore_database_backup(
+def restore_database_backup(
     filename: str,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_admin_user)
@@ -190,7 +216,7 @@ async def restore_database_backup(
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/admin/settings/backup-retention")
-async def update_backup_retention(
+def update_backup_retention(
     retention_count: int = Form(...),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_admin_user)
@@ -218,44 +244,190 @@ async def update_backup_retention(
         return RedirectResponse(url="/admin?settings_updated=true", status_code=302)
     except HTTPException:
         raise
+    except WriterBusyError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/admin/settings/execution-retention")
+def update_execution_retention(
+    keep_count: int = Form(...),
+    max_age_days: int = Form(...),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin_user)
+):
+    try:
+        if keep_count < 1 or keep_count > 1000:
+            raise HTTPException(status_code=400, detail="Executions to keep must be between 1 and 1000")
+        if max_age_days < 0 or max_age_days > 3650:
+            raise HTTPException(status_code=400, detail="Maximum age must be between 0 and 3650 days")
+
+        descriptions = {key: description for key, _, description in RETENTION_SETTINGS}
+        values = {
+            "execution_retention_count": str(keep_count),
+            "execution_retention_days": str(max_age_days),
+        }
+        for key, value in values.items():
+            setting = db.query(Setting).filter(Setting.key == key).first()
+            if setting:
+                setting.value = value
+            else:
+                db.add(Setting(key=key, value=value, description=descriptions[key]))
+
+        db.commit()
+
+        prune_task_executions(keep_count, max_age_days)
+
+        return RedirectResponse(url="/admin?settings_updated=true", status_code=302)
+    except HTTPException:
+        raise
+    except WriterBusyError:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/admin/settings/database-tuning")
+def update_database_tuning(
+    cache_size_kb: int = Form(...),
+    mmap_size_mb: int = Form(...),
+    temp_store: str = Form(...),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin_user)
+):
+    try:
+        if cache_size_kb < 64 or cache_size_kb > 1048576:
+            raise HTTPException(status_code=400, detail="Cache size must be between 64 KB and 1 GB")
+        if mmap_size_mb < 0 or mmap_size_mb > 65536:
+            raise HTTPException(status_code=400, detail="mmap size must be between 0 and 65536 MB")
+        if temp_store not in TEMP_STORE_VALUES:
+            raise HTTPException(status_code=400, detail="Invalid temp store")
+
+        descriptions = {key: description for key, _, description in PRAGMA_SETTINGS}
+        values = {
+            "sqlite_cache_size_kb": str(cache_size_kb),
+            "sqlite_mmap_size_mb": str(mmap_size_mb),
+            "sqlite_temp_store": temp_store,
+        }
+        for key, value in values.items():
+            setting = db.query(Setting).filter(Setting.key == key).first()
+            if setting:
+                setting.value = value
+            else:
+                db.add(Setting(key=key, value=value, description=descriptions[key]))
+
+        db.commit()
+
+        # New values apply to connections opened from now on
+        load_connection_pragmas(db)
+
+        return RedirectResponse(url="/admin?settings_updated=true", status_code=302)
+    except HTTPException:
+        raise
+    except WriterBusyError:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/admin/database/maintenance")
+async def run_database_maintenance(
+    current_user: User = Depends(get_current_admin_user)
+):
+    try:
+        run_maintenance(force=True)
+        return RedirectResponse(url="/admin?maintenance_complete=true", status_code=302)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/admin/email-outbox/retry")
+async def retry_failed_emails(
+    current_user: User = Depends(get_current_admin_user)
+):
+    try:
+        count = retry_dead_messages()
+        print(f"✓ {current_user.username} re-queued {count} failed email(s)")
+        return RedirectResponse(url="/admin?emails_requeued=true", status_code=302)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/admin/import/daily-balances")
+async def import_daily_balances(
+    file: UploadFile = File(...),
+    replace: bool = Form(False),
+    dry_run: bool = Form(False),
+    current_user: User = Depends(get_current_admin_user)
+):
+    os.makedirs(IMPORT_DIR, exist_ok=True)
+    filename = os.path.basename(file.filename or "import.csv")
+    upload_path = os.path.join(IMPORT_DIR, f"{datetime.now():%Y%m%d_%H%M%S}_{filename}")
+
+    try:
+        with open(upload_path, "wb") as out:
+            await run_in_threadpool(shutil.copyfileobj, file.file, out)
+
+        # The import and the maintenance pass after it block for a while; keep them off the event loop
+        result = await run_in_threadpool(import_ledger, upload_path, replace=replace, dry_run=dry_run)
+        print(f"✓ Import of {filename} by {current_user.username}: {result['days']} day(s), success={result['success']}")
+        return RedirectResponse(url="/admin?import_complete=true", status_code=302)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        if os.path.exists(upload_path):
+            os.remove(upload_path)
+
 @router.get("/admin/error-logs", response_class=HTMLResponse)
 async def view_error_logs(
     request: Request,
     max_lines: int = 500,
+    level: str = "",
+    search: str = "",
+    cursor: str = "",
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_admin_user)
 ):
-    log_files = get_log_files()
     log_stats = get_log_stats()
 
-    log_lines = []
-    if log_files:
-        log_lines = read_log_file(log_files[0], max_lines)
+    max_lines = max(1, min(max_lines, 5000))
+    level = level.upper() if level.upper() in LOG_LEVELS else ""
+    search = search.strip()
+
+    log_page = read_log_page(
+        max_lines=max_lines,
+        cursor=cursor or None,
+        level=level or None,
+        search=search or None
+    )
 
     log_max_size = db.query(Setting).filter(Setting.key == "log_max_size_mb").first()
     log_backup_count = db.query(Setting).filter(Setting.key == "log_backup_count").first()
     log_capture_info = db.query(Setting).filter(Setting.key == "log_capture_info").first()
     log_capture_debug = db.query(Setting).filter(Setting.key == "log_capture_debug").first()
+    log_structured = db.query(Setting).filter(Setting.key == "log_structured").first()
+    structured_enabled = bool(log_structured and log_structured.value == "1")
 
     return templates.TemplateResponse(
         "admin/error_logs.html",
         {
             "request": request,
-            "log_lines": log_lines,
+            "log_lines": log_page['lines'],
+            "next_cursor": log_page['next_cursor'],
+            "cursor": cursor,
+            "max_lines": max_lines,
+            "filter_level": level,
+            "filter_search": search,
+            "log_levels": LOG_LEVELS,
             "log_stats": log_stats,
             "log_max_size_mb": int(log_max_size.value) if log_max_size else 10,
             "log_backup_count": int(log_backup_count.value) if log_backup_count else 5,
             "log_capture_info": int(log_capture_info.value) if log_capture_info else 0,
             "log_capture_debug": int(log_capture_debug.value) if log_capture_debug else 0,
+            "log_structured": structured_enabled,
+            "index_stats": get_index_stats() if structured_enabled else None,
             "current_user": current_user
         }
     )
 
 @router.post("/admin/settings/log-rotation")
-async def update_log_rotation(
+def update_log_rotation(
     log_max_size_mb: int = Form(...),
     log_backup_count: int = Form(...),
     db: Session = Depends(get_db),
@@ -293,11 +465,13 @@ async def update_log_rotation(
         return RedirectResponse(url="/admin/error-logs?settings_updated=true", status_code=302)
     except HTTPException:
         raise
+    except WriterBusyError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/admin/settings/log-levels")
-async def update_log_levels(
+def update_log_levels(
     log_capture_info: bool = Form(False),
     log_capture_debug: bool = Form(False),
     db: Session = Depends(get_db),
@@ -331,9 +505,64 @@ async def update_log_levels(
         reconfigure_logging()
 
         return RedirectResponse(url="/admin/error-logs?levels_updated=true", status_code=302)
+    except WriterBusyError:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/admin/settings/log-structured")
+def update_log_structured(
+    log_structured: bool = Form(False),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin_user)
+):
+    from app.utils.logging_config import reconfigure_structured_logging
+
+    try:
+        structured_setting = db.query(Setting).filter(Setting.key == "log_structured").first()
+        if structured_setting:
+            structured_setting.value = "1" if log_structured else "0"
+        else:
+            db.add(Setting(
+                key="log_structured",
+                value="1" if log_structured else "0",
+                description="Write JSON-lines logs and index them for search"
+            ))
+
+        db.commit()
+
+        reconfigure_structured_logging(log_structured)
+
+        return RedirectResponse(url="/admin/error-logs?levels_updated=true", status_code=302)
+    except WriterBusyError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/admin/logs/search")
+async def search_structured_logs(
+    level: str = "",
+    logger: str = "",
+    start: str = "",
+    end: str = "",
+    q: str = "",
+    limit: int = 200,
+    current_user: User = Depends(get_current_admin_user)
+):
+    try:
+        limit = max(1, min(limit, 2000))
+        entries = search_logs(
+            level=level if level.upper() in LOG_LEVELS else None,
+            logger=logger.strip() or None,
+            start=start or None,
+            end=end or None,
+            text=q.strip() or None,
+            limit=limit
+        )
+        return JSONResponse({"success": True, "entries": entries, "count": len(entries)})
+    except Exception as e:
+        return JSONResponse({"success": False, "message": str(e)}, status_code=500)
+
 @router.post("/admin/logs/clear")
 async def clear_logs(
     db: Session = Depends(get_db),
@@ -347,3 +576,32 @@ async def clear_logs(
             raise HTTPException(status_code=404, detail="Log file not found")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/admin/sql-profile", response_class=HTMLResponse)
+async def view_sql_profile(
+    request: Request,
+    n1_only: bool = False,
+    current_user: User = Depends(get_current_admin_user)
+):
+    profiles = get_recent_profiles()
+    if n1_only:
+        profiles = [p for p in profiles if p["n_plus_one"]]
+
+    return templates.TemplateResponse(
+        "admin/sql_profile.html",
+        {
+            "request": request,
+            "profiles": profiles,
+            "n1_only": n1_only,
+            "enabled": SQL_PROFILE_ENABLED,
+            "n1_threshold": N1_THRESHOLD,
+            "current_user": current_user
+        }
+    )
+
+@router.post("/admin/sql-profile/clear")
+async def clear_sql_profile(
+    current_user: User = Depends(get_current_admin_user)
+):
+    clear_recent_profiles()
+    return RedirectResponse(url="/admin/sql-profile", status_code=302)
@@ -0,0 +1,133 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from datetime import datetime, timedelta
+from typing import Optional
+import time
+from app.database import get_report_db
+from app.models import User
+from app.auth.jwt_handler import get_current_user
+from app.services.analytics import get_analytics_frame, rolling_trend, weekday_profile, tips_per_shift, year_over_year
+
+router = APIRouter()
+
+MAX_ROLLING_WINDOW = 365
+
+def resolve_range(frame, start_date, end_date, default_days):
+    """Parse start/end query params; default to the `default_days` ending at the last finalized day."""
+    try:
+        end = datetime.strptime(end_date, "%Y-%m-%d").date() if end_date else (frame.last_date or datetime.now().date())
+        start = datetime.strptime(start_date, "%Y-%m-%d").date() if start_date else end - timedelta(days=default_days - 1)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Dates must be in YYYY-MM-DD format")
+
+    if start > end:
+        raise HTTPException(status_code=400, detail="start_date must be on or before end_date")
+    return start, end
+
+def parse_metrics(frame, metrics):
+    names = [name.strip() for name in metrics.split(",") if name.strip()]
+    available = frame.metrics()
+    unknown = [name for name in names if name not in available]
+    if not names or unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown metric(s): {', '.join(unknown) or metrics}")
+    return names
+
+def analytics_response(frame, start, end, started, data):
+    return {
+        "start_date": start.isoformat(),
+        "end_date": end.isoformat(),
+        "compute_ms": round((time.perf_counter() - started) * 1000, 2),
+        "history_loaded_at": frame.loaded_at.isoformat(),
+        **data
+    }
+
+@router.get("/api/analytics/metrics")
+async def analytics_metrics(
+    db: Session = Depends(get_report_db),
+    current_user: User = Depends(get_current_user)
+):
+    if not current_user:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+
+    frame = get_analytics_frame(db)
+    return {
+        "first_date": frame.first_date.isoformat() if frame.first_date else None,
+        "last_date": frame.last_date.isoformat() if frame.last_date else None,
+        "finalized_days": len(frame.days),
+        "history_loaded_at": frame.loaded_at.isoformat(),
+        "metrics": frame.metrics()
+    }
+
+@router.get("/api/analytics/trends")
+async def analytics_trends(
+    metric: str = "revenue",
+    window: int = 7,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    db: Session = Depends(get_report_db),
+    current_user: User = Depends(get_current_user)
+):
+    if not current_user:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    if window < 1 or window > MAX_ROLLING_WINDOW:
+        raise HTTPException(status_code=400, detail=f"window must be between 1 and {MAX_ROLLING_WINDOW}")
+
+    started = time.perf_counter()
+    frame = get_analytics_frame(db)
+    start, end = resolve_range(frame, start_date, end_date, default_days=90)
+    metric = parse_metrics(frame, metric)[0]
+
+    return analytics_response(frame, start, end, started, rolling_trend(frame, metric, start, end, window))
+
+@router.get("/api/analytics/seasonality")
+async def analytics_seasonality(
+    metrics: str = "revenue,expense",
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    db: Session = Depends(get_report_db),
+    current_user: User = Depends(get_current_user)
+):
+    if not current_user:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+
+    started = time.perf_counter()
+    frame = get_analytics_frame(db)
+    start, end = resolve_range(frame, start_date, end_date, default_days=365)
+
+    return analytics_response(frame, start, end, started, weekday_profile(frame, parse_metrics(frame, metrics), start, end))
+
+@router.get("/api/analytics/tips-per-shift")
+async def analytics_tips_per_shift(
+    group_by: str = "position",
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    db: Session = Depends(get_report_db),
+    current_user: User = Depends(get_current_user)
+):
+    if not current_user:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    if group_by not in ("position", "employee"):
+        raise HTTPException(status_code=400, detail="group_by must be 'position' or 'employee'")
+
+    started = time.perf_counter()
+    frame = get_analytics_frame(db)
+    start, end = resolve_range(frame, start_date, end_date, default_days=365)
+
+    return analytics_response(frame, start, end, started, tips_per_shift(frame, start, end, group_by))
+
+@router.get("/api/analytics/year-over-year")
+async def analytics_year_over_year(
+    metrics: str = "revenue,expense",
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    db: Session = Depends(get_report_db),
+    current_user: User = Depends(get_current_user)
+):
+    if not current_user:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+
+    started = time.perf_counter()
+    frame = get_analytics_frame(db)
+    start, end = resolve_range(frame, start_date, end_date, default_days=365)
+
+    return analytics_response(frame, start, end, started, year_over_year(frame, parse_metrics(frame, metrics), start, end))
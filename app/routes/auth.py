@@ -67,7 +67,7 @@ async def login(
     return response
 
 @router.post("/setup")
-async def setup_admin(
+def setup_admin(
     request: Request,
     username: str = Form(...),
     email: str = Form(None),
@@ -49,7 +49,7 @@ async def get_check_payees(
     return [{"id": p.id, "name": p.name} for p in payees]
 
 @router.post("/api/checks-efts/check-payees")
-async def create_check_payee(
+def create_check_payee(
     payee: CheckPayeeCreate,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -73,7 +73,7 @@ async def create_check_payee(
     return {"id": new_payee.id, "name": new_payee.name}
 
 @router.put("/api/checks-efts/check-payees/{payee_id}")
-async def update_check_payee(
+def update_check_payee(
     payee_id: int,
     payee: CheckPayeeCreate,
     db: Session = Depends(get_db),
@@ -104,7 +104,7 @@ async def update_check_payee(
     return {"id": existing.id, "name": existing.name}
 
 @router.delete("/api/checks-efts/check-payees/{payee_id}")
-async def delete_check_payee(
+def delete_check_payee(
     payee_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -133,7 +133,7 @@ async def get_eft_card_numbers(
     return [{"id": c.id, "number": c.number} for c in cards]
 
 @router.post("/api/checks-efts/eft-card-numbers")
-async def create_eft_card_number(
+def create_eft_card_number(
     card: EFTCardNumberCreate,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -157,7 +157,7 @@ async def create_eft_card_number(
     return {"id": new_card.id, "number": new_card.number}
 
 @router.put("/api/checks-efts/eft-card-numbers/{card_id}")
-async def update_eft_card_number(
+def update_eft_card_number(
     card_id: int,
     card: EFTCardNumberCreate,
     db: Session = Depends(get_db),
@@ -188,7 +188,7 @@ async def update_eft_card_number(
     return {"id": existing.id, "number": existing.number}
 
 @router.delete("/api/checks-efts/eft-card-numbers/{card_id}")
-async def delete_eft_card_number(
+def delete_eft_card_number(
     card_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -217,7 +217,7 @@ async def get_eft_payees(
     return [{"id": p.id, "name": p.name} for p in payees]
 
 @router.post("/api/checks-efts/eft-payees")
-async def create_eft_payee(
+def create_eft_payee(
     payee: EFTPayeeCreate,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -241,7 +241,7 @@ async def create_eft_payee(
     return {"id": new_payee.id, "name": new_payee.name}
 
 @router.put("/api/checks-efts/eft-payees/{payee_id}")
-async def update_eft_payee(
+def update_eft_payee(
     payee_id: int,
     payee: EFTPayeeCreate,
     db: Session = Depends(get_db),
@@ -272,7 +272,7 @@ async def update_eft_payee(
     return {"id": existing.id, "name": existing.name}
 
 @router.delete("/api/checks-efts/eft-payees/{payee_id}")
-async def delete_eft_payee(
+def delete_eft_payee(
     payee_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -326,7 +326,7 @@ async def get_scheduled_checks(
     } for c in checks]
 
 @router.post("/api/scheduled-checks")
-async def create_scheduled_check(
+def create_scheduled_check(
     check: ScheduledCheckCreate,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -361,7 +361,7 @@ async def create_scheduled_check(
     }
 
 @router.put("/api/scheduled-checks/{check_id}")
-async def update_scheduled_check(
+def update_scheduled_check(
     check_id: int,
     check: ScheduledCheckCreate,
     db: Session = Depends(get_db),
@@ -399,7 +399,7 @@ async def update_scheduled_check(
     }
 
 @router.delete("/api/scheduled-checks/{check_id}")
-async def delete_scheduled_check(
+def delete_scheduled_check(
     check_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -436,7 +436,7 @@ async def get_scheduled_efts(
     } for e in efts]
 
 @router.post("/api/scheduled-efts")
-async def create_scheduled_eft(
+def create_scheduled_eft(
     eft: ScheduledEFTCreate,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -471,7 +471,7 @@ async def create_scheduled_eft(
     }
 
 @router.put("/api/scheduled-efts/{eft_id}")
-async def update_scheduled_eft(
+def update_scheduled_eft(
     eft_id: int,
     eft: ScheduledEFTCreate,
     db: Session = Depends(get_db),
@@ -509,7 +509,7 @@ async def update_scheduled_eft(
     }
 
 @router.delete("/api/scheduled-efts/{eft_id}")
-async def delete_scheduled_eft(
+def delete_scheduled_eft(
     eft_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
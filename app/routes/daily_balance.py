@@ -1,15 +1,23 @@
 from fastapi import APIRouter, Depends, Request, Form, HTTPException
-from fastapi.responses import RedirectResponse, HTMLResponse, FileResponse
+from fastapi.responses import RedirectResponse, HTMLResponse, FileResponse, JSONResponse
 from fastapi.templating import Jinja2Templates
-from sqlalchemy.orm import Session
+from starlette.datastructures import FormData
+from sqlalchemy.orm import Session, selectinload
 from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
 from datetime import date as date_cls, datetime
 from typing import List, Optional
+from pydantic import BaseModel
+import json
 import os
 from app.database import get_db
-from app.models import User, Employee, DailyBalance, DailyEmployeeEntry, FinancialLineItemTemplate, DailyFinancialLineItem, Position, EmployeePositionSchedule, DailyBalanceCheck, DailyBalanceEFT, ScheduledCheck, ScheduledEFT
+from app.models import User, Employee, DailyBalance, DailyEmployeeEntry, FinancialLineItemTemplate, DailyFinancialLineItem, Position, EmployeePositionSchedule, DailyBalanceCheck, DailyBalanceEFT, ScheduledCheck, ScheduledEFT, TipEntryRequirement
 from app.auth.jwt_handler import get_current_user
 from app.utils.csv_generator import generate_daily_balance_csv
+from app.utils.archive import is_date_archived
+from app.services.analytics import invalidate_analytics_cache
+from app.services.finalize_hooks import enqueue_finalize_hooks, get_finalize_hook_status, retry_failed_hooks
+from app.routes.reports import validate_email, get_form_data
 
 router = APIRouter()
 templates = Jinja2Templates(directory="app/templates")
@@ -25,6 +33,55 @@ templates.env.filters["format_decimal"] = format_decimal
 
 DAYS_OF_WEEK = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
 
+class LineItemPatch(BaseModel):
+    template_id: int
+    value: float
+
+class TipFieldPatch(BaseModel):
+    employee_id: int
+    position_id: int
+    field_name: str
+    value: float
+
+class DailyBalancePatch(BaseModel):
+    version: int
+    line_items: List[LineItemPatch] = []
+    tips: List[TipFieldPatch] = []
+    notes: Optional[str] = None
+
+def tip_line_item_name(employee, position, req):
+    return f"{employee.display_name} ({position.name}) - {req.name}"
+
+def recompute_tip_totals(position, tip_values):
+    """Recompute a position's total fields from its input fields, in place."""
+    total = 0
+    for req in position.tip_requirements:
+        if not req.no_input and not req.is_total and not req.record_data:
+            value = tip_values.get(req.field_name) or 0.0
+            total += -value if req.is_deduction else value
+    for req in position.tip_requirements:
+        if req.is_total:
+            tip_values[req.field_name] = round(total, 2)
+    return tip_values
+
+def daily_balance_snapshot(daily_balance):
+    """The editable values of a saved day, keyed the way the form names its fields."""
+    return {
+        "version": daily_balance.version,
+        "finalized": bool(daily_balance.finalized),
+        "notes": daily_balance.notes or "",
+        "line_items": {
+            str(item.template_id): item.value
+            for item in daily_balance.financial_line_items
+            if item.template_id and not item.is_employee_tip
+        },
+        "tips": {
+            f"{entry.employee_id}-{entry.position_id}": entry.tip_values or {}
+            for entry in daily_balance.employee_entries
+        },
+        "edited_by": daily_balance.edited_by_user.username if daily_balance.edited_by_user else None
+    }
+
 def save_daily_balance_data(
     db: Session,
     date_obj: date_cls,
@@ -32,45 +89,38 @@ def save_daily_balance_data(
     form_data: dict,
     finalized: bool = False,
     current_user: User = None,
-    source: str = "user"
+    source: str = "user",
+    expected_version: Optional[int] = None
 ):
+    """
+    Replace a day's line items, employee entries, checks and EFTs with the form's.
+
+    The form is parsed and validated, and everything it references is loaded,
+    before the first write, so the write transaction only covers the version
+    check, the deletes and the inserts. When expected_version is given (the
+    version the editor loaded; 0 for a day that didn't exist yet) the day's
+    version is bumped with a conditional UPDATE and an HTTPException(409) is
+    raised if someone else saved the day in the meantime.
+    """
     daily_balance = db.query(DailyBalance).filter(DailyBalance.date == date_obj).first()
     is_new = daily_balance is None
+    was_finalized = bool(daily_balance and daily_balance.finalized)
 
-    if not daily_balance:
-        daily_balance = DailyBalance(
-            date=date_obj,
-            day_of_week=day_of_week,
-            notes=form_data.get("notes", ""),
-            finalized=finalized,
-            created_by_user_id=current_user.id if current_user else None,
-            created_by_source=source,
-            finalized_at=datetime.now() if finalized else None
+    if is_new and is_date_archived(db, date_obj):
+        raise HTTPException(
+            status_code=400,
+            detail=f"{date_obj} has been archived and can no longer be edited."
         )
-        db.add(daily_balance)
-        db.flush()
-    else:
-        daily_balance.notes = form_data.get("notes", "")
-        was_finalized = daily_balance.finalized
-        daily_balance.finalized = finalized
 
-        if current_user:
-            daily_balance.edited_by_user_id = current_user.id
-
-        if finalized and not was_finalized:
-            daily_balance.finalized_at = datetime.now()
-            if not daily_balance.created_by_user_id and current_user:
-                daily_balance.created_by_user_id = current_user.id
-                daily_balance.created_by_source = source
-
-    for entry in daily_balance.financial_line_items:
-        db.delete(entry)
-    db.flush()
+    current_version = 0 if is_new else daily_balance.version
+    if expected_version is not None and expected_version != current_version:
+        raise HTTPException(status_code=409, detail=f"{date_obj} was changed by someone else since you opened it.")
 
     financial_templates = db.query(FinancialLineItemTemplate).order_by(
         FinancialLineItemTemplate.display_order
     ).all()
 
+    line_items = []
     for template in financial_templates:
         value_key = f"financial_item_{template.id}"
         value_str = form_data.get(value_key)
@@ -89,33 +139,38 @@ def save_daily_balance_data(
                 detail=f"Financial item '{template.name}' must be a valid number."
             )
 
-        line_item = DailyFinancialLineItem(
-            daily_balance_id=daily_balance.id,
+        line_items.append(dict(
             template_id=template.id,
             name=template.name,
             category=template.category,
             value=value,
             display_order=template.display_order,
             is_employee_tip=False
-        )
-        db.add(line_item)
+        ))
 
     employee_position_combos = form_data.getlist("employee_ids")
     employee_position_combos = [combo for combo in employee_position_combos if combo]
 
-    for entry in daily_balance.employee_entries:
-        db.delete(entry)
-    db.flush()
+    combo_ids = [tuple(int(part) for part in combo.split('-')) for combo in employee_position_combos]
+    employees = {}
+    positions = {}
+    if combo_ids:
+        employees = {
+            employee.id: employee
+            for employee in db.query(Employee).filter(Employee.id.in_({emp_id for emp_id, _ in combo_ids})).all()
+        }
+        positions = {
+            position.id: position
+            for position in db.query(Position).options(selectinload(Position.tip_requirements))
+                .filter(Position.id.in_({pos_id for _, pos_id in combo_ids})).all()
+        }
 
     max_order = len(financial_templates)
+    employee_entries = []
 
-    for combo in employee_position_combos:
-        emp_id, pos_id = combo.split('-')
-        emp_id = int(emp_id)
-        pos_id = int(pos_id)
-
-        employee = db.query(Employee).filter(Employee.id == emp_id).first()
-        position = db.query(Position).filter(Position.id == pos_id).first()
+    for combo, (emp_id, pos_id) in zip(employee_position_combos, combo_ids):
+        employee = employees.get(emp_id)
+        position = positions.get(pos_id)
 
         if not employee or not position:
             continue
@@ -144,33 +199,33 @@ def save_daily_balance_data(
 
                 if req.apply_to_revenue and value != 0:
                     max_order += 1
-                    tip_line_item = DailyFinancialLineItem(
-                        daily_balance_id=daily_balance.id,
+                    line_items.append(dict(
                         template_id=None,
-                        name=f"{employee.display_name} ({position.name}) - {req.name}",
+                        name=tip_line_item_name(employee, position, req),
                         category="revenue",
                         value=value if not req.revenue_is_deduction else -value,
                         display_order=max_order,
                         is_employee_tip=True,
                         employee_id=emp_id,
-                        employee_name_snapshot=employee.display_name
-                    )
-                    db.add(tip_line_item)
+                        employee_name_snapshot=employee.display_name,
+                        position_id=pos_id,
+                        tip_field_name=req.field_name
+                    ))
 
                 if req.apply_to_expense and value != 0:
                     max_order += 1
-                    tip_line_item = DailyFinancialLineItem(
-                        daily_balance_id=daily_balance.id,
+                    line_items.append(dict(
                         template_id=None,
-                        name=f"{employee.display_name} ({position.name}) - {req.name}",
+                        name=tip_line_item_name(employee, position, req),
                         category="expense",
                         value=value if not req.expense_is_deduction else -value,
                         display_order=max_order,
                         is_employee_tip=True,
                         employee_id=emp_id,
-                        employee_name_snapshot=employee.display_name
-                    )
-                    db.add(tip_line_item)
+                        employee_name_snapshot=employee.display_name,
+                        position_id=pos_id,
+                        tip_field_name=req.field_name
+                    ))
 
             elif req.is_total:
                 total = 0
@@ -192,19 +247,13 @@ def save_daily_balance_data(
                             total += value
                 tip_values[req.field_name] = round(total, 2)
 
-        entry = DailyEmployeeEntry(
-            daily_balance_id=daily_balance.id,
+        employee_entries.append(dict(
             employee_id=emp_id,
             position_id=pos_id,
             tip_values=tip_values,
             employee_name_snapshot=employee.display_name,
             position_name_snapshot=position.name
-        )
-        db.add(entry)
-
-    for check in daily_balance.checks:
-        db.delete(check)
-    db.flush()
+        ))
 
     check_indices = []
     for key in form_data.keys():
@@ -212,6 +261,7 @@ def save_daily_balance_data(
             index = key.split("_")[-1]
             check_indices.append(index)
 
+    checks = []
     for index in check_indices:
         check_number = form_data.get(f"check_number_{index}", "").strip()
         check_date = form_data.get(f"check_date_{index}", "").strip()
@@ -225,19 +275,13 @@ def save_daily_balance_data(
             except (ValueError, TypeError):
                 continue
 
-            check = DailyBalanceCheck(
-                daily_balance_id=daily_balance.id,
+            checks.append(dict(
                 check_number=check_number if check_number else None,
                 date=check_date,
                 payable_to=check_payable_to,
                 total=check_total,
                 memo=check_memo if check_memo else None
-            )
-            db.add(check)
-
-    for eft in daily_balance.efts:
-        db.delete(eft)
-    db.flush()
+            ))
 
     eft_indices = []
     for key in form_data.keys():
@@ -245,6 +289,7 @@ def save_daily_balance_data(
             index = key.split("_")[-1]
             eft_indices.append(index)
 
+    efts = []
     for index in eft_indices:
         eft_date = form_data.get(f"eft_date_{index}", "").strip()
         eft_card_number = form_data.get(f"eft_card_number_{index}", "").strip()
@@ -258,19 +303,71 @@ def save_daily_balance_data(
             except (ValueError, TypeError):
                 continue
 
-            eft = DailyBalanceEFT(
-                daily_balance_id=daily_balance.id,
+            efts.append(dict(
                 date=eft_date,
                 card_number=eft_card_number if eft_card_number else None,
                 payable_to=eft_payable_to,
                 total=eft_total,
                 memo=eft_memo if eft_memo else None
-            )
-            db.add(eft)
+            ))
+
+    # Everything below writes; the first statement takes the write lock
+    if is_new:
+        daily_balance = DailyBalance(
+            date=date_obj,
+            day_of_week=day_of_week,
+            notes=form_data.get("notes", ""),
+            finalized=finalized,
+            created_by_user_id=current_user.id if current_user else None,
+            created_by_source=source,
+            finalized_at=datetime.now() if finalized else None,
+            version=1
+        )
+        db.add(daily_balance)
+        try:
+            db.flush()
+        except IntegrityError:
+            # Another editor created the day first
+            db.rollback()
+            raise HTTPException(status_code=409, detail=f"{date_obj} was saved by someone else since you opened it.")
+    else:
+        version_check = "AND version = :expected_version" if expected_version is not None else ""
+        result = db.execute(
+            text(f"UPDATE daily_balance SET version = version + 1 WHERE id = :id {version_check}"),
+            {"id": daily_balance.id, "expected_version": expected_version}
+        )
+        if result.rowcount == 0:
+            db.rollback()
+            raise HTTPException(status_code=409, detail=f"{date_obj} was changed by someone else since you opened it.")
+
+        daily_balance.notes = form_data.get("notes", "")
+        daily_balance.finalized = finalized
+
+        if current_user:
+            daily_balance.edited_by_user_id = current_user.id
+
+        if finalized and not was_finalized:
+            daily_balance.finalized_at = datetime.now()
+            if not daily_balance.created_by_user_id and current_user:
+                daily_balance.created_by_user_id = current_user.id
+                daily_balance.created_by_source = source
+
+        for table in ("daily_financial_line_items", "daily_employee_entries", "daily_balance_checks", "daily_balance_efts"):
+            db.execute(text(f"DELETE FROM {table} WHERE daily_balance_id = :id"), {"id": daily_balance.id})
+
+    db.add_all(
+        [DailyFinancialLineItem(daily_balance_id=daily_balance.id, **item) for item in line_items]
+        + [DailyEmployeeEntry(daily_balance_id=daily_balance.id, **entry) for entry in employee_entries]
+        + [DailyBalanceCheck(daily_balance_id=daily_balance.id, **check) for check in checks]
+        + [DailyBalanceEFT(daily_balance_id=daily_balance.id, **eft) for eft in efts]
+    )
 
     db.commit()
     db.refresh(daily_balance)
 
+    if finalized or was_finalized:
+        invalidate_analytics_cache()
+
     return daily_balance
 
 def serialize_employee_position_combo(emp, position, db, status_indicator=None):
@@ -413,6 +510,7 @@ async def daily_balance_page(
     day_of_week = DAYS_OF_WEEK[target_date.weekday()]
 
     daily_balance = db.query(DailyBalance).filter(DailyBalance.date == target_date).first()
+    archived = daily_balance is None and is_date_archived(db, target_date)
 
     all_schedules = db.query(EmployeePositionSchedule).join(Employee).filter(Employee.is_active == True).all()
     all_employee_position_combos = []
@@ -529,13 +627,17 @@ async def daily_balance_page(
             "financial_line_items": financial_line_items,
             "previous_ending_till": previous_ending_till,
             "existing_checks": existing_checks,
-            "existing_efts": existing_efts
+            "existing_efts": existing_efts,
+            "archived": archived,
+            "snapshot": daily_balance_snapshot(daily_balance) if daily_balance else None,
+            "finalize_hooks": get_finalize_hook_status(daily_balance.id) if daily_balance and daily_balance.finalized else []
         }
     )
 
 @router.post("/daily-balance/save")
-async def save_daily_balance_route(
+def save_daily_balance_route(
     request: Request,
+    form_data: FormData = Depends(get_form_data),
     target_date: str = Form(...),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -543,12 +645,18 @@ async def save_daily_balance_route(
     date_obj = datetime.strptime(target_date, "%Y-%m-%d").date()
     day_of_week = DAYS_OF_WEEK[date_obj.weekday()]
 
-    form_data = await request.form()
 
     try:
-        save_daily_balance_data(db, date_obj, day_of_week, form_data, finalized=False, current_user=current_user, source="user")
+        daily_balance = save_daily_balance_data(
+            db, date_obj, day_of_week, form_data, finalized=False, current_user=current_user, source="user",
+            expected_version=form_version(form_data)
+        )
+        if wants_json(request):
+            return JSONResponse(content={"success": True, "message": "Daily balance saved", "version": daily_balance.version})
         return RedirectResponse(url=f"/daily-balance?selected_date={target_date}", status_code=302)
     except HTTPException as e:
+        if wants_json(request):
+            return save_error_response(db, date_obj, e)
         all_schedules = db.query(EmployeePositionSchedule).join(Employee).filter(Employee.is_active == True).all()
         all_employee_position_combos = []
         for schedule in all_schedules:
@@ -645,8 +753,9 @@ async def save_daily_balance_route(
         )
 
 @router.post("/daily-balance/finalize")
-async def finalize_daily_balance_route(
+def finalize_daily_balance_route(
     request: Request,
+    form_data: FormData = Depends(get_form_data),
     target_date: str = Form(...),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -654,13 +763,21 @@ async def finalize_daily_balance_route(
     date_obj = datetime.strptime(target_date, "%Y-%m-%d").date()
     day_of_week = DAYS_OF_WEEK[date_obj.weekday()]
 
-    form_data = await request.form()
 
     try:
-        daily_balance = save_daily_balance_data(db, date_obj, day_of_week, form_data, finalized=True, current_user=current_user, source="user")
-        generate_daily_balance_csv(daily_balance, daily_balance.employee_entries, current_user=current_user, source="user")
+        daily_balance = save_daily_balance_data(
+            db, date_obj, day_of_week, form_data, finalized=True, current_user=current_user, source="user",
+            expected_version=form_version(form_data)
+        )
+        # The CSV, analytics refresh and report email run in the background
+        notify_emails = [email for email in form_data.getlist("notify_emails[]") if email and validate_email(email)]
+        enqueue_finalize_hooks(daily_balance.id, current_user.id if current_user else None, notify_emails)
+        if wants_json(request):
+            return JSONResponse(content={"success": True, "message": "Daily balance finalized", "version": daily_balance.version})
         return RedirectResponse(url=f"/daily-balance?selected_date={target_date}", status_code=302)
     except HTTPException as e:
+        if wants_json(request):
+            return save_error_response(db, date_obj, e)
         all_schedules = db.query(EmployeePositionSchedule).join(Employee).filter(Employee.is_active == True).all()
         all_employee_position_combos = []
         for schedule in all_schedules:
@@ -756,6 +873,244 @@ async def finalize_daily_balance_route(
             }
         )
 
+def version_conflict_response(daily_balance):
+    """409 carrying the day's current values, for the editor to merge with its own."""
+    if daily_balance is None:
+        return JSONResponse(status_code=409, content={
+            "success": False,
+            "message": "This day was removed since you opened it.",
+            "current": None
+        })
+
+    snapshot = daily_balance_snapshot(daily_balance)
+    editor = f" by {snapshot['edited_by']}" if snapshot["edited_by"] else ""
+    return JSONResponse(status_code=409, content={
+        "success": False,
+        "message": f"This day was changed{editor} since you opened it.",
+        "current": snapshot
+    })
+
+def wants_json(request: Request):
+    """The form's scripts submit with fetch and ask for JSON instead of a redirect or page."""
+    return "application/json" in request.headers.get("accept", "")
+
+def form_version(form_data):
+    """The version the editor loaded, or None if the form didn't send one."""
+    try:
+        return int(form_data.get("version"))
+    except (TypeError, ValueError):
+        return None
+
+def save_error_response(db: Session, date_obj: date_cls, error: HTTPException):
+    if error.status_code == 409:
+        return version_conflict_response(db.query(DailyBalance).filter(DailyBalance.date == date_obj).first())
+    return JSONResponse(status_code=error.status_code, content={"success": False, "message": error.detail})
+
+def write_tip_line_items(db: Session, daily_balance_id: int, entry: DailyEmployeeEntry, req: TipEntryRequirement, value: float):
+    """Update, add or remove the revenue/expense lines a tip field feeds, in place."""
+    name = tip_line_item_name(entry.employee, entry.position, req)
+    # Lines saved before tip_field_name existed are matched on the "(position) - field"
+    # suffix they were named with
+    suffix = f" ({entry.position_name_snapshot or entry.position.name}) - {req.name}"
+    targets = [
+        ("revenue", req.apply_to_revenue, req.revenue_is_deduction),
+        ("expense", req.apply_to_expense, req.expense_is_deduction),
+    ]
+    for category, applies, is_deduction in targets:
+        if not applies:
+            continue
+        params = {
+            "daily_balance_id": daily_balance_id,
+            "employee_id": entry.employee_id,
+            "position_id": entry.position_id,
+            "tip_field_name": req.field_name,
+            "category": category,
+            "suffix": suffix,
+            "name": name,
+            "value": -value if is_deduction else value,
+            "employee_name": entry.employee.display_name
+        }
+        match = """
+            daily_balance_id = :daily_balance_id AND is_employee_tip = 1 AND employee_id = :employee_id
+            AND category = :category
+            AND (
+                (position_id = :position_id AND tip_field_name = :tip_field_name)
+                OR (tip_field_name IS NULL AND substr(name, -length(:suffix)) = :suffix)
+            )
+        """
+        if value == 0:
+            db.execute(text(f"DELETE FROM daily_financial_line_items WHERE {match}"), params)
+            continue
+
+        updated = db.execute(text(f"""
+            UPDATE daily_financial_line_items
+            SET value = :value, name = :name, position_id = :position_id, tip_field_name = :tip_field_name
+            WHERE {match}
+        """), params)
+        if updated.rowcount == 0:
+            db.execute(text("""
+                INSERT INTO daily_financial_line_items (
+                    daily_balance_id, template_id, name, category, value, display_order,
+                    is_employee_tip, employee_id, employee_name_snapshot, position_id, tip_field_name
+                )
+                SELECT :daily_balance_id, NULL, :name, :category, :value, COALESCE(MAX(display_order), 0) + 1,
+                       1, :employee_id, :employee_name, :position_id, :tip_field_name
+                FROM daily_financial_line_items
+                WHERE daily_balance_id = :daily_balance_id
+            """), params)
+
+@router.patch("/daily-balance/{target_date}")
+def patch_daily_balance_route(
+    target_date: str,
+    patch: DailyBalancePatch,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Autosave individual fields of a saved draft day in place.
+
+    The patch carries the version the editor loaded. The day's version is
+    bumped with a conditional UPDATE before anything else is written, so a
+    patch based on an outdated copy gets a 409 with the day's current values
+    instead of overwriting another editor's changes.
+    """
+    if not current_user:
+        return JSONResponse(status_code=401, content={"success": False, "message": "Unauthorized"})
+
+    try:
+        date_obj = datetime.strptime(target_date, "%Y-%m-%d").date()
+    except ValueError:
+        return JSONResponse(status_code=400, content={"success": False, "message": "Invalid date format"})
+
+    daily_balance = db.query(DailyBalance).filter(DailyBalance.date == date_obj).first()
+    if not daily_balance:
+        return JSONResponse(status_code=404, content={"success": False, "message": "Save the day once before autosaving individual fields"})
+    if daily_balance.finalized:
+        return JSONResponse(status_code=400, content={"success": False, "message": "Finalized reports can only be changed by saving the whole report in edit mode"})
+    if daily_balance.version != patch.version:
+        return version_conflict_response(daily_balance)
+
+    template_ids = {item.template_id for item in patch.line_items}
+    financial_templates = {}
+    if template_ids:
+        financial_templates = {
+            template.id: template
+            for template in db.query(FinancialLineItemTemplate).filter(FinancialLineItemTemplate.id.in_(template_ids)).all()
+        }
+    for item in patch.line_items:
+        if item.template_id not in financial_templates:
+            return JSONResponse(status_code=400, content={"success": False, "message": f"Unknown financial item {item.template_id}"})
+
+    entries = {(entry.employee_id, entry.position_id): entry for entry in daily_balance.employee_entries}
+    tip_updates = {}
+    tip_line_items = []
+    for tip in patch.tips:
+        entry = entries.get((tip.employee_id, tip.position_id))
+        if not entry or not entry.employee or not entry.position:
+            return JSONResponse(status_code=400, content={"success": False, "message": "Employee is not on this day's saved report; save the report to add them"})
+
+        req = next((r for r in entry.position.tip_requirements if r.field_name == tip.field_name), None)
+        if not req or req.no_input or req.is_total:
+            return JSONResponse(status_code=400, content={"success": False, "message": f"'{tip.field_name}' is not an editable field for {entry.position.name}"})
+
+        value = round(tip.value, 2)
+        tip_values = tip_updates.setdefault(entry.id, (entry, dict(entry.tip_values or {})))[1]
+        tip_values[req.field_name] = value
+        if req.apply_to_revenue or req.apply_to_expense:
+            tip_line_items.append((entry, req, value))
+
+    for entry, tip_values in tip_updates.values():
+        recompute_tip_totals(entry.position, tip_values)
+
+    # Bumping the version first takes the write lock and detects a write
+    # that happened since this editor loaded the day
+    result = db.execute(text("""
+        UPDATE daily_balance
+        SET version = version + 1, edited_by_user_id = :user_id, notes = COALESCE(:notes, notes)
+        WHERE id = :id AND version = :version AND finalized = 0
+    """), {"id": daily_balance.id, "version": patch.version, "user_id": current_user.id, "notes": patch.notes})
+    if result.rowcount == 0:
+        db.rollback()
+        return version_conflict_response(daily_balance)
+
+    for item in patch.line_items:
+        value = round(item.value, 2)
+        updated = db.execute(text("""
+            UPDATE daily_financial_line_items SET value = :value
+            WHERE daily_balance_id = :daily_balance_id AND template_id = :template_id AND is_employee_tip = 0
+        """), {"daily_balance_id": daily_balance.id, "template_id": item.template_id, "value": value})
+        if updated.rowcount == 0:
+            template = financial_templates[item.template_id]
+            db.execute(text("""
+                INSERT INTO daily_financial_line_items (daily_balance_id, template_id, name, category, value, display_order, is_employee_tip)
+                VALUES (:daily_balance_id, :template_id, :name, :category, :value, :display_order, 0)
+            """), {
+                "daily_balance_id": daily_balance.id, "template_id": template.id, "name": template.name,
+                "category": template.category, "value": value, "display_order": template.display_order
+            })
+
+    for entry, tip_values in tip_updates.values():
+        db.execute(
+            text("UPDATE daily_employee_entries SET tip_values = :tip_values WHERE id = :id"),
+            {"id": entry.id, "tip_values": json.dumps(tip_values)}
+        )
+
+    for entry, req, value in tip_line_items:
+        write_tip_line_items(db, daily_balance.id, entry, req, value)
+
+    db.commit()
+
+    return JSONResponse(content={
+        "success": True,
+        "version": patch.version + 1,
+        "tips": {
+            f"{entry.employee_id}-{entry.position_id}": tip_values
+            for entry, tip_values in tip_updates.values()
+        }
+    })
+
+@router.get("/daily-balance/finalize-hooks")
+async def finalize_hooks_status(
+    date: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    if not current_user:
+        return JSONResponse(status_code=401, content={"success": False, "message": "Unauthorized"})
+
+    try:
+        date_obj = datetime.strptime(date, "%Y-%m-%d").date()
+    except ValueError:
+        return JSONResponse(status_code=400, content={"success": False, "message": "Invalid date format"})
+
+    daily_balance = db.query(DailyBalance).filter(DailyBalance.date == date_obj).first()
+    if not daily_balance:
+        return JSONResponse(status_code=404, content={"success": False, "message": "No daily balance for this date"})
+
+    return JSONResponse(content={"success": True, "hooks": get_finalize_hook_status(daily_balance.id)})
+
+@router.post("/daily-balance/finalize-hooks/retry")
+def retry_finalize_hooks(
+    target_date: str = Form(...),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    if not current_user:
+        return JSONResponse(status_code=401, content={"success": False, "message": "Unauthorized"})
+
+    try:
+        date_obj = datetime.strptime(target_date, "%Y-%m-%d").date()
+    except ValueError:
+        return JSONResponse(status_code=400, content={"success": False, "message": "Invalid date format"})
+
+    daily_balance = db.query(DailyBalance).filter(DailyBalance.date == date_obj).first()
+    if not daily_balance or not daily_balance.finalized:
+        return JSONResponse(status_code=404, content={"success": False, "message": "Finalized report not found for this date"})
+
+    retried = retry_failed_hooks(daily_balance.id)
+    print(f"Re-queued {retried} finalize hook(s) for {target_date}")
+    return JSONResponse(content={"success": True, "message": f"Re-queued {retried} task(s)"})
+
 @router.get("/daily-balance/export")
 async def export_daily_balance(
     date: str,
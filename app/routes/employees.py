@@ -38,7 +38,7 @@ async def new_employee_page(
     )
 
 @router.post("/employees/new")
-async def create_employee(
+def create_employee(
     request: Request,
     first_name: str = Form(...),
     last_name: str = Form(...),
@@ -126,7 +126,7 @@ async def edit_employee_page(
     )
 
 @router.post("/employees/{slug}/edit")
-async def update_employee(
+def update_employee(
     slug: str,
     request: Request,
     first_name: str = Form(...),
@@ -167,7 +167,7 @@ async def update_employee(
     return RedirectResponse(url=f"/employees/{slug}", status_code=302)
 
 @router.post("/employees/{slug}/delete")
-async def delete_employee(
+def delete_employee(
     slug: str,
     request: Request,
     db: Session = Depends(get_db),
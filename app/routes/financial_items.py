@@ -45,7 +45,7 @@ async def get_templates(
     return {"revenue": revenue_items, "expense": expense_items}
 
 @router.post("/api/financial-items/templates")
-async def create_template(
+def create_template(
     template: FinancialLineItemTemplateCreate,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -83,7 +83,7 @@ async def create_template(
     }
 
 @router.put("/api/financial-items/templates/{template_id}")
-async def update_template(
+def update_template(
     template_id: int,
     template: FinancialLineItemTemplateUpdate,
     db: Session = Depends(get_db),
@@ -108,7 +108,7 @@ async def update_template(
     return {"success": True}
 
 @router.delete("/api/financial-items/templates/{template_id}")
-async def delete_template(
+def delete_template(
     template_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -129,7 +129,7 @@ async def delete_template(
     return {"success": True}
 
 @router.post("/api/financial-items/templates/reorder")
-async def reorder_templates(
+def reorder_templates(
     items: List[dict],
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
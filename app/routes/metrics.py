@@ -0,0 +1,33 @@
+import os
+import secrets
+from fastapi import APIRouter, Request, Depends
+from fastapi.responses import PlainTextResponse
+from sqlalchemy.orm import Session
+from app.database import get_db
+from app.auth.jwt_handler import get_current_user_from_cookie
+from app.utils.metrics import render_metrics
+
+router = APIRouter()
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics(request: Request, db: Session = Depends(get_db)):
+    """
+    Prometheus text exposition of in-process metrics.
+
+    Requires either an admin session or, when METRICS_TOKEN is set, the token
+    as a bearer token (Authorization: Bearer <token>) or a ?token= query
+    parameter. Anonymous access must be enabled explicitly with
+    METRICS_PUBLIC=1.
+    """
+    if os.getenv("METRICS_PUBLIC", "0") != "1":
+        expected_token = os.getenv("METRICS_TOKEN")
+        auth_header = request.headers.get("authorization", "")
+        provided = auth_header[7:] if auth_header.lower().startswith("bearer ") else request.query_params.get("token", "")
+        token_ok = bool(expected_token and provided) and secrets.compare_digest(provided, expected_token)
+
+        if not token_ok:
+            user = get_current_user_from_cookie(request, db)
+            if user is None or not user.is_admin:
+                return PlainTextResponse("Unauthorized\n", status_code=401)
+
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
@@ -48,7 +48,7 @@ async def new_position_page(
     )
 
 @router.post("/positions/new")
-async def create_position(
+def create_position(
     request: Request,
     name: str = Form(...),
     tip_requirement_ids: List[int] = Form([]),
@@ -99,7 +99,7 @@ async def edit_position_page(
     )
 
 @router.post("/positions/{slug}/edit")
-async def update_position(
+def update_position(
     slug: str,
     request: Request,
     name: str = Form(...),
@@ -128,7 +128,7 @@ async def update_position(
     return RedirectResponse(url="/positions", status_code=302)
 
 @router.post("/positions/{slug}/delete")
-async def delete_position(
+def delete_position(
     slug: str,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_admin_user)
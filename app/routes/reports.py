@@ -1,5 +1,8 @@
 from fastapi import APIRouter, Depends, Request, Form
 from fastapi.responses import RedirectResponse, FileResponse, JSONResponse
+from fastapi.concurrency import run_in_threadpool
+from starlette.background import BackgroundTask
+from starlette.datastructures import FormData
 from fastapi.templating import Jinja2Templates
 from sqlalchemy.orm import Session
 from datetime import datetime, date
@@ -7,17 +10,23 @@ from dateutil.relativedelta import relativedelta
 from typing import Optional, List
 import os
 import re
-from app.database import get_db
+from app.database import get_report_db
 from app.models import User, DailyBalance, Employee, DailyEmployeeEntry
 from app.auth.jwt_handler import get_current_user
 from app.utils.csv_generator import generate_tip_report_csv, generate_consolidated_daily_balance_csv, generate_employee_tip_report_csv
 from app.utils.csv_reader import get_saved_tip_reports, parse_tip_report_csv, get_saved_daily_balance_reports, parse_daily_balance_csv
-from app.utils.email import send_report_emails
+from app.services.email_outbox import queue_report_emails
+from app.utils.archive import archive_scope
+from app.utils.ledger_export import export_ledger
 
 def validate_email(email: str) -> bool:
     pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
     return re.match(pattern, email) is not None
 
+async def get_form_data(request: Request) -> FormData:
+    """The parsed form, read as a dependency so the route itself can be a plain def."""
+    return await request.form()
+
 router = APIRouter()
 templates = Jinja2Templates(directory="app/templates")
 
@@ -50,7 +59,7 @@ async def reports_index(
 async def daily_balance_reports_page(
     request: Request,
     month: str = None,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_report_db),
     current_user: User = Depends(get_current_user)
 ):
     if not current_user:
@@ -68,33 +77,34 @@ async def daily_balance_reports_page(
     next_month = month_start + relativedelta(months=1)
     prev_month = month_start - relativedelta(months=1)
 
-    finalized_reports = db.query(DailyBalance).filter(
-        DailyBalance.date >= month_start,
-        DailyBalance.date < next_month,
-        DailyBalance.finalized == True
-    ).order_by(DailyBalance.date.desc()).all()
-
-    saved_reports = get_saved_daily_balance_reports(limit=4)
-
-    return templates.TemplateResponse(
-        "reports/daily_balance_list.html",
-        {
-            "request": request,
-            "current_user": current_user,
-            "current_month": target_date,
-            "prev_month": prev_month,
-            "next_month": next_month,
-            "finalized_reports": finalized_reports,
-            "saved_reports": saved_reports,
-            "is_current_month": target_date.year == date.today().year and target_date.month == date.today().month
-        }
-    )
+    with archive_scope(db, month_start, next_month - relativedelta(days=1)) as db:
+        finalized_reports = db.query(DailyBalance).filter(
+            DailyBalance.date >= month_start,
+            DailyBalance.date < next_month,
+            DailyBalance.finalized == True
+        ).order_by(DailyBalance.date.desc()).all()
+
+        saved_reports = get_saved_daily_balance_reports(limit=4)
+
+        return templates.TemplateResponse(
+            "reports/daily_balance_list.html",
+            {
+                "request": request,
+                "current_user": current_user,
+                "current_month": target_date,
+                "prev_month": prev_month,
+                "next_month": next_month,
+                "finalized_reports": finalized_reports,
+                "saved_reports": saved_reports,
+                "is_current_month": target_date.year == date.today().year and target_date.month == date.today().month
+            }
+        )
 
 @router.get("/reports/daily-balance/export")
 async def export_consolidated_daily_balance(
     start_date: str,
     end_date: str,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_report_db),
     current_user: User = Depends(get_current_user)
 ):
     if not current_user:
@@ -121,6 +131,38 @@ async def export_consolidated_daily_balance(
         media_type="text/csv"
     )
 
+@router.get("/reports/ledger/export")
+async def export_ledger_file(
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    format: str = "auto",
+    db: Session = Depends(get_report_db),
+    current_user: User = Depends(get_current_user)
+):
+    if not current_user:
+        return RedirectResponse(url="/login", status_code=303)
+
+    try:
+        start_date_obj = datetime.strptime(start_date, "%Y-%m-%d").date() if start_date else None
+        end_date_obj = datetime.strptime(end_date, "%Y-%m-%d").date() if end_date else None
+    except ValueError:
+        return JSONResponse(status_code=400, content={"success": False, "message": "Dates must be in YYYY-MM-DD format"})
+
+    try:
+        # Multi-year exports take seconds of reads and encoding; keep them off the event loop
+        stats = await run_in_threadpool(export_ledger, db, start_date=start_date_obj, end_date=end_date_obj, fmt=format)
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"success": False, "message": str(e)})
+
+    media_type = "application/vnd.apache.parquet" if stats["format"] == "parquet" else "application/x-ndjson"
+    # The export is a one-off download; remove it once it has been sent
+    return FileResponse(
+        path=stats["path"],
+        filename=os.path.basename(stats["path"]),
+        media_type=media_type,
+        background=BackgroundTask(os.remove, stats["path"])
+    )
+
 @router.get("/reports/daily-balance/view/{year}/{month}/{filename}")
 async def view_saved_daily_balance_report(
     request: Request,
@@ -190,7 +232,7 @@ async def download_saved_daily_balance_report(
     )
 
 @router.delete("/reports/daily-balance/delete/{year}/{month}/{filename}")
-async def delete_saved_daily_balance_report(
+def delete_saved_daily_balance_report(
     year: str,
     month: str,
     filename: str,
@@ -260,7 +302,7 @@ async def saved_daily_balance_reports(
 async def tip_report_page(
     request: Request,
     search: Optional[str] = None,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_report_db),
     current_user: User = Depends(get_current_user)
 ):
     if not current_user:
@@ -305,7 +347,7 @@ async def employee_tip_report(
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
     month: Optional[str] = None,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_report_db),
     current_user: User = Depends(get_current_user)
 ):
     if not current_user:
@@ -338,63 +380,64 @@ async def employee_tip_report(
         start_date_obj = target_date
         end_date_obj = start_date_obj + relativedelta(months=1) - relativedelta(days=1)
 
-    entries = db.query(DailyEmployeeEntry).filter(
-        DailyEmployeeEntry.employee_id == employee.id
-    ).join(DailyBalance).filter(
-        DailyBalance.finalized == True,
-        DailyBalance.date >= start_date_obj,
-        DailyBalance.date <= end_date_obj
-    ).order_by(DailyBalance.date.desc()).all()
-
-    entries_by_position = {}
-    all_tip_requirements = {}
-
-    for entry in entries:
-        if entry.position:
-            pos_name = entry.position.name
-            if pos_name not in entries_by_position:
-                entries_by_position[pos_name] = {
-                    "position": entry.position,
-                    "entries": [],
-                    "tip_totals": {}
-                }
-            entries_by_position[pos_name]["entries"].append(entry)
-
-            if entry.position.tip_requirements:
-                for req in entry.position.tip_requirements:
-                    if req.field_name not in entries_by_position[pos_name]["tip_totals"]:
-                        entries_by_position[pos_name]["tip_totals"][req.field_name] = 0
-                    entries_by_position[pos_name]["tip_totals"][req.field_name] += entry.get_tip_value(req.field_name, 0)
-
-                    if req.field_name not in all_tip_requirements:
-                        all_tip_requirements[req.field_name] = req
-
-    prev_month = target_date - relativedelta(months=1)
-    next_month = target_date + relativedelta(months=1)
-
-    return templates.TemplateResponse(
-        "reports/employee_tip_detail.html",
-        {
-            "request": request,
-            "current_user": current_user,
-            "employee": employee,
-            "entries": entries,
-            "entries_by_position": entries_by_position,
-            "start_date": start_date_obj,
-            "end_date": end_date_obj,
-            "current_month": target_date,
-            "prev_month": prev_month,
-            "next_month": next_month,
-            "is_custom_range": bool(start_date and end_date)
-        }
-    )
+    with archive_scope(db, start_date_obj, end_date_obj) as db:
+        entries = db.query(DailyEmployeeEntry).filter(
+            DailyEmployeeEntry.employee_id == employee.id
+        ).join(DailyBalance).filter(
+            DailyBalance.finalized == True,
+            DailyBalance.date >= start_date_obj,
+            DailyBalance.date <= end_date_obj
+        ).order_by(DailyBalance.date.desc()).all()
+
+        entries_by_position = {}
+        all_tip_requirements = {}
+
+        for entry in entries:
+            if entry.position:
+                pos_name = entry.position.name
+                if pos_name not in entries_by_position:
+                    entries_by_position[pos_name] = {
+                        "position": entry.position,
+                        "entries": [],
+                        "tip_totals": {}
+                    }
+                entries_by_position[pos_name]["entries"].append(entry)
+
+                if entry.position.tip_requirements:
+                    for req in entry.position.tip_requirements:
+                        if req.field_name not in entries_by_position[pos_name]["tip_totals"]:
+                            entries_by_position[pos_name]["tip_totals"][req.field_name] = 0
+                        entries_by_position[pos_name]["tip_totals"][req.field_name] += entry.get_tip_value(req.field_name, 0)
+
+                        if req.field_name not in all_tip_requirements:
+                            all_tip_requirements[req.field_name] = req
+
+        prev_month = target_date - relativedelta(months=1)
+        next_month = target_date + relativedelta(months=1)
+
+        return templates.TemplateResponse(
+            "reports/employee_tip_detail.html",
+            {
+                "request": request,
+                "current_user": current_user,
+                "employee": employee,
+                "entries": entries,
+                "entries_by_position": entries_by_position,
+                "start_date": start_date_obj,
+                "end_date": end_date_obj,
+                "current_month": target_date,
+                "prev_month": prev_month,
+                "next_month": next_month,
+                "is_custom_range": bool(start_date and end_date)
+            }
+        )
 
 @router.post("/reports/tip-report/employee/{employee_slug}/generate")
 async def generate_employee_tip_report_endpoint(
     employee_slug: str,
     start_date: str = Form(...),
     end_date: str = Form(...),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_report_db),
     current_user: User = Depends(get_current_user)
 ):
     if not current_user:
@@ -444,7 +487,7 @@ async def export_employee_tip_report(
     employee_slug: str,
     start_date: str,
     end_date: str,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_report_db),
     current_user: User = Depends(get_current_user)
 ):
     if not current_user:
@@ -478,7 +521,7 @@ async def export_employee_tip_report(
 async def export_tip_report(
     start_date: str,
     end_date: str,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_report_db),
     current_user: User = Depends(get_current_user)
 ):
     if not current_user:
@@ -587,7 +630,7 @@ async def download_saved_tip_report(
     )
 
 @router.delete("/reports/tip-report/delete/{year}/{month}/{filename}")
-async def delete_saved_tip_report(
+def delete_saved_tip_report(
     year: str,
     month: str,
     filename: str,
@@ -629,7 +672,7 @@ async def delete_saved_tip_report(
 @router.get("/reports/api/admin-users")
 async def get_admin_users_for_email(
     report_type: str,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_report_db),
     current_user: User = Depends(get_current_user)
 ):
     if not current_user:
@@ -665,11 +708,12 @@ async def get_admin_users_for_email(
     )
 
 @router.post("/reports/daily-balance/email")
-async def email_daily_balance_report(
+def email_daily_balance_report(
     request: Request,
+    form_data: FormData = Depends(get_form_data),
     start_date: str = Form(...),
     end_date: str = Form(...),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_report_db),
     current_user: User = Depends(get_current_user)
 ):
     if not current_user:
@@ -678,7 +722,6 @@ async def email_daily_balance_report(
             content={"success": False, "message": "Unauthorized"}
         )
 
-    form_data = await request.form()
     user_emails = form_data.getlist("user_emails[]")
     additional_email = form_data.get("additional_email", "").strip()
     attach_csv = form_data.get("attach_csv") == "on"
@@ -734,7 +777,7 @@ async def email_daily_balance_report(
         date_display = f"{start_date_obj.strftime('%B %d, %Y')} to {end_date_obj.strftime('%B %d, %Y')}"
         subject = f"Daily Balance Report - {date_display}"
 
-    result = send_report_emails(
+    result = queue_report_emails(
         to_emails=email_list,
         report_type="daily",
         report_filepath=filepath,
@@ -755,11 +798,12 @@ async def email_daily_balance_report(
         )
 
 @router.post("/reports/daily-balance/email/{year}/{month}/{filename}")
-async def email_saved_daily_balance_report(
+def email_saved_daily_balance_report(
     request: Request,
     year: str,
     month: str,
     filename: str,
+    form_data: FormData = Depends(get_form_data),
     current_user: User = Depends(get_current_user)
 ):
     if not current_user:
@@ -768,7 +812,6 @@ async def email_saved_daily_balance_report(
             content={"success": False, "message": "Unauthorized"}
         )
 
-    form_data = await request.form()
     user_emails = form_data.getlist("user_emails[]")
     additional_email = form_data.get("additional_email", "").strip()
     attach_csv = form_data.get("attach_csv") == "on"
@@ -797,7 +840,7 @@ async def email_saved_daily_balance_report(
 
     subject = f"Daily Balance Report - {filename}"
 
-    result = send_report_emails(
+    result = queue_report_emails(
         to_emails=email_list,
         report_type="daily",
         report_filepath=filepath,
@@ -817,11 +860,12 @@ async def email_saved_daily_balance_report(
         )
 
 @router.post("/reports/tip-report/email")
-async def email_tip_report(
+def email_tip_report(
     request: Request,
+    form_data: FormData = Depends(get_form_data),
     start_date: str = Form(...),
     end_date: str = Form(...),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_report_db),
     current_user: User = Depends(get_current_user)
 ):
     if not current_user:
@@ -830,7 +874,6 @@ async def email_tip_report(
             content={"success": False, "message": "Unauthorized"}
         )
 
-    form_data = await request.form()
     user_emails = form_data.getlist("user_emails[]")
     additional_email = form_data.get("additional_email", "").strip()
     attach_csv = form_data.get("attach_csv") == "on"
@@ -872,7 +915,7 @@ async def email_tip_report(
     date_range = f"{start_date_obj.strftime('%B %d, %Y')} to {end_date_obj.strftime('%B %d, %Y')}"
     subject = f"Tip Report - {date_range}"
 
-    result = send_report_emails(
+    result = queue_report_emails(
         to_emails=email_list,
         report_type="tips",
         report_filepath=filepath,
@@ -893,11 +936,12 @@ async def email_tip_report(
         )
 
 @router.post("/reports/tip-report/email/{year}/{month}/{filename}")
-async def email_saved_tip_report(
+def email_saved_tip_report(
     request: Request,
     year: str,
     month: str,
     filename: str,
+    form_data: FormData = Depends(get_form_data),
     current_user: User = Depends(get_current_user)
 ):
     if not current_user:
@@ -906,7 +950,6 @@ async def email_saved_tip_report(
             content={"success": False, "message": "Unauthorized"}
         )
 
-    form_data = await request.form()
     user_emails = form_data.getlist("user_emails[]")
     additional_email = form_data.get("additional_email", "").strip()
     attach_csv = form_data.get("attach_csv") == "on"
@@ -935,7 +978,7 @@ async def email_saved_tip_report(
 
     subject = f"Tip Report - {filename}"
 
-    result = send_report_emails(
+    result = queue_report_emails(
         to_emails=email_list,
         report_type="tips",
         report_filepath=filepath,
@@ -955,12 +998,13 @@ async def email_saved_tip_report(
         )
 
 @router.post("/reports/tip-report/employee/{employee_slug}/email")
-async def email_employee_tip_report(
+def email_employee_tip_report(
     request: Request,
     employee_slug: str,
+    form_data: FormData = Depends(get_form_data),
     start_date: str = Form(...),
     end_date: str = Form(...),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_report_db),
     current_user: User = Depends(get_current_user)
 ):
     if not current_user:
@@ -976,7 +1020,6 @@ async def email_employee_tip_report(
             content={"success": False, "message": "Employee not found"}
         )
 
-    form_data = await request.form()
     user_emails = form_data.getlist("user_emails[]")
     additional_email = form_data.get("additional_email", "").strip()
     attach_csv = form_data.get("attach_csv") == "on"
@@ -1018,7 +1061,7 @@ async def email_employee_tip_report(
     date_range = f"{start_date_obj.strftime('%B %d, %Y')} to {end_date_obj.strftime('%B %d, %Y')}"
     subject = f"Tip Report for {employee.display_name} - {date_range}"
 
-    result = send_report_emails(
+    result = queue_report_emails(
         to_emails=email_list,
         report_type="tips",
         report_filepath=filepath,
@@ -1,16 +1,21 @@
 from fastapi import APIRouter, Depends, Request, Form
 from fastapi.responses import RedirectResponse, JSONResponse
 from fastapi.templating import Jinja2Templates
+from starlette.datastructures import FormData
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 from datetime import datetime
 from typing import Optional
+import hashlib
 import json
-from app.database import get_db, SessionLocal
+import os
+from app.database import get_db, SessionLocal, WriterBusyError
 from app.models import User, Employee
 from app.auth.jwt_handler import get_current_user
-from app.scheduler import scheduler, get_next_run_times
+from app.scheduler import scheduler, task_jobstore, get_next_run_times
 from app.services.scheduler_tasks import run_tip_report_task, run_daily_balance_report_task, run_employee_tip_report_task, run_backup_task
+from app.services.task_calendar import build_task_calendar, MAX_CALENDAR_DAYS
+from app.routes.reports import get_form_data
 
 router = APIRouter()
 templates = Jinja2Templates(directory="app/templates")
@@ -46,7 +51,7 @@ def sync_next_run_times(db: Session):
     db.commit()
 
 @router.get("/scheduled-tasks")
-async def scheduled_tasks_page(
+def scheduled_tasks_page(
     request: Request,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -196,9 +201,41 @@ async def get_next_runs(
             content={"success": False, "message": str(e) if str(e) else "Failed to calculate next run times"}
         )
 
+@router.get("/scheduled-tasks/calendar")
+async def get_task_calendar(
+    days: int = 7,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    if not current_user or not current_user.is_admin:
+        return JSONResponse(
+            status_code=401,
+            content={"success": False, "message": "Unauthorized"}
+        )
+
+    if days < 1 or days > MAX_CALENDAR_DAYS:
+        return JSONResponse(
+            status_code=400,
+            content={"success": False, "message": f"days must be between 1 and {MAX_CALENDAR_DAYS}"}
+        )
+
+    try:
+        calendar = build_task_calendar(db, days=days)
+        return JSONResponse(
+            status_code=200,
+            content={"success": True, **calendar}
+        )
+    except Exception as e:
+        print(f"Error building task calendar: {e}")
+        return JSONResponse(
+            status_code=500,
+            content={"success": False, "message": str(e)}
+        )
+
 @router.post("/scheduled-tasks/create")
-async def create_scheduled_task(
+def create_scheduled_task(
     request: Request,
+    form_data: FormData = Depends(get_form_data),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -208,7 +245,6 @@ async def create_scheduled_task(
             content={"success": False, "message": "Unauthorized"}
         )
 
-    form_data = await request.form()
     name = form_data.get("name", "").strip()
     task_type = form_data.get("task_type")
     schedule_type = form_data.get("schedule_type")
@@ -244,6 +280,7 @@ async def create_scheduled_task(
                 :interval_value, :interval_unit, :starts_at, :date_range_type,
                 :email_list, :bypass_opt_in, 1, :next_run_at, :employee_id, :attach_csv
             )
+            RETURNING id
         """), {
             "name": name,
             "task_type": task_type,
@@ -259,17 +296,17 @@ async def create_scheduled_task(
             "employee_id": employee_id,
             "attach_csv": attach_csv
         })
+        task_id = result.scalar()
         db.commit()
 
-        task_id = db.execute(text("SELECT last_insert_rowid()")).scalar()
-
         print(f"✓ Created scheduled task '{name}' (ID: {task_id}) in database")
 
-        add_job_to_scheduler(
+        fingerprint = add_job_to_scheduler(
             task_id, name, task_type, schedule_type,
             cron_expression, interval_value, interval_unit, starts_at,
             date_range_type, email_list_json, bypass_opt_in, employee_id, attach_csv
         )
+        record_job_fingerprint(db, task_id, fingerprint)
 
         job = scheduler.get_job(f"task_{task_id}")
         if job:
@@ -285,6 +322,8 @@ async def create_scheduled_task(
             content={"success": True, "message": "Scheduled task created successfully"}
         )
 
+    except WriterBusyError:
+        raise
     except Exception as e:
         db.rollback()
         return JSONResponse(
@@ -293,7 +332,7 @@ async def create_scheduled_task(
         )
 
 @router.post("/scheduled-tasks/{task_id}/toggle")
-async def toggle_scheduled_task(
+def toggle_scheduled_task(
     task_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -334,11 +373,12 @@ async def toggle_scheduled_task(
                 WHERE id = :task_id
             """), {"task_id": task_id}).fetchone()
 
-            add_job_to_scheduler(
+            fingerprint = add_job_to_scheduler(
                 task_dict[0], task_dict[1], task_dict[2], task_dict[3],
                 task_dict[4], task_dict[5], task_dict[6], task_dict[7],
                 task_dict[8], task_dict[9], task_dict[10], task_dict[11], task_dict[12]
             )
+            record_job_fingerprint(db, task_id, fingerprint)
         else:
             if scheduler.get_job(job_id):
                 scheduler.remove_job(job_id)
@@ -351,6 +391,8 @@ async def toggle_scheduled_task(
             content={"success": True, "message": "Task status updated"}
         )
 
+    except WriterBusyError:
+        raise
     except Exception as e:
         db.rollback()
         return JSONResponse(
@@ -416,9 +458,10 @@ async def get_scheduled_task(
         )
 
 @router.put("/scheduled-tasks/{task_id}")
-async def update_scheduled_task(
+def update_scheduled_task(
     task_id: int,
     request: Request,
+    form_data: FormData = Depends(get_form_data),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -429,7 +472,6 @@ async def update_scheduled_task(
         )
 
     try:
-        form_data = await request.form()
         name = form_data.get("name", "").strip()
         task_type = form_data.get("task_type")
         schedule_type = form_data.get("schedule_type")
@@ -537,11 +579,12 @@ async def update_scheduled_task(
         """), {"task_id": task_id}).fetchone()
 
         if task and task[0]:
-            add_job_to_scheduler(
+            fingerprint = add_job_to_scheduler(
                 task_id, name, task_type, schedule_type,
                 cron_expression, interval_value, interval_unit, starts_at,
                 date_range_type, email_list_json, bypass_opt_in, employee_id, attach_csv
             )
+            record_job_fingerprint(db, task_id, fingerprint)
             print(f"  → Re-added scheduler job: {job_id}")
 
         # Sync scheduler to ensure consistency
@@ -558,6 +601,8 @@ async def update_scheduled_task(
             status_code=400,
             content={"success": False, "message": f"Validation error: {str(e)}"}
         )
+    except WriterBusyError:
+        raise
     except Exception as e:
         db.rollback()
         print(f"✗ Error updating task {task_id}: {e}")
@@ -569,7 +614,7 @@ async def update_scheduled_task(
         )
 
 @router.delete("/scheduled-tasks/{task_id}")
-async def delete_scheduled_task(
+def delete_scheduled_task(
     task_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -604,6 +649,8 @@ async def delete_scheduled_task(
             content={"success": True, "message": "Task deleted successfully"}
         )
 
+    except WriterBusyError:
+        raise
     except Exception as e:
         db.rollback()
         return JSONResponse(
@@ -611,12 +658,33 @@ async def delete_scheduled_task(
             content={"success": False, "message": str(e)}
         )
 
+def task_job_fingerprint(
+    name, task_type, schedule_type,
+    cron_expression, interval_value, interval_unit, starts_at,
+    date_range_type, email_list_json, bypass_opt_in, employee_id=None, attach_csv=False
+):
+    """Hash of everything that goes into a task's APScheduler job (trigger and args)"""
+    definition = [
+        name, task_type, schedule_type, cron_expression,
+        int(interval_value) if interval_value is not None else None, interval_unit,
+        str(starts_at) if starts_at else None, date_range_type, email_list_json,
+        bool(bypass_opt_in), employee_id, bool(attach_csv),
+        os.getenv('TZ', 'America/Los_Angeles')
+    ]
+    return hashlib.sha256(json.dumps(definition).encode()).hexdigest()
+
+def record_job_fingerprint(db, task_id, fingerprint):
+    db.execute(text("""
+        UPDATE scheduled_tasks SET job_fingerprint = :fingerprint WHERE id = :task_id
+    """), {"fingerprint": fingerprint, "task_id": task_id})
+    db.commit()
+
 def add_job_to_scheduler(
     task_id, name, task_type, schedule_type,
     cron_expression, interval_value, interval_unit, starts_at,
     date_range_type, email_list_json, bypass_opt_in, employee_id=None, attach_csv=False
 ):
-    """Add a job to the APScheduler"""
+    """Add a job to the APScheduler and return its fingerprint"""
     from apscheduler.triggers.cron import CronTrigger
     from apscheduler.triggers.interval import IntervalTrigger
     import pytz
@@ -689,6 +757,12 @@ def add_job_to_scheduler(
     else:
         print(f"  ✗ WARNING: Job {job_id} was added but has no next_run_time!")
 
+    return task_job_fingerprint(
+        name, task_type, schedule_type,
+        cron_expression, interval_value, interval_unit, starts_at,
+        date_range_type, email_list_json, bypass_opt_in, employee_id, attach_csv
+    )
+
 def cleanup_orphaned_executions():
     """Remove task executions that no longer have a parent scheduled task and mark stale running executions as failed"""
     db = SessionLocal()
@@ -731,25 +805,26 @@ def cleanup_orphaned_scheduler_jobs(db):
             SELECT id FROM scheduled_tasks WHERE is_active = 1
         """)).fetchall()}
 
-        # Get all job IDs from APScheduler
-        all_jobs = scheduler.get_jobs()
+        # Get all job IDs from the jobstore (no need to unpickle the jobs)
+        all_job_ids = task_jobstore.get_job_ids()
 
         removed_count = 0
-        for job in all_jobs:
-            # Job IDs are in format "task_{id}"
-            if job.id.startswith("task_"):
-                try:
-                    task_id = int(job.id.replace("task_", ""))
-
-                    # If task doesn't exist in database, remove the job
-                    if task_id not in active_task_ids:
-                        scheduler.remove_job(job.id)
-                        removed_count += 1
-                        print(f"  ✓ Removed orphaned job: {job.id} ('{job.name}')")
-                except ValueError:
-                    # If job ID doesn't follow our naming convention, skip it
-                    print(f"  ⚠ Skipping job with unexpected ID format: {job.id}")
-                    continue
+        with task_jobstore.batch():
+            for job_id in all_job_ids:
+                # Job IDs are in format "task_{id}"
+                if job_id.startswith("task_"):
+                    try:
+                        task_id = int(job_id.replace("task_", ""))
+
+                        # If task doesn't exist in database, remove the job
+                        if task_id not in active_task_ids:
+                            scheduler.remove_job(job_id, jobstore="default")
+                            removed_count += 1
+                            print(f"  ✓ Removed orphaned job: {job_id}")
+                    except ValueError:
+                        # If job ID doesn't follow our naming convention, skip it
+                        print(f"  ⚠ Skipping job with unexpected ID format: {job_id}")
+                        continue
 
         if removed_count > 0:
             print(f"✓ Cleaned up {removed_count} orphaned APScheduler job(s)")
@@ -804,39 +879,83 @@ def sync_scheduler_with_database(db):
         traceback.print_exc()
         return False
 
-def load_scheduled_tasks():
-    """Load all active scheduled tasks from the database and add them to the scheduler"""
-    db = SessionLocal()
-    try:
-        # First, cleanup any orphaned executions
-        cleanup_orphaned_executions()
+def reconcile_scheduled_tasks(db):
+    """
+    Bring the APScheduler jobstore in line with the active tasks, touching only what changed.
 
-        tasks = db.execute(text("""
-            SELECT id, name, task_type, schedule_type, cron_expression,
-                   interval_value, interval_unit, starts_at, date_range_type,
-                   email_list, bypass_opt_in, employee_id, attach_csv
-            FROM scheduled_tasks WHERE is_active = 1
-        """)).fetchall()
+    Each active task's job definition is fingerprinted and compared with the
+    fingerprint recorded when its job was last written. Jobs for unchanged
+    tasks are left alone (so their next run time is not reset); new or edited
+    tasks are re-added and jobs without an active task are removed, all in a
+    single jobstore transaction.
 
-        loaded_count = 0
-        for task in tasks:
+    Returns:
+        Dict with unchanged, updated, removed and failed counts
+    """
+    tasks = db.execute(text("""
+        SELECT id, name, task_type, schedule_type, cron_expression,
+               interval_value, interval_unit, starts_at, date_range_type,
+               email_list, bypass_opt_in, employee_id, attach_csv, job_fingerprint
+        FROM scheduled_tasks WHERE is_active = 1
+    """)).fetchall()
+
+    existing_job_ids = task_jobstore.get_job_ids()
+    active_job_ids = set()
+    changed = []
+    for task in tasks:
+        job_id = f"task_{task[0]}"
+        active_job_ids.add(job_id)
+        fingerprint = task_job_fingerprint(*task[1:13])
+        if job_id in existing_job_ids and task[13] == fingerprint:
+            continue
+        changed.append(task)
+
+    orphaned_job_ids = [
+        job_id for job_id in existing_job_ids
+        if job_id.startswith("task_") and job_id not in active_job_ids
+    ]
+
+    fingerprints = []
+    failed_count = 0
+    with task_jobstore.batch():
+        for job_id in orphaned_job_ids:
+            scheduler.remove_job(job_id, jobstore="default")
+            print(f"  ✓ Removed orphaned job: {job_id}")
+
+        for task in changed:
             try:
-                add_job_to_scheduler(
-                    task[0], task[1], task[2], task[3],
-                    task[4], task[5], task[6], task[7],
-                    task[8], task[9], task[10], task[11], task[12]
-                )
-                loaded_count += 1
+                fingerprint = add_job_to_scheduler(*task[:13])
+                fingerprints.append({"fingerprint": fingerprint, "task_id": task[0]})
                 print(f"  ✓ Loaded task: {task[1]} (ID: {task[0]})")
             except Exception as e:
+                failed_count += 1
                 print(f"  ✗ Failed to load task {task[1]}: {e}")
                 import traceback
                 traceback.print_exc()
 
-        print(f"✓ Loaded {loaded_count}/{len(tasks)} scheduled tasks into APScheduler")
+    if fingerprints:
+        db.execute(text("""
+            UPDATE scheduled_tasks SET job_fingerprint = :fingerprint WHERE id = :task_id
+        """), fingerprints)
+        db.commit()
+
+    return {
+        "unchanged": len(tasks) - len(changed),
+        "updated": len(fingerprints),
+        "removed": len(orphaned_job_ids),
+        "failed": failed_count
+    }
+
+def load_scheduled_tasks():
+    """Reconcile the scheduler with the active tasks in the database at startup"""
+    db = SessionLocal()
+    try:
+        # First, cleanup any orphaned executions
+        cleanup_orphaned_executions()
 
-        # Cleanup orphaned APScheduler jobs (jobs that exist in APScheduler but not in database)
-        cleanup_orphaned_scheduler_jobs(db)
+        stats = reconcile_scheduled_tasks(db)
+        print(f"✓ Scheduled tasks reconciled: {stats['unchanged']} unchanged, {stats['updated']} added/updated, "
+              f"{stats['removed']} orphaned job(s) removed, {stats['failed']} failed")
 
     except Exception as e:
         print(f"✗ Failed to load scheduled tasks: {e}")
@@ -846,7 +965,7 @@ def load_scheduled_tasks():
         db.close()
 
 @router.post("/scheduled-tasks/cleanup-orphaned")
-async def cleanup_orphaned_executions_endpoint(
+def cleanup_orphaned_executions_endpoint(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -873,7 +992,7 @@ async def cleanup_orphaned_executions_endpoint(
         )
 
 @router.post("/scheduled-tasks/cleanup-stale-running")
-async def cleanup_stale_running_executions_endpoint(
+def cleanup_stale_running_executions_endpoint(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -903,6 +1022,8 @@ async def cleanup_stale_running_executions_endpoint(
                 "updated_count": updated_count
             }
         )
+    except WriterBusyError:
+        raise
     except Exception as e:
         db.rollback()
         return JSONResponse(
@@ -12,7 +12,7 @@ router = APIRouter()
 templates = Jinja2Templates(directory="app/templates")
 
 @router.post("/tip-requirements/new")
-async def create_tip_requirement(
+def create_tip_requirement(
     request: Request,
     name: str = Form(...),
     display_order: int = Form(0),
@@ -81,7 +81,7 @@ async def get_tip_requirement_data(
     })
 
 @router.post("/tip-requirements/{slug}/update")
-async def update_tip_requirement(
+def update_tip_requirement(
     slug: str,
     request: Request,
     name: str = Form(...),
@@ -125,7 +125,7 @@ async def update_tip_requirement(
     return RedirectResponse(url="/positions", status_code=302)
 
 @router.post("/tip-requirements/{slug}/delete")
-async def delete_tip_requirement(
+def delete_tip_requirement(
     slug: str,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
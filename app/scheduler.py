@@ -1,19 +1,83 @@
 import os
+import threading
 import pytz
+from collections import OrderedDict
+from contextlib import contextmanager, nullcontext
+from itertools import islice
 from datetime import datetime, timedelta
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
+from apscheduler.jobstores.memory import MemoryJobStore
 from apscheduler.executors.pool import ThreadPoolExecutor
-from sqlalchemy import text
+from sqlalchemy import select, text
 from app.database import SCHEDULER_DIR, SessionLocal
 
 # Get timezone from environment, default to America/Los_Angeles
 TIMEZONE = os.getenv('TZ', 'America/Los_Angeles')
 tz = pytz.timezone(TIMEZONE)
 
+class _OpenTransaction:
+    """Engine stand-in whose begin() hands back an already-open connection."""
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    @contextmanager
+    def begin(self):
+        yield self.connection
+
+
+class TaskJobStore(SQLAlchemyJobStore):
+    """
+    SQLAlchemy job store that can apply many changes in one transaction.
+
+    Inside batch(), adds/updates/removes made by the calling thread share a
+    single connection and commit once at the end. The scheduler's job store
+    lock is held for the duration, so the scheduler loop never waits on the
+    open write transaction while holding that lock itself.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self._batch = threading.local()
+        super().__init__(*args, **kwargs)
+
+    @property
+    def engine(self):
+        connection = getattr(self._batch, 'connection', None)
+        return _OpenTransaction(connection) if connection is not None else self._engine
+
+    @engine.setter
+    def engine(self, value):
+        self._engine = value
+
+    @contextmanager
+    def batch(self):
+        if getattr(self._batch, 'connection', None) is not None:
+            yield
+            return
+
+        owner = getattr(self, '_scheduler', None)
+        lock = owner._jobstores_lock if owner is not None else nullcontext()
+        with lock, self._engine.begin() as connection:
+            self._batch.connection = connection
+            try:
+                yield
+            finally:
+                self._batch.connection = None
+
+    def get_job_ids(self):
+        """IDs of all stored jobs, without unpickling them."""
+        with self.engine.begin() as connection:
+            return {row[0] for row in connection.execute(select(self.jobs_t.c.id))}
+
+
+task_jobstore = TaskJobStore(url=f'sqlite:///{SCHEDULER_DIR}/jobs.db')
+
 # Configure job stores
 jobstores = {
-    'default': SQLAlchemyJobStore(url=f'sqlite:///{SCHEDULER_DIR}/jobs.db')
+    'default': task_jobstore,
+    # Housekeeping jobs registered at startup; not persisted or user-visible
+    'internal': MemoryJobStore()
 }
 
 executors = {
@@ -33,10 +97,144 @@ scheduler = BackgroundScheduler(
     timezone=tz
 )
 
-def get_next_run_times(schedule_type, cron_expression=None, interval_value=None, interval_unit=None, starts_at=None, count=5):
+RUN_PREVIEW_CACHE_SIZE = 256
+TRIGGER_CACHE_SIZE = 256
+
+# get_next_run_times results keyed by (schedule definition, minute), and
+# compiled cron triggers keyed by (expression, timezone)
+_run_preview_cache = OrderedDict()
+_trigger_cache = OrderedDict()
+_run_preview_lock = threading.Lock()
+
+def _localize_wall_clock(naive):
+    """Localize a wall-clock time, treating ambiguous and non-existent times as standard time."""
+    try:
+        return tz.localize(naive, is_dst=None)
+    except pytz.exceptions.InvalidTimeError:
+        return tz.localize(naive, is_dst=False)
+
+def iter_interval_run_times(start_date, interval_delta, wall_clock, now):
+    """
+    Occurrences of an interval schedule after `now`, in order (unbounded).
+
+    Occurrence j is start_date + j * interval: in absolute time for minutes
+    and hours, and in wall-clock time (re-localized, so a daily task stays at
+    the same local time across DST changes) for days and weeks. The first
+    occurrence after `now` is found arithmetically rather than by stepping.
+    """
+    naive_start = start_date.replace(tzinfo=None)
+
+    def occurrence(j):
+        if j == 0:
+            return start_date
+        if wall_clock:
+            return _localize_wall_clock(naive_start + j * interval_delta)
+        return start_date + j * interval_delta
+
+    if start_date > now:
+        first = 0
+    elif wall_clock:
+        # Wall-clock and absolute elapsed time differ by at most a DST shift,
+        # so the estimate is off by one occurrence at most
+        naive_now = now.astimezone(tz).replace(tzinfo=None)
+        first = max((naive_now - naive_start) // interval_delta, 1)
+        while occurrence(first) <= now:
+            first += 1
+        while first > 1 and occurrence(first - 1) > now:
+            first -= 1
+    else:
+        first = (now - start_date) // interval_delta + 1
+
+    j = first
+    while True:
+        yield occurrence(j)
+        j += 1
+
+def parse_interval_schedule(interval_value, interval_unit, starts_at, now):
+    """Return (start datetime, interval timedelta, wall_clock) for an interval schedule."""
+    if starts_at:
+        if isinstance(starts_at, str):
+            start_date = datetime.fromisoformat(starts_at.replace('Z', '+00:00'))
+            if start_date.tzinfo is None:
+                start_date = tz.localize(start_date)
+            else:
+                start_date = start_date.astimezone(tz)
+        else:
+            start_date = starts_at
+    else:
+        start_date = now
+
+    # Convert weeks to days for consistent intervals
+    if interval_unit == 'weeks':
+        delta_kwargs = {'days': interval_value * 7}
+    elif interval_unit == 'days':
+        delta_kwargs = {'days': interval_value}
+    elif interval_unit == 'hours':
+        delta_kwargs = {'hours': interval_value}
+    elif interval_unit == 'minutes':
+        delta_kwargs = {'minutes': interval_value}
+    else:
+        delta_kwargs = {interval_unit: interval_value}
+
+    # Day/week intervals keep the same wall-clock time across DST;
+    # hours/minutes use timezone-aware arithmetic
+    return start_date, timedelta(**delta_kwargs), interval_unit in ['days', 'weeks']
+
+def get_cron_trigger(cron_expression):
+    """
+    CronTrigger for a 5-field cron expression in the configured timezone.
+
+    Triggers are immutable, so compiled ones are cached by (expression, timezone).
+    Returns None if the expression does not have 5 fields.
+    """
+    from apscheduler.triggers.cron import CronTrigger
+
+    key = (cron_expression, tz.zone)
+    with _run_preview_lock:
+        trigger = _trigger_cache.get(key)
+        if trigger is not None:
+            _trigger_cache.move_to_end(key)
+            return trigger
+
+    parts = cron_expression.split()
+    if len(parts) != 5:
+        return None
+
+    # Create trigger in user's timezone (respects TZ environment variable)
+    trigger = CronTrigger(
+        minute=parts[0],
+        hour=parts[1],
+        day=parts[2],
+        month=parts[3],
+        day_of_week=parts[4],
+        timezone=tz
+    )
+
+    with _run_preview_lock:
+        _trigger_cache[key] = trigger
+        while len(_trigger_cache) > TRIGGER_CACHE_SIZE:
+            _trigger_cache.popitem(last=False)
+    return trigger
+
+def iter_cron_run_times(trigger, now):
+    """Fire times of a cron trigger after `now`, in order."""
+    reference_time = now
+    while True:
+        next_run = trigger.get_next_fire_time(None, reference_time)
+        if not next_run:
+            return
+        yield next_run
+        # Advance reference time to just after the found run
+        # Use 1 minute increment and normalize to handle DST transitions
+        reference_time = tz.normalize(next_run + timedelta(minutes=1))
+
+def get_next_run_times(schedule_type, cron_expression=None, interval_value=None, interval_unit=None, starts_at=None, count=5, now=None):
     """
     Calculate the next N run times for a schedule.
 
+    Results are memoized per schedule definition and minute, since the task
+    list, create/update and the run preview all ask for the same schedules.
+
     Args:
         schedule_type: 'cron' or 'interval'
         cron_expression: Cron expression string (for cron schedules)
@@ -44,137 +242,56 @@ def get_next_run_times(schedule_type, cron_expression=None, interval_value=None,
         interval_unit: 'minutes', 'hours', 'days', 'weeks' (for interval schedules)
         starts_at: Starting datetime for interval schedules (optional, defaults to now)
         count: Number of next run times to calculate
+        now: Reference time (defaults to the current time)
 
     Returns:
         List of datetime objects representing next run times
     """
-    from apscheduler.triggers.cron import CronTrigger
-    from apscheduler.triggers.interval import IntervalTrigger
+    if now is None:
+        now = datetime.now(tz)
+
+    if schedule_type == 'interval' and not starts_at:
+        # Runs are counted from `now` itself, so there is nothing to reuse
+        return _calculate_next_run_times(schedule_type, cron_expression, interval_value, interval_unit, starts_at, count, now)
 
-    now = datetime.now(tz)
-    next_runs = []
+    key = (tz.zone, schedule_type, cron_expression, interval_value, interval_unit, starts_at, count,
+           now.replace(second=0, microsecond=0))
+    with _run_preview_lock:
+        cached = _run_preview_cache.get(key)
+        if cached is not None:
+            _run_preview_cache.move_to_end(key)
 
+    # A run later in the same minute may have passed since the entry was cached
+    if cached is not None and (not cached or cached[0] > now):
+        return list(cached)
+
+    next_runs = _calculate_next_run_times(schedule_type, cron_expression, interval_value, interval_unit, starts_at, count, now)
+
+    with _run_preview_lock:
+        _run_preview_cache[key] = next_runs
+        _run_preview_cache.move_to_end(key)
+        while len(_run_preview_cache) > RUN_PREVIEW_CACHE_SIZE:
+            _run_preview_cache.popitem(last=False)
+
+    return list(next_runs)
+
+def _calculate_next_run_times(schedule_type, cron_expression, interval_value, interval_unit, starts_at, count, now):
     try:
         if schedule_type == 'cron':
-            parts = cron_expression.split()
-            if len(parts) != 5:
+            trigger = get_cron_trigger(cron_expression)
+            if trigger is None:
                 return []
-
-            # Create trigger in user's timezone (respects TZ environment variable)
-            trigger = CronTrigger(
-                minute=parts[0],
-                hour=parts[1],
-                day=parts[2],
-                month=parts[3],
-                day_of_week=parts[4],
-                timezone=tz
-            )
-
-            # Calculate next runs by advancing the reference time properly
-            reference_time = now
-
-            for _ in range(count):
-                next_run = trigger.get_next_fire_time(None, reference_time)
-                if next_run:
-                    next_runs.append(next_run)
-                    # Advance reference time to just after the found run
-                    # Use 1 minute increment and normalize to handle DST transitions
-                    reference_time = tz.normalize(next_run + timedelta(minutes=1))
-                else:
-                    break
+            return list(islice(iter_cron_run_times(trigger, now), count))
 
         elif schedule_type == 'interval':
-            # Parse start date
-            if starts_at:
-                if isinstance(starts_at, str):
-                    start_date = datetime.fromisoformat(starts_at.replace('Z', '+00:00'))
-                    if start_date.tzinfo is None:
-                        start_date = tz.localize(start_date)
-                    else:
-                        start_date = start_date.astimezone(tz)
-                else:
-                    start_date = starts_at
-            else:
-                start_date = now
-
-            # Convert weeks to days for consistent intervals
-            if interval_unit == 'weeks':
-                delta_kwargs = {'days': interval_value * 7}
-            elif interval_unit == 'days':
-                delta_kwargs = {'days': interval_value}
-            elif interval_unit == 'hours':
-                delta_kwargs = {'hours': interval_value}
-            elif interval_unit == 'minutes':
-                delta_kwargs = {'minutes': interval_value}
-            else:
-                delta_kwargs = {interval_unit: interval_value}
-
-            # Manually calculate next runs to properly handle DST
-            current = start_date
-            interval_delta = timedelta(**delta_kwargs)
-
-            # Skip past occurrences to find the next future run
-            while current <= now:
-                if interval_unit in ['days', 'weeks']:
-                    naive_current = current.replace(tzinfo=None)
-                    naive_next = naive_current + interval_delta
-                    try:
-                        current = tz.localize(naive_next, is_dst=None)
-                    except:
-                        current = tz.localize(naive_next, is_dst=False)
-                else:
-                    current = current + interval_delta
-
-            # Now collect the next N future runs
-            for i in range(count):
-                next_runs.append(current)
-                # For day/week intervals, add to naive time then re-localize to preserve wall clock time
-                if interval_unit in ['days', 'weeks']:
-                    naive_current = current.replace(tzinfo=None)
-                    naive_next = naive_current + interval_delta
-                    try:
-                        # Try to localize, handling ambiguous/non-existent times
-                        current = tz.localize(naive_next, is_dst=None)
-                    except:
-                        # If time doesn't exist (DST spring forward), use DST=False
-                        current = tz.localize(naive_next, is_dst=False)
-                else:
-                    # For hours/minutes, use timezone-aware arithmetic
-                    current = current + interval_delta
+            start_date, interval_delta, wall_clock = parse_interval_schedule(interval_value, interval_unit, starts_at, now)
+            return list(islice(iter_interval_run_times(start_date, interval_delta, wall_clock, now), count))
 
     except Exception as e:
         print(f"Error calculating next run times: {e}")
         return []
 
-    return next_runs
-
-def cleanup_old_executions(task_id, keep_count=7):
-    """
-    Delete old task executions, keeping only the most recent N.
-
-    Args:
-        task_id: The scheduled task ID
-        keep_count: Number of most recent executions to keep (default 7)
-    """
-    db = SessionLocal()
-    try:
-        # Get IDs of executions to delete (all except the most recent N)
-        db.execute(text("""
-            DELETE FROM task_executions
-            WHERE task_id = :task_id
-            AND id NOT IN (
-                SELECT id FROM task_executions
-                WHERE task_id = :task_id
-                ORDER BY started_at DESC
-                LIMIT :keep_count
-            )
-        """), {"task_id": task_id, "keep_count": keep_count})
-        db.commit()
-    except Exception as e:
-        print(f"Error cleaning up old executions: {e}")
-        db.rollback()
-    finally:
-        db.close()
+    return []
 
 def start_scheduler():
     """Start the scheduler if not already running"""
@@ -0,0 +1,377 @@
+"""
+Trend analytics over finalized daily balance history.
+
+The whole finalized history (archived years included) is loaded once into
+columnar NumPy arrays and kept in memory:
+
+- days: sorted dates, one per finalized day
+- items: (day, line item) matrix of revenue and expense values
+- tips: (day, tip field) matrix of tip totals
+- entry_*: one (day, employee, position) row per employee entry (a shift)
+- tip_*: long-format (day, employee, position, field, value) rows for per-shift
+  breakdowns; they carry their own keys because entry ids repeat across the
+  archive views
+
+Range queries slice these arrays with searchsorted and reduce them with
+bincount/cumsum, so a multi-year query does not touch the database. The
+cached frame is dropped by invalidate_analytics_cache(), which
+save_daily_balance_data calls whenever it writes a finalized day or changes a
+day's finalized state.
+
+Metrics are named "revenue", "expense", "revenue:<item>", "expense:<item>" or
+"tips:<field_name>", where <item> is a line item template id, the item name
+for items without a template, or "employee_tips" for the per-employee tip
+lines (combined into one item).
+"""
+import logging
+import threading
+import time
+from datetime import date, datetime
+
+import numpy as np
+from dateutil.relativedelta import relativedelta
+from sqlalchemy import text
+
+from app.utils.archive import archive_scope
+
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+logger = logging.getLogger(__name__)
+
+_frame = None
+_frame_generation = 0
+_frame_lock = threading.Lock()
+
+
+def _encode(keys):
+    """Integer-encode a list of string keys. Returns (unique keys, codes)."""
+    uniques, codes = np.unique(np.array(keys, dtype=str), return_inverse=True)
+    return [str(key) for key in uniques], codes.astype(np.int64)
+
+
+def _lookup(sorted_ids, order, ids):
+    """Positions of `ids` in the id array that `order` sorts into `sorted_ids`."""
+    return order[np.searchsorted(sorted_ids, ids)]
+
+
+def _labels(keys, codes, names):
+    """Map each encoded key to its most recent display name."""
+    labels = dict.fromkeys(keys)
+    for code, name in zip(codes.tolist(), names):
+        if name:
+            labels[keys[code]] = name
+    return {key: label or key for key, label in labels.items()}
+
+
+def _round(values):
+    """JSON-ready list of floats (NaN -> None)."""
+    return [None if np.isnan(value) else round(float(value), 2) for value in values]
+
+
+def _to_day(value):
+    if isinstance(value, date):
+        return np.datetime64(value.isoformat(), "D")
+    return np.datetime64(value, "D")
+
+
+class AnalyticsFrame:
+    """Columnar snapshot of finalized history."""
+
+    def __init__(self, day_rows, item_rows, entry_rows, tip_rows, field_names):
+        day_ids = np.array([row[0] for row in day_rows], dtype=np.int64)
+        self.days = np.array([str(row[1])[:10] for row in day_rows], dtype="datetime64[D]")
+        day_order = np.argsort(day_ids)
+        sorted_day_ids = day_ids[day_order]
+        n_days = len(self.days)
+
+        # Revenue / expense line items -> (day, item) matrix
+        item_keys = [f"{row[1]}:{row[2]}" for row in item_rows]
+        self.item_keys, item_codes = _encode(item_keys)
+        self.item_labels = _labels(self.item_keys, item_codes, [row[3] for row in item_rows])
+        item_days = _lookup(sorted_day_ids, day_order, np.array([row[0] for row in item_rows], dtype=np.int64))
+        item_values = np.array([row[4] or 0.0 for row in item_rows], dtype=np.float64)
+        n_items = len(self.item_keys)
+        self.items = np.bincount(
+            item_days * n_items + item_codes, weights=item_values, minlength=n_days * n_items
+        ).reshape(n_days, n_items)
+        self.item_is_revenue = np.array([key.startswith("revenue:") for key in self.item_keys], dtype=bool)
+        self.revenue = self.items[:, self.item_is_revenue].sum(axis=1)
+        self.expense = self.items[:, ~self.item_is_revenue].sum(axis=1)
+
+        # Employee entries (shifts). Tip rows carry their own day, employee and
+        # position keys (entry ids aren't unique across the archive views), so
+        # both are encoded together to share one code space.
+        n_entries = len(entry_rows)
+        self.entry_day = _lookup(sorted_day_ids, day_order, np.array([row[0] for row in entry_rows], dtype=np.int64))
+        self.employee_keys, employee_codes = _encode([row[1] for row in entry_rows] + [row[1] for row in tip_rows])
+        self.entry_employee, self.tip_employee = employee_codes[:n_entries], employee_codes[n_entries:]
+        self.employee_labels = _labels(self.employee_keys, self.entry_employee, [row[2] for row in entry_rows])
+        self.position_keys, position_codes = _encode([row[3] for row in entry_rows] + [row[2] for row in tip_rows])
+        self.entry_position, self.tip_position = position_codes[:n_entries], position_codes[n_entries:]
+        self.position_labels = _labels(self.position_keys, self.entry_position, [row[4] for row in entry_rows])
+
+        # Tip values, long format, plus a (day, field) matrix
+        self.tip_day = _lookup(sorted_day_ids, day_order, np.array([row[0] for row in tip_rows], dtype=np.int64))
+        self.field_keys, self.tip_field = _encode([row[3] for row in tip_rows])
+        self.field_labels = {key: field_names.get(key, key) for key in self.field_keys}
+        self.tip_value = np.array([row[4] or 0.0 for row in tip_rows], dtype=np.float64)
+        n_fields = len(self.field_keys)
+        self.tips = np.bincount(
+            self.tip_day * n_fields + self.tip_field,
+            weights=self.tip_value, minlength=n_days * n_fields
+        ).reshape(n_days, n_fields)
+
+        self.loaded_at = datetime.now()
+
+    @property
+    def first_date(self):
+        return self.days[0].item() if len(self.days) else None
+
+    @property
+    def last_date(self):
+        return self.days[-1].item() if len(self.days) else None
+
+    def metrics(self):
+        """Available metric names and their display labels."""
+        available = {"revenue": "Total revenue", "expense": "Total expenses"}
+        for key in self.item_keys:
+            available[key] = self.item_labels[key]
+        for key in self.field_keys:
+            available[f"tips:{key}"] = self.field_labels[key]
+        return available
+
+    def daily_values(self, metric):
+        """Per-day values of a metric, aligned with self.days."""
+        if metric == "revenue":
+            return self.revenue
+        if metric == "expense":
+            return self.expense
+        if metric.startswith("tips:"):
+            field = metric[len("tips:"):]
+            if field in self.field_labels:
+                return self.tips[:, self.field_keys.index(field)]
+        elif metric in self.item_labels:
+            return self.items[:, self.item_keys.index(metric)]
+        raise ValueError(f"Unknown metric: {metric}")
+
+    def day_slice(self, start, end):
+        """Index range [lo, hi) of days between start and end inclusive."""
+        lo = int(np.searchsorted(self.days, _to_day(start), side="left"))
+        hi = int(np.searchsorted(self.days, _to_day(end), side="right"))
+        return lo, hi
+
+    def calendar(self, metric, start, end):
+        """Metric on every calendar day from start to end (NaN for days with no finalized data)."""
+        start, end = _to_day(start), _to_day(end)
+        lo, hi = self.day_slice(start, end)
+        dense = np.full(int((end - start).astype(int)) + 1, np.nan)
+        dense[(self.days[lo:hi] - start).astype(np.int64)] = self.daily_values(metric)[lo:hi]
+        return dense
+
+
+def _load_frame(db):
+    started = time.perf_counter()
+    finalized = "JOIN daily_balance d ON d.id = {alias}.daily_balance_id WHERE d.finalized = 1"
+
+    # Archived years are included through the same UNION views the reports use
+    with archive_scope(db, date.min, date.max) as scoped:
+        day_rows = scoped.execute(text(
+            "SELECT id, date FROM daily_balance WHERE finalized = 1 ORDER BY date"
+        )).fetchall()
+
+        item_rows = scoped.execute(text(f"""
+            SELECT li.daily_balance_id, li.category,
+                   CASE WHEN li.is_employee_tip = 1 THEN 'employee_tips'
+                        ELSE COALESCE(CAST(li.template_id AS TEXT), li.name) END,
+                   CASE WHEN li.is_employee_tip = 1 THEN 'Employee tips'
+                        ELSE COALESCE(t.name, li.name) END,
+                   li.value
+            FROM daily_financial_line_items li
+            LEFT JOIN financial_line_item_templates t ON t.id = li.template_id
+            {finalized.format(alias="li")} AND li.category IN ('revenue', 'expense')
+            ORDER BY d.date
+        """)).fetchall()
+
+        employee_key = "COALESCE(CAST(e.employee_id AS TEXT), 'name:' || e.employee_name_snapshot)"
+        position_key = "COALESCE(CAST(e.position_id AS TEXT), 'name:' || e.position_name_snapshot)"
+
+        entry_rows = scoped.execute(text(f"""
+            SELECT e.daily_balance_id,
+                   {employee_key},
+                   COALESCE(emp.name, e.employee_name_snapshot),
+                   {position_key},
+                   COALESCE(p.name, e.position_name_snapshot)
+            FROM daily_employee_entries e
+            LEFT JOIN employees emp ON emp.id = e.employee_id
+            LEFT JOIN positions p ON p.id = e.position_id
+            {finalized.format(alias="e")}
+            ORDER BY d.date
+        """)).fetchall()
+
+        tip_rows = scoped.execute(text(f"""
+            SELECT e.daily_balance_id, {employee_key}, {position_key}, j.key, CAST(j.value AS REAL)
+            FROM daily_employee_entries e
+            JOIN json_each(e.tip_values) j
+            {finalized.format(alias="e")} AND j.type IN ('integer', 'real')
+        """)).fetchall()
+
+    field_names = dict(db.execute(text("SELECT field_name, name FROM tip_entry_requirements")).fetchall())
+
+    frame = AnalyticsFrame(day_rows, item_rows, entry_rows, tip_rows, field_names)
+    logger.info(
+        "Analytics frame loaded: %s days, %s line items, %s shifts, %s tip values in %.1f ms",
+        len(day_rows), len(item_rows), len(entry_rows), len(tip_rows),
+        (time.perf_counter() - started) * 1000
+    )
+    return frame
+
+
+def get_analytics_frame(db):
+    """Return the cached frame, loading it on first use after an invalidation."""
+    global _frame
+
+    frame = _frame
+    if frame is not None:
+        return frame
+
+    with _frame_lock:
+        if _frame is None:
+            generation = _frame_generation
+            frame = _load_frame(db)
+            # Don't cache a frame that was invalidated while it was loading
+            if generation == _frame_generation:
+                _frame = frame
+            return frame
+        return _frame
+
+
+def invalidate_analytics_cache():
+    """Drop the cached frame; the next analytics request reloads it."""
+    global _frame, _frame_generation
+    _frame_generation += 1
+    _frame = None
+
+
+def rolling_trend(frame, metric, start, end, window=7):
+    """
+    Daily values and a trailing `window`-day rolling average over calendar days.
+    Days without finalized data are skipped in the average, not counted as zero.
+    """
+    start, end = _to_day(start), _to_day(end)
+    values = frame.calendar(metric, start - (window - 1), end)
+    present = ~np.isnan(values)
+
+    sums = np.concatenate(([0.0], np.cumsum(np.where(present, values, 0.0))))
+    counts = np.concatenate(([0], np.cumsum(present)))
+    window_sums = sums[window:] - sums[:-window]
+    window_counts = counts[window:] - counts[:-window]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rolling = np.where(window_counts > 0, window_sums / window_counts, np.nan)
+
+    dates = np.arange(start, end + 1)
+    return {
+        "metric": metric,
+        "window": window,
+        "dates": [str(day) for day in dates],
+        "values": _round(values[window - 1:]),
+        "rolling_average": _round(rolling),
+    }
+
+
+def weekday_profile(frame, metrics, start, end):
+    """Mean of each metric by day of week, and that mean relative to the overall mean."""
+    lo, hi = frame.day_slice(start, end)
+    weekdays = (frame.days[lo:hi].astype(np.int64) + 3) % 7  # 1970-01-01 was a Thursday
+    day_counts = np.bincount(weekdays, minlength=7)
+
+    result = {"weekdays": WEEKDAYS, "day_counts": day_counts.tolist(), "metrics": {}}
+    for metric in metrics:
+        values = frame.daily_values(metric)[lo:hi]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            means = np.bincount(weekdays, weights=values, minlength=7) / day_counts
+            overall = values.mean() if len(values) else np.nan
+            index = means / overall if overall else np.full(7, np.nan)
+        result["metrics"][metric] = {"mean": _round(means), "index": _round(index)}
+    return result
+
+
+def tips_per_shift(frame, start, end, group_by="position"):
+    """Tip totals and tips per shift for each position (or employee) and tip field."""
+    if group_by == "position":
+        groups, keys, labels = frame.entry_position, frame.position_keys, frame.position_labels
+    elif group_by == "employee":
+        groups, keys, labels = frame.entry_employee, frame.employee_keys, frame.employee_labels
+    else:
+        raise ValueError(f"Unknown group_by: {group_by}")
+
+    lo, hi = frame.day_slice(start, end)
+    n_groups, n_fields = len(keys), len(frame.field_keys)
+    in_range = (frame.entry_day >= lo) & (frame.entry_day < hi)
+    shifts = np.bincount(groups[in_range], minlength=n_groups)
+
+    tip_groups = frame.tip_position if group_by == "position" else frame.tip_employee
+    tip_in_range = (frame.tip_day >= lo) & (frame.tip_day < hi)
+    totals = np.bincount(
+        tip_groups[tip_in_range] * n_fields + frame.tip_field[tip_in_range],
+        weights=frame.tip_value[tip_in_range], minlength=n_groups * n_fields
+    ).reshape(n_groups, n_fields)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        per_shift = totals / shifts[:, None]
+
+    used_fields = np.flatnonzero(np.any(totals != 0, axis=0))
+    rows = []
+    for group in np.flatnonzero(shifts):
+        rows.append({
+            "key": keys[group],
+            "name": labels[keys[group]],
+            "shifts": int(shifts[group]),
+            "totals": dict(zip((frame.field_keys[f] for f in used_fields), _round(totals[group, used_fields]))),
+            "per_shift": dict(zip((frame.field_keys[f] for f in used_fields), _round(per_shift[group, used_fields]))),
+        })
+    rows.sort(key=lambda row: row["name"].lower())
+
+    return {
+        "group_by": group_by,
+        "fields": {frame.field_keys[f]: frame.field_labels[frame.field_keys[f]] for f in used_fields},
+        "rows": rows,
+    }
+
+
+def year_over_year(frame, metrics, start, end):
+    """Monthly totals for the range next to the same months a year earlier."""
+    start = date.fromisoformat(str(_to_day(start)))
+    end = date.fromisoformat(str(_to_day(end)))
+    prior_start, prior_end = start - relativedelta(years=1), end - relativedelta(years=1)
+
+    months = frame.days.astype("datetime64[M]").astype(np.int64)
+    first_month = (start.year - 1970) * 12 + start.month - 1
+    n_months = (end.year - start.year) * 12 + end.month - start.month + 1
+
+    lo, hi = frame.day_slice(start, end)
+    prior_lo, prior_hi = frame.day_slice(prior_start, prior_end)
+    current_bins = months[lo:hi] - first_month
+    prior_bins = months[prior_lo:prior_hi] + 12 - first_month
+
+    result = {
+        "months": [str(np.datetime64(first_month + i, "M")) for i in range(n_months)],
+        "day_counts": np.bincount(current_bins, minlength=n_months).tolist(),
+        "prior_day_counts": np.bincount(prior_bins, minlength=n_months).tolist(),
+        "metrics": {},
+    }
+    for metric in metrics:
+        values = frame.daily_values(metric)
+        current = np.bincount(current_bins, weights=values[lo:hi], minlength=n_months)
+        prior = np.bincount(prior_bins, weights=values[prior_lo:prior_hi], minlength=n_months)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            pct = np.where(prior != 0, (current - prior) / np.abs(prior) * 100, np.nan)
+        total, prior_total = float(current.sum()), float(prior.sum())
+        result["metrics"][metric] = {
+            "current": _round(current),
+            "prior": _round(prior),
+            "delta": _round(current - prior),
+            "pct_change": _round(pct),
+            "total": round(total, 2),
+            "prior_total": round(prior_total, 2),
+            "total_pct_change": round((total - prior_total) / abs(prior_total) * 100, 2) if prior_total else None,
+        }
+    return result
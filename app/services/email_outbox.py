@@ -0,0 +1,367 @@
+"""
+Persistent outbox for report emails.
+
+Producers (report routes and scheduled tasks) call queue_report_emails(),
+which renders the report once, inserts one email_outbox row per recipient
+and returns straight away. A single background worker thread drains the
+outbox through the configured mail transport (app.utils.mail_transport):
+
+- at most EMAIL_RATE_PER_SECOND sends per second (the provider's limit)
+- failed sends are retried with exponential backoff, up to EMAIL_MAX_ATTEMPTS
+- messages that still fail are left with status 'dead' for an admin to retry
+- each message has a unique idempotency key, so a producer that runs twice
+  (e.g. a retried task execution) does not queue the same email twice
+
+A message is claimed ('sending') before the provider call and marked 'sent'
+afterwards; claims left behind by a crash are released at startup, so
+delivery is at-least-once.
+"""
+import logging
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+
+from sqlalchemy import text
+
+from app.database import write_engine, read_engine
+from app.utils.email import render_report_html
+from app.utils.mail_transport import from_address_setting, get_transport
+from app.utils.metrics import EMAILS_SENT, EMAIL_DELIVERY_SECONDS
+
+EMAIL_RATE_PER_SECOND = float(os.getenv("EMAIL_RATE_PER_SECOND", "1.6"))
+EMAIL_MAX_ATTEMPTS = int(os.getenv("EMAIL_MAX_ATTEMPTS", "6"))
+RETRY_BASE_SECONDS = 30
+RETRY_MAX_SECONDS = 3600
+OUTBOX_POLL_SECONDS = 5.0
+OUTBOX_BATCH_SIZE = 50
+SENT_RETENTION_DAYS = 30
+PRUNE_INTERVAL_SECONDS = 3600
+
+logger = logging.getLogger(__name__)
+
+_worker_thread = None
+_worker_stop = threading.Event()
+_worker_wake = threading.Event()
+_last_send = 0.0
+_last_prune = 0.0
+
+
+def queue_report_emails(
+    to_emails,
+    report_type,
+    report_filepath,
+    subject,
+    date_range=None,
+    attach_csv=False,
+    idempotency_key=None
+):
+    """
+    Render a report email and queue it for each recipient.
+
+    Args:
+        to_emails: Recipient addresses
+        report_type: "daily" or "tips"
+        report_filepath: Saved report CSV the email is built from
+        subject: Email subject
+        date_range: Display date range (unused in the body; kept for callers)
+        attach_csv: Attach the report CSV to each email
+        idempotency_key: Optional producer key (e.g. a task execution); the
+            same key and recipient are only ever queued once
+
+    Returns:
+        Dict with success, message, queued addresses and the skipped
+        addresses already queued under the same key
+    """
+    configuration_error = get_transport().configuration_error()
+    if configuration_error:
+        return {
+            "success": False,
+            "message": configuration_error
+        }
+
+    if not to_emails:
+        return {
+            "success": False,
+            "message": "No email addresses provided"
+        }
+
+    if report_type not in ["daily", "tips"]:
+        return {
+            "success": False,
+            "message": f"Invalid report type: {report_type}"
+        }
+
+    from_email_key, from_email = from_address_setting(report_type)
+
+    if not from_email:
+        return {
+            "success": False,
+            "message": f"{from_email_key} is not configured in environment variables"
+        }
+
+    if not os.path.exists(report_filepath):
+        return {
+            "success": False,
+            "message": f"Report file not found: {report_filepath}"
+        }
+
+    html_body = render_report_html(report_type, report_filepath)
+    if not html_body:
+        label = "daily balance report" if report_type == "daily" else "tip report"
+        return {
+            "success": False,
+            "message": f"Failed to parse {label}"
+        }
+
+    key_prefix = idempotency_key or uuid.uuid4().hex
+    now = _utc_now()
+    rows = [
+        {
+            "idempotency_key": f"{key_prefix}:{email}",
+            "report_type": report_type,
+            "from_email": from_email,
+            "to_email": email,
+            "subject": subject,
+            "html_body": html_body,
+            "attachment_path": report_filepath if attach_csv else None,
+            "now": now,
+        }
+        for email in dict.fromkeys(to_emails)
+    ]
+
+    queued = []
+    with write_engine.begin() as conn:
+        for row in rows:
+            inserted = conn.execute(text("""
+                INSERT INTO email_outbox (
+                    idempotency_key, report_type, from_email, to_email, subject,
+                    html_body, attachment_path, status, attempts, created_at, next_attempt_at
+                ) VALUES (
+                    :idempotency_key, :report_type, :from_email, :to_email, :subject,
+                    :html_body, :attachment_path, 'pending', 0, :now, :now
+                )
+                ON CONFLICT(idempotency_key) DO NOTHING
+                RETURNING to_email
+            """), row).scalar()
+            if inserted is not None:
+                queued.append(inserted)
+
+    _worker_wake.set()
+
+    skipped = [row["to_email"] for row in rows if row["to_email"] not in queued]
+    message = f"Report queued for delivery to {len(queued)} recipient(s)"
+    if skipped:
+        message += f" ({len(skipped)} already queued under this key: {', '.join(skipped)})"
+    return {
+        "success": True,
+        "message": message,
+        "queued": queued,
+        "skipped": skipped
+    }
+
+
+def _utc_now():
+    return datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _retry_delay(attempts):
+    return min(RETRY_BASE_SECONDS * 2 ** (attempts - 1), RETRY_MAX_SECONDS)
+
+
+def _throttle():
+    """Sleep as needed to stay under EMAIL_RATE_PER_SECOND."""
+    global _last_send
+
+    if EMAIL_RATE_PER_SECOND > 0:
+        wait = _last_send + 1.0 / EMAIL_RATE_PER_SECOND - time.monotonic()
+        if wait > 0:
+            _worker_stop.wait(wait)
+    _last_send = time.monotonic()
+
+
+def _claim_due_messages(limit):
+    with write_engine.begin() as conn:
+        return conn.execute(text("""
+            UPDATE email_outbox
+            SET status = 'sending', attempts = attempts + 1
+            WHERE id IN (
+                SELECT id FROM email_outbox
+                WHERE status = 'pending' AND next_attempt_at <= :now
+                ORDER BY next_attempt_at, id
+                LIMIT :limit
+            )
+            RETURNING id, idempotency_key, report_type, from_email, to_email, subject,
+                      html_body, attachment_path, attempts, created_at
+        """), {"now": _utc_now(), "limit": limit}).mappings().all()
+
+
+def _record_sent(message, provider_message_id):
+    with write_engine.begin() as conn:
+        conn.execute(text("""
+            UPDATE email_outbox
+            SET status = 'sent', sent_at = :now, provider_message_id = :provider_message_id,
+                last_error = NULL, html_body = NULL
+            WHERE id = :id
+        """), {"id": message["id"], "now": _utc_now(), "provider_message_id": provider_message_id})
+
+    EMAILS_SENT.inc(report_type=message["report_type"], outcome="sent")
+    created_at = datetime.fromisoformat(str(message["created_at"]))
+    EMAIL_DELIVERY_SECONDS.observe(
+        max((datetime.utcnow() - created_at).total_seconds(), 0), report_type=message["report_type"]
+    )
+
+
+def _record_failure(message, error):
+    attempts = message["attempts"]
+    dead = attempts >= EMAIL_MAX_ATTEMPTS
+    with write_engine.begin() as conn:
+        conn.execute(text("""
+            UPDATE email_outbox
+            SET status = :status, last_error = :error,
+                next_attempt_at = datetime(:now, :delay)
+            WHERE id = :id
+        """), {
+            "id": message["id"],
+            "status": "dead" if dead else "pending",
+            "error": error[:2000],
+            "now": _utc_now(),
+            "delay": f"+{_retry_delay(attempts)} seconds",
+        })
+
+    EMAILS_SENT.inc(report_type=message["report_type"], outcome="dead" if dead else "retry")
+    if dead:
+        logger.error("Email %s to %s dead-lettered after %s attempts: %s", message["id"], message["to_email"], attempts, error)
+    else:
+        logger.warning("Email %s to %s failed (attempt %s), will retry: %s", message["id"], message["to_email"], attempts, error)
+
+
+def _release_claims(message_ids):
+    """Put claimed but unsent messages back without counting the attempt."""
+    if not message_ids:
+        return
+    with write_engine.begin() as conn:
+        conn.execute(text("""
+            UPDATE email_outbox SET status = 'pending', attempts = attempts - 1
+            WHERE id = :id AND status = 'sending'
+        """), [{"id": message_id} for message_id in message_ids])
+
+
+def deliver_due_messages(limit=OUTBOX_BATCH_SIZE):
+    """
+    Send up to `limit` due messages, rate limited.
+
+    Returns:
+        Number of messages attempted
+    """
+    messages = _claim_due_messages(limit)
+    if not messages:
+        return 0
+
+    transport = get_transport()
+    with transport.session():
+        for index, message in enumerate(messages):
+            if _worker_stop.is_set():
+                _release_claims([m["id"] for m in messages[index:]])
+                return index
+
+            _throttle()
+            try:
+                provider_message_id = transport.send(message)
+            except Exception as e:
+                _record_failure(message, str(e))
+            else:
+                _record_sent(message, provider_message_id)
+
+    return len(messages)
+
+
+def prune_sent_messages(days=SENT_RETENTION_DAYS):
+    with write_engine.begin() as conn:
+        result = conn.execute(text("""
+            DELETE FROM email_outbox
+            WHERE status = 'sent' AND sent_at < datetime('now', :age)
+        """), {"age": f"-{days} days"})
+    return result.rowcount
+
+
+def release_stale_claims():
+    """Return messages left 'sending' by an unclean shutdown to the queue."""
+    with write_engine.begin() as conn:
+        result = conn.execute(text("UPDATE email_outbox SET status = 'pending' WHERE status = 'sending'"))
+    if result.rowcount:
+        logger.warning("Re-queued %s email(s) that were being sent when the app stopped", result.rowcount)
+    return result.rowcount
+
+
+def retry_dead_messages():
+    """Re-queue dead-lettered messages with a fresh attempt budget."""
+    with write_engine.begin() as conn:
+        result = conn.execute(text("""
+            UPDATE email_outbox
+            SET status = 'pending', attempts = 0, next_attempt_at = :now
+            WHERE status = 'dead'
+        """), {"now": _utc_now()})
+    _worker_wake.set()
+    return result.rowcount
+
+
+def get_outbox_summary():
+    """Message counts by status and the most recent dead letters."""
+    with read_engine.connect() as conn:
+        counts = dict(conn.execute(text("SELECT status, COUNT(*) FROM email_outbox GROUP BY status")).fetchall())
+        dead = conn.execute(text("""
+            SELECT id, to_email, subject, attempts, last_error, created_at
+            FROM email_outbox
+            WHERE status = 'dead'
+            ORDER BY id DESC
+            LIMIT 20
+        """)).mappings().all()
+    return {"counts": counts, "dead": [dict(row) for row in dead]}
+
+
+def _worker_loop():
+    global _last_prune
+
+    while not _worker_stop.is_set():
+        _worker_wake.clear()
+        try:
+            attempted = deliver_due_messages()
+            if time.monotonic() - _last_prune >= PRUNE_INTERVAL_SECONDS:
+                prune_sent_messages()
+                _last_prune = time.monotonic()
+        except Exception:
+            logger.exception("Email outbox worker error")
+            attempted = 0
+
+        # A full batch means more may be due right away
+        if attempted < OUTBOX_BATCH_SIZE:
+            _worker_wake.wait(OUTBOX_POLL_SECONDS)
+
+
+def start_email_worker():
+    """Start the background thread that delivers queued emails."""
+    global _worker_thread
+
+    if _worker_thread and _worker_thread.is_alive():
+        return
+
+    release_stale_claims()
+    _worker_stop.clear()
+    _worker_thread = threading.Thread(target=_worker_loop, name="email-outbox", daemon=True)
+    _worker_thread.start()
+    print(f"✓ Email outbox worker started ({EMAIL_RATE_PER_SECOND:g} emails/sec)")
+
+
+def stop_email_worker():
+    """Stop the email worker; messages still queued are sent on the next start."""
+    global _worker_thread
+
+    if not _worker_thread:
+        return
+
+    _worker_stop.set()
+    _worker_wake.set()
+    _worker_thread.join(timeout=10)
+    _worker_thread = None
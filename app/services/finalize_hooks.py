@@ -0,0 +1,358 @@
+"""
+Post-finalize hooks for daily balances.
+
+Finalizing a day only commits the balance; the follow-up work runs here, in a
+background worker, so the manager gets the confirmation straight away:
+
+- write_csv: write the day's CSV report (data/reports/daily_report/...)
+- refresh_analytics: rebuild the analytics frame so the next trends request
+  doesn't pay for the reload
+- notify: email the report to the recipients picked in the finalize dialog
+  (queued through the email outbox once the CSV exists)
+
+enqueue_finalize_hooks() records one finalize_hook_runs row per hook, grouped
+by run_id; the worker runs each pending run's hooks in order and records the
+outcome (succeeded, failed or skipped) on the row, which the daily balance
+page shows. Hooks are idempotent, so a run interrupted by a restart is simply
+run again, and failed hooks can be retried from the page.
+"""
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+
+from sqlalchemy import text
+from sqlalchemy.orm import joinedload, selectinload
+
+from app.database import SessionLocal, read_engine, write_engine
+from app.models import DailyBalance, DailyEmployeeEntry, Position, User
+from app.services.analytics import get_analytics_frame, invalidate_analytics_cache
+from app.services.email_outbox import queue_report_emails
+from app.utils.csv_generator import generate_daily_balance_csv
+
+HOOK_POLL_SECONDS = 30.0
+
+logger = logging.getLogger(__name__)
+
+_worker_thread = None
+_worker_stop = threading.Event()
+_worker_wake = threading.Event()
+
+
+def _utc_now():
+    return datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def daily_report_path(balance_date):
+    return os.path.join(
+        "data", "reports", "daily_report",
+        str(balance_date.year), f"{balance_date.month:02d}", f"{balance_date}-daily-balance.csv"
+    )
+
+
+def write_csv_hook(db, daily_balance, params, requested_by):
+    filepath = generate_daily_balance_csv(
+        daily_balance, daily_balance.employee_entries, current_user=requested_by, source="user"
+    )
+    return f"Wrote {os.path.basename(filepath)}"
+
+
+def refresh_analytics_hook(db, daily_balance, params, requested_by):
+    invalidate_analytics_cache()
+    frame = get_analytics_frame(db)
+    return f"Analytics rebuilt ({len(frame.days)} finalized days)"
+
+
+def notify_hook(db, daily_balance, params, requested_by):
+    filepath = daily_report_path(daily_balance.date)
+    date_display = daily_balance.date.strftime('%B %d, %Y')
+
+    result = queue_report_emails(
+        to_emails=params["emails"],
+        report_type="daily",
+        report_filepath=filepath,
+        subject=f"Daily Balance Report - {date_display}",
+        date_range=date_display,
+        idempotency_key=f"finalize-{params['run_id']}"
+    )
+    if not result["success"]:
+        raise RuntimeError(result["message"])
+    return result["message"]
+
+
+# (hook name, label shown on the page, function, hook it depends on)
+FINALIZE_HOOKS = [
+    ("write_csv", "Write CSV report", write_csv_hook, None),
+    ("refresh_analytics", "Refresh analytics", refresh_analytics_hook, None),
+    ("notify", "Email report", notify_hook, "write_csv"),
+]
+
+HOOK_LABELS = {name: label for name, label, _, _ in FINALIZE_HOOKS}
+
+
+def enqueue_finalize_hooks(daily_balance_id, requested_by_user_id=None, notify_emails=None):
+    """
+    Queue the post-finalize hooks for a day that has just been committed.
+
+    Args:
+        daily_balance_id: The finalized DailyBalance
+        requested_by_user_id: User who finalized the day (CSV "Generated By" fallback)
+        notify_emails: Recipients for the report email; the notify hook is
+            only queued when there are any
+
+    Returns:
+        The run_id of the queued hooks
+    """
+    run_id = uuid.uuid4().hex
+    now = _utc_now()
+    rows = []
+    for name, _, _, _ in FINALIZE_HOOKS:
+        params = None
+        if name == "notify":
+            if not notify_emails:
+                continue
+            params = json.dumps({"emails": list(dict.fromkeys(notify_emails))})
+        rows.append({
+            "run_id": run_id,
+            "daily_balance_id": daily_balance_id,
+            "hook": name,
+            "params": params,
+            "requested_by_user_id": requested_by_user_id,
+            "now": now,
+        })
+
+    with write_engine.begin() as conn:
+        # Only the latest run of a day is shown, so finished older runs are dropped
+        conn.execute(text("""
+            DELETE FROM finalize_hook_runs
+            WHERE daily_balance_id = :daily_balance_id AND status NOT IN ('pending', 'running')
+        """), {"daily_balance_id": daily_balance_id})
+        conn.execute(text("""
+            INSERT INTO finalize_hook_runs (
+                run_id, daily_balance_id, hook, params, status, requested_by_user_id, created_at
+            ) VALUES (
+                :run_id, :daily_balance_id, :hook, :params, 'pending', :requested_by_user_id, :now
+            )
+        """), rows)
+
+    _worker_wake.set()
+    return run_id
+
+
+def _next_pending_run():
+    with read_engine.connect() as conn:
+        run_id = conn.execute(text("""
+            SELECT run_id FROM finalize_hook_runs
+            WHERE status = 'pending'
+            ORDER BY id
+            LIMIT 1
+        """)).scalar()
+        if run_id is None:
+            return []
+        return conn.execute(text("""
+            SELECT id, run_id, daily_balance_id, hook, params, status, requested_by_user_id
+            FROM finalize_hook_runs
+            WHERE run_id = :run_id
+            ORDER BY id
+        """), {"run_id": run_id}).mappings().all()
+
+
+def _claim_hook(hook_id):
+    with write_engine.begin() as conn:
+        result = conn.execute(text("""
+            UPDATE finalize_hook_runs
+            SET status = 'running', started_at = :now, detail = NULL, error = NULL
+            WHERE id = :id AND status = 'pending'
+        """), {"id": hook_id, "now": _utc_now()})
+    return result.rowcount == 1
+
+
+def _record_outcome(hook_id, status, detail=None, error=None):
+    with write_engine.begin() as conn:
+        conn.execute(text("""
+            UPDATE finalize_hook_runs
+            SET status = :status, detail = :detail, error = :error, finished_at = :now
+            WHERE id = :id
+        """), {
+            "id": hook_id,
+            "status": status,
+            "detail": detail,
+            "error": error[:2000] if error else None,
+            "now": _utc_now(),
+        })
+
+
+def _load_daily_balance(db, daily_balance_id):
+    """The finalized day with everything the CSV writer walks loaded up front."""
+    return db.query(DailyBalance).options(
+        selectinload(DailyBalance.financial_line_items),
+        selectinload(DailyBalance.checks),
+        selectinload(DailyBalance.efts),
+        selectinload(DailyBalance.employee_entries).joinedload(DailyEmployeeEntry.employee),
+        selectinload(DailyBalance.employee_entries).joinedload(DailyEmployeeEntry.position)
+            .selectinload(Position.tip_requirements),
+        joinedload(DailyBalance.created_by_user),
+        joinedload(DailyBalance.edited_by_user),
+    ).filter(DailyBalance.id == daily_balance_id).first()
+
+
+def run_pending_hooks():
+    """
+    Run the hooks of the oldest run that has pending hooks.
+
+    Returns:
+        Number of hooks run (0 when nothing is pending)
+    """
+    rows = _next_pending_run()
+    if not rows:
+        return 0
+
+    hook_functions = {name: (function, depends_on) for name, _, function, depends_on in FINALIZE_HOOKS}
+    outcomes = {row["hook"]: row["status"] for row in rows}
+    ran = 0
+
+    db = SessionLocal()
+    try:
+        daily_balance = _load_daily_balance(db, rows[0]["daily_balance_id"])
+        requested_by = None
+        if rows[0]["requested_by_user_id"]:
+            requested_by = db.query(User).filter(User.id == rows[0]["requested_by_user_id"]).first()
+
+        for row in rows:
+            if row["status"] != "pending" or _worker_stop.is_set():
+                continue
+            if not _claim_hook(row["id"]):
+                continue
+
+            function, depends_on = hook_functions.get(row["hook"], (None, None))
+            started = time.perf_counter()
+            if function is None:
+                outcomes[row["hook"]] = "failed"
+                _record_outcome(row["id"], "failed", error=f"Unknown hook: {row['hook']}")
+                continue
+            if daily_balance is None or not daily_balance.finalized:
+                outcomes[row["hook"]] = "skipped"
+                _record_outcome(row["id"], "skipped", detail="Day is no longer finalized")
+                continue
+            if depends_on and outcomes.get(depends_on) not in (None, "succeeded"):
+                outcomes[row["hook"]] = "skipped"
+                _record_outcome(row["id"], "skipped", detail=f"{HOOK_LABELS[depends_on]} did not succeed")
+                continue
+
+            params = json.loads(row["params"]) if row["params"] else {}
+            params["run_id"] = row["run_id"]
+            try:
+                detail = function(db, daily_balance, params, requested_by)
+            except Exception as e:
+                db.rollback()
+                outcomes[row["hook"]] = "failed"
+                logger.exception("Finalize hook %s failed for daily balance %s", row["hook"], row["daily_balance_id"])
+                _record_outcome(row["id"], "failed", error=str(e) or e.__class__.__name__)
+            else:
+                outcomes[row["hook"]] = "succeeded"
+                _record_outcome(row["id"], "succeeded", detail=detail)
+                logger.info(
+                    "Finalize hook %s for daily balance %s done in %.1f ms",
+                    row["hook"], row["daily_balance_id"], (time.perf_counter() - started) * 1000
+                )
+            ran += 1
+    finally:
+        db.close()
+
+    return ran
+
+
+def get_finalize_hook_status(daily_balance_id):
+    """Hooks of the latest finalize run for a day (empty if none were queued)."""
+    with read_engine.connect() as conn:
+        rows = conn.execute(text("""
+            SELECT id, run_id, hook, status, detail, error, created_at, started_at, finished_at
+            FROM finalize_hook_runs
+            WHERE daily_balance_id = :daily_balance_id
+              AND run_id = (
+                  SELECT run_id FROM finalize_hook_runs
+                  WHERE daily_balance_id = :daily_balance_id
+                  ORDER BY id DESC
+                  LIMIT 1
+              )
+            ORDER BY id
+        """), {"daily_balance_id": daily_balance_id}).mappings().all()
+
+    hooks = []
+    for row in rows:
+        hook = {key: (str(value) if isinstance(value, datetime) else value) for key, value in row.items()}
+        hook["label"] = HOOK_LABELS.get(row["hook"], row["hook"])
+        hooks.append(hook)
+    return hooks
+
+
+def retry_failed_hooks(daily_balance_id):
+    """Re-queue the failed and skipped hooks of a day's latest run."""
+    with write_engine.begin() as conn:
+        result = conn.execute(text("""
+            UPDATE finalize_hook_runs
+            SET status = 'pending', detail = NULL, error = NULL, started_at = NULL, finished_at = NULL
+            WHERE daily_balance_id = :daily_balance_id
+              AND status IN ('failed', 'skipped')
+              AND run_id = (
+                  SELECT run_id FROM finalize_hook_runs
+                  WHERE daily_balance_id = :daily_balance_id
+                  ORDER BY id DESC
+                  LIMIT 1
+              )
+        """), {"daily_balance_id": daily_balance_id})
+    _worker_wake.set()
+    return result.rowcount
+
+
+def release_interrupted_hooks():
+    """Re-queue hooks left 'running' by an unclean shutdown."""
+    with write_engine.begin() as conn:
+        result = conn.execute(text("UPDATE finalize_hook_runs SET status = 'pending' WHERE status = 'running'"))
+    if result.rowcount:
+        logger.warning("Re-queued %s finalize hook(s) that were running when the app stopped", result.rowcount)
+    return result.rowcount
+
+
+def _worker_loop():
+    while not _worker_stop.is_set():
+        _worker_wake.clear()
+        try:
+            ran = run_pending_hooks()
+        except Exception:
+            logger.exception("Finalize hook worker error")
+            ran = 0
+
+        # Another run may already be waiting
+        if not ran:
+            _worker_wake.wait(HOOK_POLL_SECONDS)
+
+
+def start_finalize_worker():
+    """Start the background thread that runs post-finalize hooks."""
+    global _worker_thread
+
+    if _worker_thread and _worker_thread.is_alive():
+        return
+
+    release_interrupted_hooks()
+    _worker_stop.clear()
+    _worker_thread = threading.Thread(target=_worker_loop, name="finalize-hooks", daemon=True)
+    _worker_thread.start()
+    print("✓ Finalize hook worker started")
+
+
+def stop_finalize_worker():
+    """Stop the hook worker; hooks still pending run on the next start."""
+    global _worker_thread
+
+    if not _worker_thread:
+        return
+
+    _worker_stop.set()
+    _worker_wake.set()
+    _worker_thread.join(timeout=30)
+    _worker_thread = None
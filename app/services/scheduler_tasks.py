@@ -1,19 +1,22 @@
 import os
 import json
 import time
+import logging
 from datetime import datetime, timedelta, date
 from dateutil.relativedelta import relativedelta
 from sqlalchemy import text
 from sqlalchemy.exc import OperationalError
 import pytz
-from app.database import SessionLocal, DATABASE_DIR
+from app.database import SessionLocal, ReportSessionLocal, DATABASE_DIR
 from app.models import User
 from app.utils.csv_generator import generate_tip_report_csv, generate_consolidated_daily_balance_csv, generate_employee_tip_report_csv
-from app.utils.email import send_report_emails
-from app.scheduler import cleanup_old_executions
+from app.services.email_outbox import queue_report_emails
 from app.utils.backup import create_backup
+from app.utils.metrics import SQLITE_LOCK_RETRIES, SQLITE_COMMIT_FAILURES
 from app.models import Employee
 
+logger = logging.getLogger(__name__)
+
 def force_update_execution_status(execution_id, status, result_data=None, error_message=None):
     """
     Force update execution status using a fresh database connection.
@@ -22,7 +25,7 @@ def force_update_execution_status(execution_id, status, result_data=None, error_
     """
     db = SessionLocal()
     try:
-        print(f"  → [FORCE UPDATE] Creating fresh DB connection for execution {execution_id}")
+        logger.debug("[FORCE UPDATE] Creating fresh DB connection for execution %s", execution_id)
 
         if status == 'success':
             db.execute(text("""
@@ -42,17 +45,17 @@ def force_update_execution_status(execution_id, status, result_data=None, error_
             """), {"execution_id": execution_id, "error_message": error_message})
 
         db.commit()
-        print(f"  → [FORCE UPDATE] Status updated to '{status}' and committed")
+        logger.debug("[FORCE UPDATE] Status updated to '%s' and committed", status)
 
         # Verify it stuck
         verify = db.execute(text("""
             SELECT status FROM task_executions WHERE id = :execution_id
         """), {"execution_id": execution_id}).scalar()
-        print(f"  → [FORCE UPDATE] Verification: status is '{verify}'")
+        logger.debug("[FORCE UPDATE] Verification: status is '%s'", verify)
 
         return True
     except Exception as e:
-        print(f"  ✗ [FORCE UPDATE] Failed: {e}")
+        logger.error("[FORCE UPDATE] Failed: %s", e)
         db.rollback()
         return False
     finally:
@@ -70,27 +73,29 @@ def commit_with_retry(db, max_retries=5, base_delay=0.1):
     Returns:
         bool: True if commit succeeded, False otherwise
     """
-    print(f"  → [COMMIT] Attempting to commit transaction (max {max_retries} attempts)...")
+    logger.debug("[COMMIT] Attempting to commit transaction (max %s attempts)...", max_retries)
 
     for attempt in range(max_retries):
         try:
             db.commit()
-            print(f"  ✓ [COMMIT] Successfully committed on attempt {attempt + 1}")
+            logger.debug("[COMMIT] Successfully committed on attempt %s", attempt + 1)
             return True
         except OperationalError as e:
             if attempt < max_retries - 1:
                 delay = base_delay * (2 ** attempt)
-                print(f"  ⚠ [COMMIT] Database locked, retrying in {delay}s (attempt {attempt + 1}/{max_retries}): {e}")
+                logger.warning("[COMMIT] Database locked, retrying in %ss (attempt %s/%s): %s", delay, attempt + 1, max_retries, e)
+                SQLITE_LOCK_RETRIES.inc()
                 time.sleep(delay)
                 db.rollback()
             else:
-                print(f"  ✗ [COMMIT] Database commit failed after {max_retries} attempts: {e}")
+                logger.error("[COMMIT] Database commit failed after %s attempts: %s", max_retries, e)
+                SQLITE_COMMIT_FAILURES.inc()
                 import traceback
                 traceback.print_exc()
                 db.rollback()
                 return False
         except Exception as e:
-            print(f"  ✗ [COMMIT] Unexpected error during commit: {e}")
+            logger.error("[COMMIT] Unexpected error during commit: %s", e)
             import traceback
             traceback.print_exc()
             db.rollback()
@@ -115,23 +120,23 @@ def verify_execution_status(db, execution_id, expected_status):
         """), {"execution_id": execution_id}).fetchone()
 
         if not result:
-            print(f"⚠ Verification failed: No record found for execution_id={execution_id}")
+            logger.warning("Verification failed: No record found for execution_id=%s", execution_id)
             # Check if any records exist at all
             count = db.execute(text("SELECT COUNT(*) FROM task_executions")).scalar()
-            print(f"  → Total records in task_executions: {count}")
+            logger.debug("Total records in task_executions: %s", count)
             return False
 
         actual_status = result[0]
         completed_at = result[1]
 
         if actual_status == expected_status:
-            print(f"✓ Verification passed: status='{actual_status}', completed_at='{completed_at}'")
+            logger.debug("Verification passed: status='%s', completed_at='%s'", actual_status, completed_at)
             return True
         else:
-            print(f"⚠ Status mismatch: expected '{expected_status}', got '{actual_status}' (completed_at='{completed_at}')")
+            logger.warning("Status mismatch: expected '%s', got '%s' (completed_at='%s')", expected_status, actual_status, completed_at)
             return False
     except Exception as e:
-        print(f"✗ Error verifying execution status: {e}")
+        logger.error("Error verifying execution status: %s", e)
         import traceback
         traceback.print_exc()
         return False
@@ -196,9 +201,7 @@ def run_tip_report_task(task_id, task_name, date_range_type, email_list_json, by
         bypass_opt_in: Whether to bypass email opt-in preference (0 or 1)
         attach_csv: Whether to attach CSV file to email (default: False)
     """
-    print(f"\n{'='*80}")
-    print(f"▶️  TASK TRIGGERED: '{task_name}' (ID: {task_id}) at {datetime.now()}")
-    print(f"{'='*80}\n")
+    logger.info("Task triggered: '%s' (ID: %s)", task_name, task_id)
 
     db = SessionLocal()
     execution_id = None
@@ -206,7 +209,7 @@ def run_tip_report_task(task_id, task_name, date_range_type, email_list_json, by
     final_result_data = None
 
     try:
-        print(f"  → Starting tip report task '{task_name}' (ID: {task_id})")
+        logger.debug("Starting tip report task '%s' (ID: %s)", task_name, task_id)
 
         # Verify the task exists before creating execution
         task_exists = db.execute(text("""
@@ -229,12 +232,12 @@ def run_tip_report_task(task_id, task_name, date_range_type, email_list_json, by
 
         if stale_count > 0:
             if not commit_with_retry(db):
-                print(f"  ⚠ Warning: Failed to commit stale execution cleanup")
+                logger.warning("Failed to commit stale execution cleanup")
             else:
-                print(f"  → Cleaned up {stale_count} stale execution(s)")
+                logger.debug("Cleaned up %s stale execution(s)", stale_count)
 
         start_date, end_date = calculate_date_range(date_range_type)
-        print(f"  → Date range: {start_date} to {end_date}")
+        logger.debug("Date range: %s to %s", start_date, end_date)
 
         # Insert the execution record and get its ID in one query
         result = db.execute(text("""
@@ -261,9 +264,14 @@ def run_tip_report_task(task_id, task_name, date_range_type, email_list_json, by
             total_records = db.execute(text("SELECT COUNT(*) FROM task_executions")).scalar()
             raise Exception(f"Execution record {execution_id} was not persisted to database. Total records: {total_records}. This may indicate a database write issue.")
 
-        print(f"  → Created execution record (ID: {execution_id})")
+        logger.debug("Created execution record (ID: %s)", execution_id)
 
-        filename = generate_tip_report_csv(db, start_date, end_date, current_user=None, source="scheduled_task")
+        # Generate on the read-only report engine (mmap, large cache)
+        report_db = ReportSessionLocal()
+        try:
+            filename = generate_tip_report_csv(report_db, start_date, end_date, current_user=None, source="scheduled_task")
+        finally:
+            report_db.close()
         year = str(start_date.year)
         month = f"{start_date.month:02d}"
         filepath = os.path.join(DATABASE_DIR, "reports", "tip_report", year, month, filename)
@@ -272,6 +280,7 @@ def run_tip_report_task(task_id, task_name, date_range_type, email_list_json, by
             raise FileNotFoundError(f"Report file not found: {filepath}")
 
         email_list = json.loads(email_list_json) if email_list_json else []
+        emails_sent = 0
 
         if not bypass_opt_in:
             opt_in_users = db.query(User).filter(
@@ -287,28 +296,34 @@ def run_tip_report_task(task_id, task_name, date_range_type, email_list_json, by
             date_range = f"{start_date.strftime('%B %d, %Y')} to {end_date.strftime('%B %d, %Y')}"
             subject = f"[Scheduled] Tip Report - {date_range}"
 
-            result = send_report_emails(
+            result = queue_report_emails(
                 to_emails=email_list,
                 report_type="tips",
                 report_filepath=filepath,
                 subject=subject,
                 date_range=date_range,
-                attach_csv=attach_csv
+                attach_csv=attach_csv,
+                # One report per task and date range: a repeated firing of the same
+                # run (misfire catch-up, restart, manual re-run) doesn't resend it
+                idempotency_key=f"task-{task_id}-{start_date}-{end_date}"
             )
 
             if not result["success"]:
                 raise Exception(f"Email sending failed: {result.get('message', 'Unknown error')}")
+            if result["skipped"]:
+                logger.warning("Recipients already queued for task %s: %s", task_id, ", ".join(result["skipped"]))
+            emails_sent = len(result["queued"])
 
-        print(f"  → Report generated: {filename}")
-        print(f"  → Emails sent: {len(email_list)}")
+        logger.debug("Report generated: %s", filename)
+        logger.debug("Emails sent: %s", len(email_list))
 
         final_result_data = json.dumps({
             "filename": filename,
             "date_range": f"{start_date} to {end_date}",
-            "emails_sent": len(email_list)
+            "emails_sent": emails_sent
         })
 
-        print(f"  → [CRITICAL] Marking execution {execution_id} as SUCCESS...")
+        logger.debug("[CRITICAL] Marking execution %s as SUCCESS...", execution_id)
 
         time.sleep(0.05)
 
@@ -320,10 +335,10 @@ def run_tip_report_task(task_id, task_name, date_range_type, email_list_json, by
             WHERE id = :execution_id
         """), {"execution_id": execution_id, "result_data": final_result_data})
 
-        print(f"  → [CRITICAL] UPDATE statement executed, attempting commit...")
+        logger.debug("[CRITICAL] UPDATE statement executed, attempting commit...")
 
         commit_success = commit_with_retry(db)
-        print(f"  → [CRITICAL] Commit result: {commit_success}")
+        logger.debug("[CRITICAL] Commit result: %s", commit_success)
 
         if not commit_success:
             raise Exception("Failed to commit task execution status to success")
@@ -340,19 +355,19 @@ def run_tip_report_task(task_id, task_name, date_range_type, email_list_json, by
         if not verification:
             raise Exception(f"Status verification FAILED: No record found for execution_id={execution_id}")
 
-        print(f"  → [CRITICAL] Verification check: status='{verification[0]}', completed_at='{verification[1]}'")
+        logger.debug("[CRITICAL] Verification check: status='%s', completed_at='%s'", verification[0], verification[1])
 
         if verification[0] != 'success':
             raise Exception(f"Status verification FAILED: expected 'success', got '{verification[0]}'")
 
-        print(f"  ✓ [SUCCESS] Execution {execution_id} confirmed as 'success' in database")
+        logger.debug("[SUCCESS] Execution %s confirmed as 'success' in database", execution_id)
 
         # Mark that task succeeded for finally block
         task_succeeded = True
 
         time.sleep(0.05)
 
-        print(f"  → Updating scheduled task metadata...")
+        logger.debug("Updating scheduled task metadata...")
 
         task_info = db.execute(text("""
             SELECT schedule_type, cron_expression, interval_value, interval_unit, starts_at
@@ -382,17 +397,15 @@ def run_tip_report_task(task_id, task_name, date_range_type, email_list_json, by
         """), {"task_id": task_id, "next_run_at": next_run_at})
 
         if not commit_with_retry(db):
-            print(f"  ⚠ Warning: Failed to update scheduled task metadata for '{task_name}'")
+            logger.warning("Failed to update scheduled task metadata for '%s'", task_name)
         else:
-            print(f"  ✓ Task metadata updated")
+            logger.debug("Task metadata updated")
 
-        cleanup_old_executions(task_id)
-
-        print(f"✓✓✓ Tip report task '{task_name}' COMPLETED SUCCESSFULLY ✓✓✓")
+        logger.info("Tip report task '%s' completed successfully", task_name)
 
     except Exception as e:
         error_message = str(e)
-        print(f"✗ Tip report task '{task_name}' failed: {error_message}")
+        logger.error("Tip report task '%s' failed: %s", task_name, error_message)
 
         import traceback
         traceback.print_exc()
@@ -409,41 +422,41 @@ def run_tip_report_task(task_id, task_name, date_range_type, email_list_json, by
                 """), {"execution_id": execution_id, "error_message": error_message})
 
                 if commit_with_retry(db):
-                    print(f"  ✓ Marked execution {execution_id} as failed")
+                    logger.debug("Marked execution %s as failed", execution_id)
                 else:
-                    print(f"  ✗ WARNING: Could not mark execution {execution_id} as failed!")
+                    logger.error("Could not mark execution %s as failed!", execution_id)
             except Exception as update_error:
-                print(f"  ✗ ERROR updating execution status: {update_error}")
+                logger.error("Error updating execution status: %s", update_error)
         else:
-            print(f"  ✗ No execution_id available to mark as failed")
+            logger.error("No execution_id available to mark as failed")
 
     finally:
         try:
-            print(f"  → [FINALLY] Closing database connection...")
+            logger.debug("[FINALLY] Closing database connection...")
             db.close()
-            print(f"  → [FINALLY] Database connection closed")
+            logger.debug("[FINALLY] Database connection closed")
 
             # SAFETY CHECK: If task succeeded but might not have updated status, force update with new connection
             if task_succeeded and execution_id:
-                print(f"  → [SAFETY] Task succeeded, verifying status with fresh connection...")
+                logger.debug("[SAFETY] Task succeeded, verifying status with fresh connection...")
                 verify_db = SessionLocal()
                 try:
                     status_check = verify_db.execute(text("""
                         SELECT status FROM task_executions WHERE id = :execution_id
                     """), {"execution_id": execution_id}).scalar()
 
-                    print(f"  → [SAFETY] Status is '{status_check}'")
+                    logger.debug("[SAFETY] Status is '%s'", status_check)
 
                     if status_check != 'success':
-                        print(f"  ⚠️  [SAFETY] Status is '{status_check}' but should be 'success'! Force updating...")
+                        logger.warning("[SAFETY] Status is '%s' but should be 'success'! Force updating...", status_check)
                         force_update_execution_status(execution_id, 'success', final_result_data)
                     else:
-                        print(f"  ✓ [SAFETY] Status correctly set to 'success'")
+                        logger.debug("[SAFETY] Status correctly set to 'success'")
                 finally:
                     verify_db.close()
 
         except Exception as close_error:
-            print(f"  ✗ [FINALLY] ERROR closing database: {close_error}")
+            logger.error("[FINALLY] Error closing database: %s", close_error)
 
 def run_daily_balance_report_task(task_id, task_name, date_range_type, email_list_json, bypass_opt_in, attach_csv=False):
     """
@@ -461,7 +474,7 @@ def run_daily_balance_report_task(task_id, task_name, date_range_type, email_lis
     execution_id = None
 
     try:
-        print(f"▶️  Starting daily balance report task '{task_name}' (ID: {task_id})")
+        logger.info("Starting daily balance report task '%s' (ID: %s)", task_name, task_id)
 
         # Verify the task exists before creating execution
         task_exists = db.execute(text("""
@@ -484,12 +497,12 @@ def run_daily_balance_report_task(task_id, task_name, date_range_type, email_lis
 
         if stale_count > 0:
             if not commit_with_retry(db):
-                print(f"  ⚠ Warning: Failed to commit stale execution cleanup")
+                logger.warning("Failed to commit stale execution cleanup")
             else:
-                print(f"  → Cleaned up {stale_count} stale execution(s)")
+                logger.debug("Cleaned up %s stale execution(s)", stale_count)
 
         start_date, end_date = calculate_date_range(date_range_type)
-        print(f"  → Date range: {start_date} to {end_date}")
+        logger.debug("Date range: %s to %s", start_date, end_date)
 
         # Insert the execution record and get its ID in one query
         result = db.execute(text("""
@@ -516,9 +529,13 @@ def run_daily_balance_report_task(task_id, task_name, date_range_type, email_lis
             total_records = db.execute(text("SELECT COUNT(*) FROM task_executions")).scalar()
             raise Exception(f"Execution record {execution_id} was not persisted to database. Total records: {total_records}. This may indicate a database write issue.")
 
-        print(f"  → Created execution record (ID: {execution_id})")
+        logger.debug("Created execution record (ID: %s)", execution_id)
 
-        filename = generate_consolidated_daily_balance_csv(db, start_date, end_date, current_user=None, source="scheduled_task")
+        report_db = ReportSessionLocal()
+        try:
+            filename = generate_consolidated_daily_balance_csv(report_db, start_date, end_date, current_user=None, source="scheduled_task")
+        finally:
+            report_db.close()
 
         year = str(start_date.year)
         month = f"{start_date.month:02d}"
@@ -528,6 +545,7 @@ def run_daily_balance_report_task(task_id, task_name, date_range_type, email_lis
             raise FileNotFoundError(f"Report file not found: {filepath}")
 
         email_list = json.loads(email_list_json) if email_list_json else []
+        emails_sent = 0
 
         if not bypass_opt_in:
             opt_in_users = db.query(User).filter(
@@ -543,22 +561,28 @@ def run_daily_balance_report_task(task_id, task_name, date_range_type, email_lis
             date_range = f"{start_date.strftime('%B %d, %Y')} to {end_date.strftime('%B %d, %Y')}"
             subject = f"[Scheduled] Daily Balance Report - {date_range}"
 
-            result = send_report_emails(
+            result = queue_report_emails(
                 to_emails=email_list,
                 report_type="daily",
                 report_filepath=filepath,
                 subject=subject,
                 date_range=date_range,
-                attach_csv=attach_csv
+                attach_csv=attach_csv,
+                # One report per task and date range: a repeated firing of the same
+                # run (misfire catch-up, restart, manual re-run) doesn't resend it
+                idempotency_key=f"task-{task_id}-{start_date}-{end_date}"
             )
 
             if not result["success"]:
                 raise Exception(f"Email sending failed: {result.get('message', 'Unknown error')}")
+            if result["skipped"]:
+                logger.warning("Recipients already queued for task %s: %s", task_id, ", ".join(result["skipped"]))
+            emails_sent = len(result["queued"])
 
         result_data = json.dumps({
             "filename": filename,
             "date_range": f"{start_date} to {end_date}",
-            "emails_sent": len(email_list)
+            "emails_sent": emails_sent
         })
 
         time.sleep(0.05)
@@ -610,15 +634,13 @@ def run_daily_balance_report_task(task_id, task_name, date_range_type, email_lis
         """), {"task_id": task_id, "next_run_at": next_run_at})
 
         if not commit_with_retry(db):
-            print(f"⚠ Warning: Failed to update scheduled task metadata for '{task_name}'")
+            logger.warning("Failed to update scheduled task metadata for '%s'", task_name)
 
-        cleanup_old_executions(task_id)
-
-        print(f"✓ Daily balance report task '{task_name}' completed successfully")
+        logger.info("Daily balance report task '%s' completed successfully", task_name)
 
     except Exception as e:
         error_message = str(e)
-        print(f"✗ Daily balance report task '{task_name}' failed: {error_message}")
+        logger.error("Daily balance report task '%s' failed: %s", task_name, error_message)
 
         import traceback
         traceback.print_exc()
@@ -635,21 +657,21 @@ def run_daily_balance_report_task(task_id, task_name, date_range_type, email_lis
                 """), {"execution_id": execution_id, "error_message": error_message})
 
                 if commit_with_retry(db):
-                    print(f"  ✓ Marked execution {execution_id} as failed")
+                    logger.debug("Marked execution %s as failed", execution_id)
                 else:
-                    print(f"  ✗ WARNING: Could not mark execution {execution_id} as failed!")
+                    logger.error("Could not mark execution %s as failed!", execution_id)
             except Exception as update_error:
-                print(f"  ✗ ERROR updating execution status: {update_error}")
+                logger.error("Error updating execution status: %s", update_error)
         else:
-            print(f"  ✗ No execution_id available to mark as failed")
+            logger.error("No execution_id available to mark as failed")
 
     finally:
         try:
-            print(f"  → [FINALLY] Closing database connection...")
+            logger.debug("[FINALLY] Closing database connection...")
             db.close()
-            print(f"  → [FINALLY] Database connection closed")
+            logger.debug("[FINALLY] Database connection closed")
         except Exception as close_error:
-            print(f"  ✗ [FINALLY] ERROR closing database: {close_error}")
+            logger.error("[FINALLY] Error closing database: %s", close_error)
 
 def run_employee_tip_report_task(task_id, task_name, date_range_type, email_list_json, bypass_opt_in, employee_id, attach_csv=False):
     """
@@ -668,7 +690,7 @@ def run_employee_tip_report_task(task_id, task_name, date_range_type, email_list
     execution_id = None
 
     try:
-        print(f"▶️  Starting employee tip report task '{task_name}' (ID: {task_id})")
+        logger.info("Starting employee tip report task '%s' (ID: %s)", task_name, task_id)
 
         # Verify the task exists before creating execution
         task_exists = db.execute(text("""
@@ -691,12 +713,12 @@ def run_employee_tip_report_task(task_id, task_name, date_range_type, email_list
 
         if stale_count > 0:
             if not commit_with_retry(db):
-                print(f"  ⚠ Warning: Failed to commit stale execution cleanup")
+                logger.warning("Failed to commit stale execution cleanup")
             else:
-                print(f"  → Cleaned up {stale_count} stale execution(s)")
+                logger.debug("Cleaned up %s stale execution(s)", stale_count)
 
         start_date, end_date = calculate_date_range(date_range_type)
-        print(f"  → Date range: {start_date} to {end_date}")
+        logger.debug("Date range: %s to %s", start_date, end_date)
 
         # Insert the execution record and get its ID in one query
         result = db.execute(text("""
@@ -723,13 +745,17 @@ def run_employee_tip_report_task(task_id, task_name, date_range_type, email_list
             total_records = db.execute(text("SELECT COUNT(*) FROM task_executions")).scalar()
             raise Exception(f"Execution record {execution_id} was not persisted to database. Total records: {total_records}. This may indicate a database write issue.")
 
-        print(f"  → Created execution record (ID: {execution_id})")
+        logger.debug("Created execution record (ID: %s)", execution_id)
 
         employee = db.query(Employee).filter(Employee.id == employee_id).first()
         if not employee:
             raise Exception(f"Employee with ID {employee_id} not found")
 
-        filename = generate_employee_tip_report_csv(db, employee, start_date, end_date, current_user=None, source="scheduled_task")
+        report_db = ReportSessionLocal()
+        try:
+            filename = generate_employee_tip_report_csv(report_db, employee, start_date, end_date, current_user=None, source="scheduled_task")
+        finally:
+            report_db.close()
         year = str(start_date.year)
         month = f"{start_date.month:02d}"
         filepath = os.path.join(DATABASE_DIR, "reports", "tip_report", year, month, filename)
@@ -738,6 +764,7 @@ def run_employee_tip_report_task(task_id, task_name, date_range_type, email_list
             raise FileNotFoundError(f"Report file not found: {filepath}")
 
         email_list = json.loads(email_list_json) if email_list_json else []
+        emails_sent = 0
 
         if not bypass_opt_in:
             opt_in_users = db.query(User).filter(
@@ -753,23 +780,29 @@ def run_employee_tip_report_task(task_id, task_name, date_range_type, email_list
             date_range = f"{start_date.strftime('%B %d, %Y')} to {end_date.strftime('%B %d, %Y')}"
             subject = f"[Scheduled] Employee Tip Report - {employee.name} - {date_range}"
 
-            result = send_report_emails(
+            result = queue_report_emails(
                 to_emails=email_list,
                 report_type="tips",
                 report_filepath=filepath,
                 subject=subject,
                 date_range=date_range,
-                attach_csv=attach_csv
+                attach_csv=attach_csv,
+                # One report per task and date range: a repeated firing of the same
+                # run (misfire catch-up, restart, manual re-run) doesn't resend it
+                idempotency_key=f"task-{task_id}-{start_date}-{end_date}"
             )
 
             if not result["success"]:
                 raise Exception(f"Email sending failed: {result.get('message', 'Unknown error')}")
+            if result["skipped"]:
+                logger.warning("Recipients already queued for task %s: %s", task_id, ", ".join(result["skipped"]))
+            emails_sent = len(result["queued"])
 
         result_data = json.dumps({
             "filename": filename,
             "employee_name": employee.name,
             "date_range": f"{start_date} to {end_date}",
-            "emails_sent": len(email_list)
+            "emails_sent": emails_sent
         })
 
         time.sleep(0.05)
@@ -821,15 +854,13 @@ def run_employee_tip_report_task(task_id, task_name, date_range_type, email_list
         """), {"task_id": task_id, "next_run_at": next_run_at})
 
         if not commit_with_retry(db):
-            print(f"⚠ Warning: Failed to update scheduled task metadata for '{task_name}'")
+            logger.warning("Failed to update scheduled task metadata for '%s'", task_name)
 
-        cleanup_old_executions(task_id)
-
-        print(f"✓ Employee tip report task '{task_name}' completed successfully")
+        logger.info("Employee tip report task '%s' completed successfully", task_name)
 
     except Exception as e:
         error_message = str(e)
-        print(f"✗ Employee tip report task '{task_name}' failed: {error_message}")
+        logger.error("Employee tip report task '%s' failed: %s", task_name, error_message)
 
         import traceback
         traceback.print_exc()
@@ -846,21 +877,21 @@ def run_employee_tip_report_task(task_id, task_name, date_range_type, email_list
                 """), {"execution_id": execution_id, "error_message": error_message})
 
                 if commit_with_retry(db):
-                    print(f"  ✓ Marked execution {execution_id} as failed")
+                    logger.debug("Marked execution %s as failed", execution_id)
                 else:
-                    print(f"  ✗ WARNING: Could not mark execution {execution_id} as failed!")
+                    logger.error("Could not mark execution %s as failed!", execution_id)
             except Exception as update_error:
-                print(f"  ✗ ERROR updating execution status: {update_error}")
+                logger.error("Error updating execution status: %s", update_error)
         else:
-            print(f"  ✗ No execution_id available to mark as failed")
+            logger.error("No execution_id available to mark as failed")
 
     finally:
         try:
-            print(f"  → [FINALLY] Closing database connection...")
+            logger.debug("[FINALLY] Closing database connection...")
             db.close()
-            print(f"  → [FINALLY] Database connection closed")
+            logger.debug("[FINALLY] Database connection closed")
         except Exception as close_error:
-            print(f"  ✗ [FINALLY] ERROR closing database: {close_error}")
+            logger.error("[FINALLY] Error closing database: %s", close_error)
 
 def run_backup_task(task_id, task_name):
     """
@@ -874,7 +905,7 @@ def run_backup_task(task_id, task_name):
     execution_id = None
 
     try:
-        print(f"▶️  Starting backup task '{task_name}' (ID: {task_id})")
+        logger.info("Starting backup task '%s' (ID: %s)", task_name, task_id)
 
         # Verify the task exists before creating execution
         task_exists = db.execute(text("""
@@ -897,9 +928,9 @@ def run_backup_task(task_id, task_name):
 
         if stale_count > 0:
             if not commit_with_retry(db):
-                print(f"  ⚠ Warning: Failed to commit stale execution cleanup")
+                logger.warning("Failed to commit stale execution cleanup")
             else:
-                print(f"  → Cleaned up {stale_count} stale execution(s)")
+                logger.debug("Cleaned up %s stale execution(s)", stale_count)
 
         # Insert the execution record and get its ID in one query
         result = db.execute(text("""
@@ -926,7 +957,7 @@ def run_backup_task(task_id, task_name):
             total_records = db.execute(text("SELECT COUNT(*) FROM task_executions")).scalar()
             raise Exception(f"Execution record {execution_id} was not persisted to database. Total records: {total_records}. This may indicate a database write issue.")
 
-        print(f"  → Created execution record (ID: {execution_id})")
+        logger.debug("Created execution record (ID: %s)", execution_id)
 
         filename = create_backup()
 
@@ -985,15 +1016,13 @@ def run_backup_task(task_id, task_name):
         """), {"task_id": task_id, "next_run_at": next_run_at})
 
         if not commit_with_retry(db):
-            print(f"⚠ Warning: Failed to update scheduled task metadata for '{task_name}'")
-
-        cleanup_old_executions(task_id)
+            logger.warning("Failed to update scheduled task metadata for '%s'", task_name)
 
-        print(f"✓ Backup task '{task_name}' completed successfully")
+        logger.info("Backup task '%s' completed successfully", task_name)
 
     except Exception as e:
         error_message = str(e)
-        print(f"✗ Backup task '{task_name}' failed: {error_message}")
+        logger.error("Backup task '%s' failed: %s", task_name, error_message)
 
         import traceback
         traceback.print_exc()
@@ -1010,18 +1039,18 @@ def run_backup_task(task_id, task_name):
                 """), {"execution_id": execution_id, "error_message": error_message})
 
                 if commit_with_retry(db):
-                    print(f"  ✓ Marked execution {execution_id} as failed")
+                    logger.debug("Marked execution %s as failed", execution_id)
                 else:
-                    print(f"  ✗ WARNING: Could not mark execution {execution_id} as failed!")
+                    logger.error("Could not mark execution %s as failed!", execution_id)
             except Exception as update_error:
-                print(f"  ✗ ERROR updating execution status: {update_error}")
+                logger.error("Error updating execution status: %s", update_error)
         else:
-            print(f"  ✗ No execution_id available to mark as failed")
+            logger.error("No execution_id available to mark as failed")
 
     finally:
         try:
-            print(f"  → [FINALLY] Closing database connection...")
+            logger.debug("[FINALLY] Closing database connection...")
             db.close()
-            print(f"  → [FINALLY] Database connection closed")
+            logger.debug("[FINALLY] Database connection closed")
         except Exception as close_error:
-            print(f"  ✗ [FINALLY] ERROR closing database: {close_error}")
+            logger.error("[FINALLY] Error closing database: %s", close_error)
@@ -0,0 +1,122 @@
+"""
+Upcoming runs of all active scheduled tasks, as one timeline.
+
+Each active task's schedule is turned into a lazy stream of fire times
+(cron triggers come from the compiled-trigger cache in app.scheduler,
+interval schedules are fast-forwarded arithmetically), and the streams are
+merged with heapq.merge, so building a week's calendar costs one pass over
+the events in the window.
+
+Minutes in which two or more report/backup tasks fire are reported as
+collisions, with a per-task-group summary to help decide what to stagger.
+"""
+import heapq
+import logging
+from datetime import datetime, timedelta
+from itertools import groupby, islice, takewhile
+from operator import itemgetter
+
+import pytz
+from sqlalchemy import text
+
+from app.scheduler import tz, get_cron_trigger, iter_cron_run_times, iter_interval_run_times, parse_interval_schedule
+
+# Task types that generate reports or copy the database; several of these
+# starting in the same minute compete for the same resources
+HEAVY_TASK_TYPES = {"tip_report", "daily_balance_report", "employee_tip_report", "backup"}
+MAX_CALENDAR_DAYS = 31
+MAX_EVENTS = 5000
+
+logger = logging.getLogger(__name__)
+
+
+def _fire_times(task, now):
+    if task.schedule_type == "cron":
+        trigger = get_cron_trigger(task.cron_expression or "")
+        if trigger is None:
+            raise ValueError(f"invalid cron expression '{task.cron_expression}'")
+        return iter_cron_run_times(trigger, now)
+    if task.schedule_type == "interval":
+        start_date, interval_delta, wall_clock = parse_interval_schedule(
+            task.interval_value, task.interval_unit, task.starts_at, now
+        )
+        return iter_interval_run_times(start_date, interval_delta, wall_clock, now)
+    raise ValueError(f"unknown schedule type '{task.schedule_type}'")
+
+
+def _task_stream(task, now, window_end, errors):
+    """(fire time, task) pairs for one task until the end of the window."""
+    try:
+        for run in takewhile(lambda run: run <= window_end, _fire_times(task, now)):
+            yield run, task
+    except Exception as e:
+        logger.warning("Could not compute runs for scheduled task %s: %s", task.id, e)
+        errors.append({"task_id": task.id, "name": task.name, "error": str(e)})
+
+
+def build_task_calendar(db, days=7, now=None):
+    """
+    Merge the upcoming runs of every active task over the next `days` days.
+
+    Returns:
+        Dict with window_start, window_end, events (sorted), collisions,
+        collision_summary, truncated and errors
+    """
+    now = now or datetime.now(tz)
+    window_end = now + timedelta(days=days)
+
+    tasks = db.execute(text("""
+        SELECT id, name, task_type, schedule_type, cron_expression,
+               interval_value, interval_unit, starts_at
+        FROM scheduled_tasks
+        WHERE is_active = 1
+        ORDER BY id
+    """)).fetchall()
+
+    errors = []
+    streams = [_task_stream(task, now, window_end, errors) for task in tasks]
+    merged = list(islice(heapq.merge(*streams, key=itemgetter(0)), MAX_EVENTS + 1))
+    truncated = len(merged) > MAX_EVENTS
+    merged = merged[:MAX_EVENTS]
+
+    events = [
+        {
+            "time": run.isoformat(),
+            "task_id": task.id,
+            "name": task.name,
+            "task_type": task.task_type,
+            "heavy": task.task_type in HEAVY_TASK_TYPES,
+        }
+        for run, task in merged
+    ]
+
+    collisions = []
+    summary = {}
+    heavy_runs = [(run, task) for run, task in merged if task.task_type in HEAVY_TASK_TYPES]
+    for minute, group in groupby(heavy_runs, key=lambda item: item[0].astimezone(pytz.utc).replace(second=0, microsecond=0)):
+        group_tasks = {task.id: task for _, task in group}
+        if len(group_tasks) < 2:
+            continue
+        local_minute = minute.astimezone(tz)
+        collisions.append({
+            "minute": local_minute.isoformat(),
+            "tasks": [{"task_id": task.id, "name": task.name, "task_type": task.task_type} for task in group_tasks.values()],
+        })
+        key = tuple(sorted(group_tasks))
+        entry = summary.setdefault(key, {
+            "task_ids": list(key),
+            "names": [group_tasks[task_id].name for task_id in key],
+            "count": 0,
+            "first": local_minute.isoformat(),
+        })
+        entry["count"] += 1
+
+    return {
+        "window_start": now.isoformat(),
+        "window_end": window_end.isoformat(),
+        "events": events,
+        "truncated": truncated,
+        "collisions": collisions,
+        "collision_summary": sorted(summary.values(), key=lambda entry: -entry["count"]),
+        "errors": errors,
+    }
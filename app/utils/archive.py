@@ -0,0 +1,473 @@
+"""
+Archival of old finalized daily data into per-year SQLite databases.
+
+Finalized days older than the `archive_horizon_days` setting are moved out of
+daily_balance and its child tables into data/archive/archive_YYYY.db, and the
+archive_manifest table records which years live where. The hot tables (and
+their indexes) then only hold recent history.
+
+Report code reads archived days through archive_scope() / @include_archives:
+when a requested range overlaps an archived year, the archive databases are
+ATTACHed to a dedicated connection and TEMP views named after the archived
+tables (which shadow the main tables for unqualified names) UNION the main
+and archived rows. Ranges that touch no archive use the normal session with
+no extra work beyond one manifest lookup.
+
+Command line:
+
+    python -m app.utils.archive status
+    python -m app.utils.archive archive [--horizon-days N] [--dry-run]
+    python -m app.utils.archive maintain [--vacuum]
+"""
+import inspect
+import logging
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from functools import wraps
+
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from app.database import DATABASE_PATH, read_engine
+
+ARCHIVE_DIR = os.path.join("data", "archive")
+DEFAULT_HORIZON_DAYS = 365
+
+# (table, column linking rows to daily_balance.id) - parent first
+ARCHIVED_TABLES = [
+    ("daily_balance", "id"),
+    ("daily_employee_entries", "daily_balance_id"),
+    ("daily_financial_line_items", "daily_balance_id"),
+    ("daily_balance_checks", "daily_balance_id"),
+    ("daily_balance_efts", "daily_balance_id"),
+]
+
+ARCHIVE_INDEXES = [
+    ("daily_balance", "date"),
+    ("daily_employee_entries", "daily_balance_id"),
+    ("daily_employee_entries", "employee_id"),
+    ("daily_financial_line_items", "daily_balance_id"),
+    ("daily_balance_checks", "daily_balance_id"),
+    ("daily_balance_efts", "daily_balance_id"),
+]
+
+logger = logging.getLogger(__name__)
+
+
+def archive_path(year):
+    return os.path.join(ARCHIVE_DIR, f"archive_{year}.db")
+
+
+def _to_iso(value):
+    return value.isoformat() if isinstance(value, (date, datetime)) else str(value)
+
+
+def archives_for_range(db, start_date, end_date):
+    """Return [(year, file_path)] for archived years overlapping the date range."""
+    try:
+        rows = db.execute(
+            text("""
+                SELECT year, file_path FROM archive_manifest
+                WHERE first_date <= :end_date AND last_date >= :start_date
+                ORDER BY year
+            """),
+            {"start_date": _to_iso(start_date), "end_date": _to_iso(end_date)}
+        ).fetchall()
+    except OperationalError:
+        # Manifest table not created yet (migrations pending)
+        db.rollback()
+        return []
+    return [(row[0], row[1]) for row in rows]
+
+
+def _table_columns(conn, table, schema="main"):
+    return [row[1] for row in conn.exec_driver_sql(f"PRAGMA {schema}.table_info({table})").fetchall()]
+
+
+def _create_union_views(conn, aliases):
+    for table, _ in ARCHIVED_TABLES:
+        columns = _table_columns(conn, table)
+        if not columns:
+            continue
+
+        selects = [f"SELECT {', '.join(columns)} FROM main.{table}"]
+        for alias in aliases:
+            archived_columns = set(_table_columns(conn, table, alias))
+            if not archived_columns:
+                continue
+            # Columns added to the main table after the archive was written read as NULL
+            select_list = ", ".join(col if col in archived_columns else f"NULL AS {col}" for col in columns)
+            selects.append(f"SELECT {select_list} FROM {alias}.{table}")
+
+        conn.exec_driver_sql(f"CREATE TEMP VIEW {table} AS {' UNION ALL '.join(selects)}")
+
+
+@contextmanager
+def archive_scope(db, start_date, end_date):
+    """
+    Yield a session that sees archived days for the given range.
+
+    When no archive overlaps the range the given session is yielded as-is.
+    Otherwise a read-only session on a dedicated connection is yielded, with
+    the relevant archives attached; the connection is discarded afterwards so
+    the attachments and TEMP views never leak back into the pool.
+    """
+    archives = archives_for_range(db, start_date, end_date)
+    if not archives:
+        yield db
+        return
+
+    connection = read_engine.connect()
+    session = None
+    try:
+        aliases = []
+        for year, file_path in archives:
+            if not os.path.exists(file_path):
+                logger.warning("Archive for %s is listed in the manifest but missing: %s", year, file_path)
+                continue
+            alias = f"archive_{year}"
+            connection.exec_driver_sql(f"ATTACH DATABASE ? AS {alias}", (file_path,))
+            aliases.append(alias)
+
+        _create_union_views(connection, aliases)
+        session = Session(bind=connection)
+        yield session
+    finally:
+        if session is not None:
+            session.close()
+        connection.invalidate()
+        connection.close()
+
+
+def include_archives(func):
+    """
+    Decorator for report functions taking (db, ..., start_date, end_date):
+    the function runs against archive_scope() for its range.
+    """
+    signature = inspect.signature(func)
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        arguments = bound.arguments
+        with archive_scope(arguments["db"], arguments["start_date"], arguments["end_date"]) as report_db:
+            arguments["db"] = report_db
+            return func(*bound.args, **bound.kwargs)
+
+    return wrapper
+
+
+def is_date_archived(db, target_date):
+    """Check whether a day has been moved to an archive database."""
+    if not archives_for_range(db, target_date, target_date):
+        return False
+    with archive_scope(db, target_date, target_date) as archive_db:
+        return archive_db.execute(
+            text("SELECT 1 FROM daily_balance WHERE date = :date LIMIT 1"),
+            {"date": _to_iso(target_date)}
+        ).first() is not None
+
+
+def get_archive_horizon_days(db):
+    """Read the archive horizon from settings (days of finalized history kept in the main database)."""
+    from app.models import Setting
+
+    setting = db.query(Setting).filter(Setting.key == "archive_horizon_days").first()
+    try:
+        return int(setting.value) if setting else DEFAULT_HORIZON_DAYS
+    except ValueError:
+        return DEFAULT_HORIZON_DAYS
+
+
+# ---------------------------------------------------------------------------
+# Archiving and maintenance (run from the command line, not from requests)
+# ---------------------------------------------------------------------------
+
+def _connect(db_path):
+    conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+    conn.execute("PRAGMA foreign_keys=ON")
+    conn.execute("PRAGMA busy_timeout=30000")
+    return conn
+
+
+def _prepare_archive_file(file_path):
+    """Create the archive database with incremental auto-vacuum enabled."""
+    if os.path.exists(file_path):
+        return
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    conn = sqlite3.connect(file_path)
+    try:
+        # auto_vacuum must be set before the first table is created
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        conn.execute("CREATE TABLE IF NOT EXISTS archive_info (key TEXT PRIMARY KEY, value TEXT)")
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _sync_archive_schema(conn):
+    """Create archived tables in the attached archive, adding any columns the main tables gained since."""
+    for table, _ in ARCHIVED_TABLES:
+        main_info = conn.execute(f"PRAGMA main.table_info({table})").fetchall()
+        archived = {row[1] for row in conn.execute(f"PRAGMA archive.table_info({table})").fetchall()}
+
+        if not archived:
+            column_defs = [f"{row[1]} {row[2]}" for row in main_info]
+            primary_key = [row[1] for row in sorted(main_info, key=lambda r: r[5]) if row[5]]
+            if primary_key:
+                column_defs.append(f"PRIMARY KEY ({', '.join(primary_key)})")
+            conn.execute(f"CREATE TABLE archive.{table} ({', '.join(column_defs)})")
+            continue
+
+        for row in main_info:
+            if row[1] not in archived:
+                conn.execute(f"ALTER TABLE archive.{table} ADD COLUMN {row[1]} {row[2]}")
+
+    for table, column in ARCHIVE_INDEXES:
+        conn.execute(f"CREATE INDEX IF NOT EXISTS archive.idx_{table}_{column} ON {table} ({column})")
+
+
+def _raise_id_floor(conn, table):
+    """
+    Keep the table's AUTOINCREMENT counter above every archived id, so rows
+    deleted from main never have their ids handed out again.
+    """
+    floor = conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM archive.{table}").fetchone()[0]
+    updated = conn.execute(
+        "UPDATE main.sqlite_sequence SET seq = MAX(seq, ?) WHERE name = ?", (floor, table)
+    ).rowcount
+    if not updated:
+        conn.execute("INSERT INTO main.sqlite_sequence (name, seq) VALUES (?, ?)", (table, floor))
+
+
+def _create_archive_ids(conn, cutoff, year):
+    conn.execute("DROP TABLE IF EXISTS temp.archive_ids")
+    conn.execute("""
+        CREATE TEMP TABLE archive_ids AS
+        SELECT id FROM main.daily_balance
+        WHERE finalized = 1 AND date < ? AND date >= ? AND date <= ?
+    """, (cutoff.isoformat(), f"{year}-01-01", f"{year}-12-31"))
+
+
+def _copy_year_to_archive(db_path, file_path, cutoff, year):
+    """
+    Copy a year's rows into its archive in a transaction that only writes the
+    archive file.
+
+    Rows whose id is already archived with identical contents were copied by
+    an earlier run that stopped before main was cleaned up, and are skipped.
+    A row whose id is archived with different contents is an error: it is
+    never overwritten.
+    """
+    conn = _connect(db_path)
+    try:
+        conn.execute("ATTACH DATABASE ? AS archive", (file_path,))
+        _sync_archive_schema(conn)
+
+        # Deferred: only the archive is written, main is just read
+        conn.execute("BEGIN")
+        try:
+            _create_archive_ids(conn, cutoff, year)
+            for table, key in ARCHIVED_TABLES:
+                columns = [row[1] for row in conn.execute(f"PRAGMA main.table_info({table})").fetchall()]
+                conflicts = conn.execute(f"""
+                    SELECT COUNT(*) FROM main.{table} m
+                    JOIN archive.{table} a ON a.id = m.id
+                    WHERE m.{key} IN (SELECT id FROM temp.archive_ids)
+                      AND NOT ({" AND ".join(f"m.{col} IS a.{col}" for col in columns)})
+                """).fetchone()[0]
+                if conflicts:
+                    raise RuntimeError(
+                        f"{conflicts} {table} row(s) for {year} have ids already used by different rows in {file_path}"
+                    )
+
+                column_list = ", ".join(columns)
+                conn.execute(f"""
+                    INSERT INTO archive.{table} ({column_list})
+                    SELECT {column_list} FROM main.{table} m
+                    WHERE m.{key} IN (SELECT id FROM temp.archive_ids)
+                      AND NOT EXISTS (SELECT 1 FROM archive.{table} a WHERE a.id = m.id)
+                """)
+            conn.execute("DROP TABLE temp.archive_ids")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+    finally:
+        conn.close()
+
+
+def archive_finalized_days(horizon_days=None, db_path=DATABASE_PATH, dry_run=False):
+    """
+    Move finalized days older than the horizon into per-year archive databases.
+
+    SQLite only commits atomically per file when main is in WAL mode, so each
+    year is moved in two commits that each write a single file, while the
+    main database's write lock is held throughout:
+
+    1. the year's rows are copied into the archive (on a second connection)
+    2. they are deleted from main and the year is recorded in archive_manifest
+
+    A run interrupted between the two leaves the rows in both databases; the
+    manifest doesn't list them yet, so reports still read them from main only,
+    and the next run skips the identical archived copies and finishes step 2.
+    Rows are never overwritten in the archive: an id already archived with
+    different contents aborts the year.
+
+    Returns:
+        Dict mapping year to number of days archived
+    """
+    if horizon_days is None:
+        from app.database import SessionLocal
+        db = SessionLocal()
+        try:
+            horizon_days = get_archive_horizon_days(db)
+        finally:
+            db.close()
+
+    cutoff = date.today() - timedelta(days=horizon_days)
+    conn = _connect(db_path)
+    archived = {}
+    try:
+        years = conn.execute("""
+            SELECT strftime('%Y', date) AS year, COUNT(*)
+            FROM daily_balance
+            WHERE finalized = 1 AND date < ?
+            GROUP BY year
+            ORDER BY year
+        """, (cutoff.isoformat(),)).fetchall()
+
+        if not years:
+            print(f"No finalized days before {cutoff} to archive")
+            return archived
+
+        for year, day_count in years:
+            year = int(year)
+            if dry_run:
+                print(f"  {year}: {day_count} day(s) would be archived")
+                archived[year] = day_count
+                continue
+
+            started = time.perf_counter()
+            file_path = archive_path(year)
+            _prepare_archive_file(file_path)
+            conn.execute("ATTACH DATABASE ? AS archive", (file_path,))
+            try:
+                conn.execute("BEGIN")
+                try:
+                    # Take main's write lock (and only main's, so the copy can
+                    # write the archive) before reading anything
+                    conn.execute("DELETE FROM main.archive_manifest WHERE 0")
+
+                    _copy_year_to_archive(db_path, file_path, cutoff, year)
+
+                    _create_archive_ids(conn, cutoff, year)
+                    for table, _ in ARCHIVED_TABLES:
+                        _raise_id_floor(conn, table)
+
+                    # Children before parent so foreign keys stay satisfied
+                    for table, key in reversed(ARCHIVED_TABLES):
+                        conn.execute(f"DELETE FROM main.{table} WHERE {key} IN (SELECT id FROM temp.archive_ids)")
+
+                    conn.execute("""
+                        INSERT INTO main.archive_manifest (year, file_path, first_date, last_date, day_count, archived_at)
+                        SELECT ?, ?, MIN(date), MAX(date), COUNT(*), ?
+                        FROM archive.daily_balance
+                        WHERE true
+                        ON CONFLICT(year) DO UPDATE SET
+                            file_path = excluded.file_path,
+                            first_date = excluded.first_date,
+                            last_date = excluded.last_date,
+                            day_count = excluded.day_count,
+                            archived_at = excluded.archived_at
+                    """, (year, file_path, datetime.now().isoformat(sep=" ")))
+
+                    conn.execute("DROP TABLE temp.archive_ids")
+                    conn.execute("COMMIT")
+                except Exception:
+                    conn.execute("ROLLBACK")
+                    raise
+            finally:
+                conn.execute("DETACH DATABASE archive")
+
+            archived[year] = day_count
+            print(f"  ✓ {year}: archived {day_count} day(s) to {file_path} in {time.perf_counter() - started:.2f}s")
+    finally:
+        conn.close()
+
+    return archived
+
+
+def _maintain_database(file_path, full_vacuum=False):
+    conn = _connect(file_path)
+    try:
+        started = time.perf_counter()
+        auto_vacuum = conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+        if full_vacuum:
+            # Switching to incremental auto-vacuum only takes effect after a full VACUUM
+            conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            conn.execute("VACUUM")
+            action = "VACUUM"
+        elif auto_vacuum == 2:
+            conn.execute("PRAGMA incremental_vacuum")
+            action = "incremental vacuum"
+        else:
+            action = "no vacuum (run with --vacuum once to enable incremental vacuum)"
+
+        conn.execute("ANALYZE")
+        print(f"  ✓ {file_path}: {action} + ANALYZE in {time.perf_counter() - started:.2f}s")
+    finally:
+        conn.close()
+
+
+def maintain_databases(db_path=DATABASE_PATH, full_vacuum=False):
+    """Run incremental VACUUM (or a full VACUUM) and ANALYZE on the main and archive databases."""
+    _maintain_database(db_path, full_vacuum=full_vacuum)
+    if os.path.isdir(ARCHIVE_DIR):
+        for name in sorted(os.listdir(ARCHIVE_DIR)):
+            if name.startswith("archive_") and name.endswith(".db"):
+                _maintain_database(os.path.join(ARCHIVE_DIR, name), full_vacuum=full_vacuum)
+
+
+def print_archive_status(db_path=DATABASE_PATH):
+    conn = _connect(db_path)
+    try:
+        rows = conn.execute(
+            "SELECT year, file_path, first_date, last_date, day_count, archived_at FROM archive_manifest ORDER BY year"
+        ).fetchall()
+        live = conn.execute("SELECT COUNT(*), MIN(date), MAX(date) FROM daily_balance").fetchone()
+    finally:
+        conn.close()
+
+    print(f"Main database: {live[0]} day(s) ({live[1] or '-'} to {live[2] or '-'})")
+    if not rows:
+        print("No archives")
+    for year, file_path, first_date, last_date, day_count, archived_at in rows:
+        size_mb = os.path.getsize(file_path) / (1024 * 1024) if os.path.exists(file_path) else 0
+        print(f"  {year}: {day_count} day(s) {first_date} to {last_date}, {size_mb:.1f} MB, archived {archived_at}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Archive old finalized daily data")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("status", help="Show archived years")
+    archive_parser = subparsers.add_parser("archive", help="Move old finalized days into archive databases")
+    archive_parser.add_argument("--horizon-days", type=int, help="Keep this many days in the main database (default: setting)")
+    archive_parser.add_argument("--dry-run", action="store_true")
+    maintain_parser = subparsers.add_parser("maintain", help="Incremental VACUUM and ANALYZE")
+    maintain_parser.add_argument("--vacuum", action="store_true", help="Full VACUUM (also enables incremental vacuum)")
+    args = parser.parse_args()
+
+    if args.command == "status":
+        print_archive_status()
+    elif args.command == "archive":
+        archive_finalized_days(horizon_days=args.horizon_days, dry_run=args.dry_run)
+    elif args.command == "maintain":
+        maintain_databases(full_vacuum=args.vacuum)
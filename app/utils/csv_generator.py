@@ -4,7 +4,10 @@ from datetime import date, datetime
 from typing import List, Optional
 from sqlalchemy.orm import Session
 from app.models import DailyBalance, DailyEmployeeEntry, Employee, User
+from app.utils.metrics import REPORT_GENERATION_SECONDS
+from app.utils.archive import include_archives
 
+@REPORT_GENERATION_SECONDS.timed(report_type="daily_balance")
 def generate_daily_balance_csv(daily_balance: DailyBalance, employee_entries: List[DailyEmployeeEntry], current_user: Optional[User] = None, source: str = "user") -> str:
     # Sort employees by display name
     employee_entries = sorted(employee_entries, key=lambda e: e.employee_display_name)
@@ -131,6 +134,8 @@ def generate_daily_balance_csv(daily_balance: DailyBalance, employee_entries: Li
 
     return filepath
 
+@REPORT_GENERATION_SECONDS.timed(report_type="tip_report")
+@include_archives
 def generate_tip_report_csv(db: Session, start_date: date, end_date: date, current_user: Optional[User] = None, source: str = "user") -> str:
     # Use the first month of the date range for directory structure
     year = str(start_date.year)
@@ -359,6 +364,8 @@ def generate_tip_report_csv(db: Session, start_date: date, end_date: date, curre
 
     return filename
 
+@REPORT_GENERATION_SECONDS.timed(report_type="consolidated_daily_balance")
+@include_archives
 def generate_consolidated_daily_balance_csv(db: Session, start_date: date, end_date: date, current_user: Optional[User] = None, source: str = "user") -> str:
     year = str(start_date.year)
     month = f"{start_date.month:02d}"
@@ -558,6 +565,8 @@ def generate_consolidated_daily_balance_csv(db: Session, start_date: date, end_d
 
     return filename
 
+@REPORT_GENERATION_SECONDS.timed(report_type="employee_tip_report")
+@include_archives
 def generate_employee_tip_report_csv(db: Session, employee: Employee, start_date: date, end_date: date, current_user: Optional[User] = None, source: str = "user") -> str:
     # Use the first month of the date range for directory structure
     year = str(start_date.year)
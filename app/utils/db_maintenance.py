@@ -0,0 +1,224 @@
+"""
+SQLite maintenance and connection tuning.
+
+run_maintenance() is registered as an internal scheduler job. When the app is
+idle (no requests in flight or in the last IDLE_SECONDS, no other scheduler
+job running) it runs `PRAGMA optimize`, a full ANALYZE once a day, and a
+`wal_checkpoint(TRUNCATE)` when the WAL has grown past WAL_TRUNCATE_BYTES.
+If the app is never idle for MAX_DEFERRAL_SECONDS it runs anyway.
+
+cache_size, mmap_size and temp_store are read from the settings table and
+applied to every connection by app.database (on connect, and again at
+checkout after they change).
+"""
+import logging
+import os
+import threading
+import time
+
+from app.database import DATABASE_PATH, set_connection_pragmas, write_engine
+from app.utils.metrics import DB_MAINTENANCE_SECONDS, HTTP_REQUESTS_IN_PROGRESS, count_running_jobs
+
+MAINTENANCE_JOB_ID = "db_maintenance"
+MAINTENANCE_INTERVAL_MINUTES = 15
+IDLE_SECONDS = 60
+MAX_DEFERRAL_SECONDS = 6 * 3600
+ANALYZE_INTERVAL_SECONDS = 24 * 3600
+WAL_TRUNCATE_BYTES = 16 * 1024 * 1024
+
+TEMP_STORE_VALUES = {"default": "DEFAULT", "file": "FILE", "memory": "MEMORY"}
+
+# (setting key, default value, description)
+PRAGMA_SETTINGS = [
+    ("sqlite_cache_size_kb", "16384", "SQLite page cache per connection, in KB"),
+    ("sqlite_mmap_size_mb", "0", "SQLite memory-mapped I/O size in MB (0 disables)"),
+    ("sqlite_temp_store", "memory", "Where SQLite keeps temporary tables and indexes: default, file or memory"),
+]
+
+logger = logging.getLogger(__name__)
+
+_last_activity = time.monotonic()
+_last_run = time.monotonic()
+_last_analyze = None
+_last_result = None
+_run_lock = threading.Lock()
+
+
+def pragmas_from_settings(values):
+    """
+    Convert setting values to connection pragmas.
+
+    Args:
+        values: Dict of setting key -> string value (missing keys use defaults)
+
+    Returns:
+        Dict of pragma name -> value, e.g. {"cache_size": -16384, ...}
+    """
+    defaults = {key: default for key, default, _ in PRAGMA_SETTINGS}
+    merged = {**defaults, **{k: v for k, v in values.items() if v not in (None, "")}}
+
+    try:
+        cache_kb = int(merged["sqlite_cache_size_kb"])
+    except ValueError:
+        cache_kb = int(defaults["sqlite_cache_size_kb"])
+    try:
+        mmap_mb = int(merged["sqlite_mmap_size_mb"])
+    except ValueError:
+        mmap_mb = int(defaults["sqlite_mmap_size_mb"])
+    temp_store = TEMP_STORE_VALUES.get(str(merged["sqlite_temp_store"]).lower(), "DEFAULT")
+
+    return {
+        # Negative cache_size is in KiB rather than pages
+        "cache_size": -max(cache_kb, 64),
+        "mmap_size": max(mmap_mb, 0) * 1024 * 1024,
+        "temp_store": temp_store,
+    }
+
+
+def apply_connection_pragmas(pragmas):
+    """
+    Use these pragmas from now on. Pooled connections re-apply them at their
+    next checkout; the pools are not disposed, since that would let a second
+    writer connection exist alongside one still checked out.
+    """
+    set_connection_pragmas(pragmas)
+
+
+def load_connection_pragmas(db):
+    """Load cache_size / mmap_size / temp_store from settings and apply them."""
+    from app.models import Setting
+
+    keys = [key for key, _, _ in PRAGMA_SETTINGS]
+    values = {
+        row.key: row.value
+        for row in db.query(Setting).filter(Setting.key.in_(keys)).all()
+    }
+    pragmas = pragmas_from_settings(values)
+    apply_connection_pragmas(pragmas)
+    return pragmas
+
+
+def note_request_activity():
+    """Called by the request middleware; maintenance waits for a quiet period."""
+    global _last_activity
+    _last_activity = time.monotonic()
+
+
+def is_idle():
+    from app.scheduler import scheduler
+
+    if HTTP_REQUESTS_IN_PROGRESS.value() > 0:
+        return False
+    if time.monotonic() - _last_activity < IDLE_SECONDS:
+        return False
+    # The maintenance job itself counts as one running job
+    if scheduler.running and count_running_jobs(scheduler) > 1:
+        return False
+    return True
+
+
+def _wal_size():
+    try:
+        return os.path.getsize(f"{DATABASE_PATH}-wal")
+    except OSError:
+        return 0
+
+
+def checkpoint_wal(mode="TRUNCATE"):
+    """
+    Checkpoint the WAL on the writer connection.
+
+    Runs on the raw connection because a checkpoint cannot run inside the
+    BEGIN IMMEDIATE transaction the writer engine opens for every statement.
+
+    Returns:
+        (busy, log_frames, checkpointed_frames)
+    """
+    raw = write_engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        row = cursor.execute(f"PRAGMA wal_checkpoint({mode})").fetchone()
+        cursor.close()
+        return tuple(row)
+    finally:
+        raw.close()
+
+
+def run_maintenance(force=False):
+    """
+    Run PRAGMA optimize, periodic ANALYZE and WAL checkpointing.
+
+    Args:
+        force: Run even if the app is busy, and always ANALYZE and checkpoint
+
+    Returns:
+        Dict of step -> milliseconds (plus WAL sizes), or None if skipped
+    """
+    global _last_run, _last_analyze, _last_result
+
+    now = time.monotonic()
+    if not force and not is_idle() and now - _last_run < MAX_DEFERRAL_SECONDS:
+        logger.debug("Database maintenance deferred: app is busy")
+        return None
+
+    if not _run_lock.acquire(blocking=False):
+        return None
+
+    try:
+        result = {"wal_bytes_before": _wal_size()}
+
+        with write_engine.connect() as conn:
+            started = time.perf_counter()
+            conn.exec_driver_sql("PRAGMA optimize")
+            result["optimize_ms"] = round((time.perf_counter() - started) * 1000, 2)
+            DB_MAINTENANCE_SECONDS.observe(time.perf_counter() - started, step="optimize")
+
+            if force or _last_analyze is None or now - _last_analyze >= ANALYZE_INTERVAL_SECONDS:
+                started = time.perf_counter()
+                conn.exec_driver_sql("ANALYZE")
+                result["analyze_ms"] = round((time.perf_counter() - started) * 1000, 2)
+                DB_MAINTENANCE_SECONDS.observe(time.perf_counter() - started, step="analyze")
+                _last_analyze = now
+
+            conn.commit()
+
+        if force or result["wal_bytes_before"] >= WAL_TRUNCATE_BYTES:
+            started = time.perf_counter()
+            busy, log_frames, checkpointed = checkpoint_wal()
+            result["checkpoint_ms"] = round((time.perf_counter() - started) * 1000, 2)
+            result["checkpoint_busy"] = bool(busy)
+            DB_MAINTENANCE_SECONDS.observe(time.perf_counter() - started, step="wal_checkpoint")
+            if busy:
+                logger.warning(
+                    "WAL checkpoint could not complete (readers active): %s of %s frames checkpointed",
+                    checkpointed, log_frames
+                )
+
+        result["wal_bytes_after"] = _wal_size()
+        _last_run = time.monotonic()
+        _last_result = result
+        logger.info("Database maintenance complete: %s", result)
+        return result
+    finally:
+        _run_lock.release()
+
+
+def get_last_maintenance():
+    """Result of the most recent maintenance run (None if it has not run yet)."""
+    return _last_result
+
+
+def schedule_maintenance_job():
+    """Register the periodic maintenance job in the scheduler's in-memory job store."""
+    from app.scheduler import scheduler
+
+    scheduler.add_job(
+        run_maintenance,
+        trigger="interval",
+        minutes=MAINTENANCE_INTERVAL_MINUTES,
+        id=MAINTENANCE_JOB_ID,
+        name="Database maintenance",
+        jobstore="internal",
+        replace_existing=True
+    )
+    print(f"✓ Database maintenance scheduled every {MAINTENANCE_INTERVAL_MINUTES} minutes")
@@ -0,0 +1,127 @@
+"""
+Retention for scheduled task execution history.
+
+prune_task_executions() trims task_executions for every task in a single
+DELETE: a ROW_NUMBER() window over (task_id, started_at DESC) ranks each
+task's executions, and rows past the retention count or older than the
+retention age are removed. Executions that are still running are never
+deleted. The scan walks idx_task_executions_task_id_started, so rows come
+out already grouped by task and ordered by start time; the index is not
+covering, so each row's status is still read from the table.
+
+It runs as an internal scheduler job every RETENTION_INTERVAL_MINUTES, in
+place of a cleanup transaction after each task run.
+"""
+import logging
+import time
+
+from sqlalchemy import text
+
+from app.database import write_engine
+
+RETENTION_JOB_ID = "execution_retention"
+RETENTION_INTERVAL_MINUTES = 60
+
+# (setting key, default value, description)
+RETENTION_SETTINGS = [
+    ("execution_retention_count", "7", "Task executions to keep per scheduled task"),
+    ("execution_retention_days", "0", "Delete task executions older than this many days (0 disables)"),
+]
+
+PRUNE_QUERY = """
+    DELETE FROM task_executions
+    WHERE id IN (
+        SELECT id FROM (
+            SELECT id, status, started_at,
+                   ROW_NUMBER() OVER (PARTITION BY task_id ORDER BY started_at DESC, id DESC) AS position
+            FROM task_executions
+        )
+        WHERE status != 'running'
+          AND (position > :keep_count OR (:max_age_days > 0 AND started_at < datetime('now', :age_modifier)))
+    )
+"""
+
+logger = logging.getLogger(__name__)
+
+
+def retention_from_settings(values):
+    """
+    Convert setting values to (keep_count, max_age_days).
+
+    Args:
+        values: Dict of setting key -> string value (missing keys use defaults)
+    """
+    defaults = {key: default for key, default, _ in RETENTION_SETTINGS}
+    merged = {**defaults, **{k: v for k, v in values.items() if v not in (None, "")}}
+
+    try:
+        keep_count = int(merged["execution_retention_count"])
+    except ValueError:
+        keep_count = int(defaults["execution_retention_count"])
+    try:
+        max_age_days = int(merged["execution_retention_days"])
+    except ValueError:
+        max_age_days = int(defaults["execution_retention_days"])
+
+    return max(keep_count, 1), max(max_age_days, 0)
+
+
+def load_retention_settings(conn):
+    rows = conn.execute(text("SELECT key, value FROM settings WHERE key LIKE 'execution_retention_%'"))
+    return retention_from_settings({row[0]: row[1] for row in rows})
+
+
+def prune_task_executions(keep_count=None, max_age_days=None):
+    """
+    Delete old task executions for all tasks in one statement.
+
+    Args:
+        keep_count: Executions to keep per task (default: from settings)
+        max_age_days: Also delete executions older than this; 0 disables (default: from settings)
+
+    Returns:
+        Number of executions deleted
+    """
+    started = time.perf_counter()
+    with write_engine.begin() as conn:
+        if keep_count is None or max_age_days is None:
+            setting_count, setting_days = load_retention_settings(conn)
+            keep_count = setting_count if keep_count is None else keep_count
+            max_age_days = setting_days if max_age_days is None else max_age_days
+
+        result = conn.execute(text(PRUNE_QUERY), {
+            "keep_count": keep_count,
+            "max_age_days": max_age_days,
+            "age_modifier": f"-{max_age_days} days",
+        })
+        deleted = result.rowcount
+
+    if deleted:
+        logger.info(
+            "Pruned %s task execution(s) (keep %s per task, max age %s days) in %.1f ms",
+            deleted, keep_count, max_age_days or "unlimited", (time.perf_counter() - started) * 1000
+        )
+    return deleted
+
+
+def run_retention_sweep():
+    try:
+        prune_task_executions()
+    except Exception:
+        logger.exception("Task execution retention sweep failed")
+
+
+def schedule_retention_job():
+    """Register the periodic retention sweep in the scheduler's in-memory job store."""
+    from app.scheduler import scheduler
+
+    scheduler.add_job(
+        run_retention_sweep,
+        trigger="interval",
+        minutes=RETENTION_INTERVAL_MINUTES,
+        id=RETENTION_JOB_ID,
+        name="Task execution retention",
+        jobstore="internal",
+        replace_existing=True
+    )
+    print(f"✓ Task execution retention sweep scheduled every {RETENTION_INTERVAL_MINUTES} minutes")
@@ -0,0 +1,261 @@
+"""
+Bulk export of the daily ledger to a typed columnar file.
+
+Every finalized day (archived years included) is flattened into one row per
+ledger entry - revenue/expense line items, employee tip values, checks and
+EFTs - with typed columns (dates as dates, amounts as floats, ids as
+integers) instead of the formatted strings in the CSV reports.
+
+The output is Parquet when pyarrow is installed and JSON Lines otherwise.
+Days are read in batches of DAY_BATCH_SIZE and rows are written in blocks of
+WRITE_BATCH_ROWS, so memory use stays flat no matter how many years are
+exported.
+
+Command line:
+
+    python -m app.utils.ledger_export [--start-date YYYY-MM-DD] [--end-date YYYY-MM-DD]
+                                      [--format auto|parquet|jsonl] [--output PATH]
+                                      [--include-unfinalized]
+"""
+import json
+import logging
+import os
+import time
+from datetime import date, datetime
+
+from sqlalchemy import text
+
+from app.utils.archive import archive_scope
+
+EXPORT_DIR = os.path.join("data", "exports")
+DAY_BATCH_SIZE = 200
+WRITE_BATCH_ROWS = 50000
+
+# (column, type) - types are "date", "string", "int", "float" or "bool"
+LEDGER_COLUMNS = [
+    ("date", "date"),
+    ("day_of_week", "string"),
+    ("finalized", "bool"),
+    ("record_type", "string"),
+    ("category", "string"),
+    ("item_key", "string"),
+    ("item_name", "string"),
+    ("employee_id", "int"),
+    ("employee_name", "string"),
+    ("position_id", "int"),
+    ("position_name", "string"),
+    ("amount", "float"),
+    ("reference", "string"),
+    ("memo", "string"),
+    ("daily_balance_id", "int"),
+]
+
+LEDGER_QUERY = """
+    SELECT d.date, d.day_of_week, d.finalized, 'line_item', li.category,
+           COALESCE(CAST(li.template_id AS TEXT), li.name), li.name,
+           li.employee_id, li.employee_name_snapshot, NULL, NULL,
+           li.value, NULL, NULL, d.id
+    FROM daily_financial_line_items li
+    JOIN daily_balance d ON d.id = li.daily_balance_id
+    WHERE d.id IN ({ids})
+    UNION ALL
+    SELECT d.date, d.day_of_week, d.finalized, 'tip', 'tip',
+           j.key, COALESCE(r.name, j.key),
+           e.employee_id, e.employee_name_snapshot, e.position_id, e.position_name_snapshot,
+           CAST(j.value AS REAL), NULL, NULL, d.id
+    FROM daily_employee_entries e
+    JOIN daily_balance d ON d.id = e.daily_balance_id
+    JOIN json_each(e.tip_values) j
+    LEFT JOIN tip_entry_requirements r ON r.field_name = j.key
+    WHERE d.id IN ({ids}) AND j.type IN ('integer', 'real')
+    UNION ALL
+    SELECT d.date, d.day_of_week, d.finalized, 'check', 'expense',
+           NULL, c.payable_to, NULL, NULL, NULL, NULL,
+           c.total, c.check_number, c.memo, d.id
+    FROM daily_balance_checks c
+    JOIN daily_balance d ON d.id = c.daily_balance_id
+    WHERE d.id IN ({ids})
+    UNION ALL
+    SELECT d.date, d.day_of_week, d.finalized, 'eft', 'expense',
+           NULL, t.payable_to, NULL, NULL, NULL, NULL,
+           t.total, t.card_number, t.memo, d.id
+    FROM daily_balance_efts t
+    JOIN daily_balance d ON d.id = t.daily_balance_id
+    WHERE d.id IN ({ids})
+    ORDER BY 1, 4, 5
+"""
+
+logger = logging.getLogger(__name__)
+
+
+def parquet_available():
+    try:
+        import pyarrow  # noqa: F401
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def resolve_format(fmt="auto"):
+    """Return "parquet" or "jsonl" for a requested format."""
+    if fmt == "auto":
+        return "parquet" if parquet_available() else "jsonl"
+    if fmt == "parquet" and not parquet_available():
+        raise ValueError("Parquet export requires pyarrow (pip install pyarrow)")
+    if fmt not in ("parquet", "jsonl"):
+        raise ValueError(f"Unknown export format: {fmt}")
+    return fmt
+
+
+class ParquetLedgerWriter:
+    def __init__(self, path):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        types = {"date": pa.date32(), "string": pa.string(), "int": pa.int64(), "float": pa.float64(), "bool": pa.bool_()}
+        self.pa = pa
+        self.schema = pa.schema([(name, types[kind]) for name, kind in LEDGER_COLUMNS])
+        self.writer = pq.ParquetWriter(path, self.schema, compression="zstd")
+
+    def write(self, rows):
+        columns = list(zip(*rows))
+        arrays = []
+        for (name, kind), values in zip(LEDGER_COLUMNS, columns):
+            if kind == "date":
+                values = [date.fromisoformat(str(value)[:10]) for value in values]
+            elif kind == "bool":
+                values = [bool(value) for value in values]
+            arrays.append(self.pa.array(values, type=self.schema.field(name).type))
+        self.writer.write_batch(self.pa.record_batch(arrays, schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+
+class JsonlLedgerWriter:
+    def __init__(self, path):
+        self.names = [name for name, _ in LEDGER_COLUMNS]
+        self.file = open(path, "w", encoding="utf-8")
+
+    def write(self, rows):
+        lines = []
+        for row in rows:
+            record = dict(zip(self.names, row))
+            record["date"] = str(record["date"])[:10]
+            record["finalized"] = bool(record["finalized"])
+            lines.append(json.dumps(record, separators=(",", ":")))
+        self.file.write("\n".join(lines) + "\n")
+
+    def close(self):
+        self.file.close()
+
+
+def default_export_path(fmt, start_date=None, end_date=None):
+    start = start_date.isoformat() if start_date else "start"
+    end = end_date.isoformat() if end_date else "end"
+    extension = "parquet" if fmt == "parquet" else "jsonl"
+    return os.path.join(EXPORT_DIR, f"ledger_{start}_{end}_{datetime.now():%Y%m%d%H%M%S}.{extension}")
+
+
+def export_ledger(db, output_path=None, start_date=None, end_date=None, fmt="auto", include_unfinalized=False):
+    """
+    Write the ledger for a date range to Parquet or JSON Lines.
+
+    Args:
+        db: Session used to find days (and the archive manifest)
+        output_path: Destination file (default: data/exports/ledger_<range>_<timestamp>.<ext>)
+        start_date / end_date: Optional inclusive date bounds
+        fmt: "auto", "parquet" or "jsonl"
+        include_unfinalized: Also export days that have not been finalized
+
+    Returns:
+        Dict with path, format, days, rows, bytes and seconds
+    """
+    started = time.perf_counter()
+    fmt = resolve_format(fmt)
+    output_path = output_path or default_export_path(fmt, start_date, end_date)
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+
+    conditions = []
+    params = {}
+    if not include_unfinalized:
+        conditions.append("finalized = 1")
+    if start_date:
+        conditions.append("date >= :start_date")
+        params["start_date"] = start_date.isoformat()
+    if end_date:
+        conditions.append("date <= :end_date")
+        params["end_date"] = end_date.isoformat()
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    writer = ParquetLedgerWriter(output_path) if fmt == "parquet" else JsonlLedgerWriter(output_path)
+    day_count = 0
+    row_count = 0
+    try:
+        with archive_scope(db, start_date or date.min, end_date or date.max) as scoped:
+            day_ids = [row[0] for row in scoped.execute(
+                text(f"SELECT id FROM daily_balance {where} ORDER BY date"), params
+            )]
+            day_count = len(day_ids)
+
+            pending = []
+            for offset in range(0, len(day_ids), DAY_BATCH_SIZE):
+                batch = day_ids[offset:offset + DAY_BATCH_SIZE]
+                ids = ", ".join(str(int(day_id)) for day_id in batch)
+                result = scoped.execute(text(LEDGER_QUERY.format(ids=ids)))
+                while True:
+                    rows = result.fetchmany(WRITE_BATCH_ROWS)
+                    if not rows:
+                        break
+                    pending.extend(rows)
+                    if len(pending) >= WRITE_BATCH_ROWS:
+                        writer.write(pending)
+                        row_count += len(pending)
+                        pending = []
+            if pending:
+                writer.write(pending)
+                row_count += len(pending)
+    except Exception:
+        writer.close()
+        if os.path.exists(output_path):
+            os.remove(output_path)
+        raise
+    writer.close()
+
+    stats = {
+        "path": output_path,
+        "format": fmt,
+        "days": day_count,
+        "rows": row_count,
+        "bytes": os.path.getsize(output_path),
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+    logger.info("Ledger export complete: %s", stats)
+    return stats
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from app.database import ReportSessionLocal
+
+    parser = argparse.ArgumentParser(description="Export the daily ledger to Parquet or JSON Lines")
+    parser.add_argument("--start-date", type=date.fromisoformat, help="First date (inclusive)")
+    parser.add_argument("--end-date", type=date.fromisoformat, help="Last date (inclusive)")
+    parser.add_argument("--format", default="auto", choices=["auto", "parquet", "jsonl"])
+    parser.add_argument("--output", help="Output file (default: data/exports/...)")
+    parser.add_argument("--include-unfinalized", action="store_true", help="Also export days that are not finalized")
+    args = parser.parse_args()
+
+    db = ReportSessionLocal()
+    try:
+        stats = export_ledger(
+            db, output_path=args.output, start_date=args.start_date, end_date=args.end_date,
+            fmt=args.format, include_unfinalized=args.include_unfinalized
+        )
+    finally:
+        db.close()
+
+    print(f"✓ Exported {stats['rows']} rows for {stats['days']} day(s) to {stats['path']} "
+          f"({stats['format']}, {stats['bytes'] / (1024 * 1024):.1f} MB) in {stats['seconds']}s")
@@ -0,0 +1,470 @@
+"""
+Bulk import of historical daily balances.
+
+Reads the ledger format written by app.utils.ledger_export (CSV or JSON Lines,
+one row per entry, see LEDGER_COLUMNS) so a location's history can be loaded
+without going through the daily balance form one day at a time:
+
+- line_item rows: category + item_key (template id) or item_name (template
+  name) and amount. Employee tip line items are not imported; they are
+  derived from the tip rows, as the form does.
+- tip rows: employee, position, item_key (tip field_name) and amount. Total
+  fields are recomputed from the other fields.
+- check / eft rows: item_name (payable to), amount, reference (check or card
+  number) and memo.
+
+Rows for a day must be contiguous (the export is sorted by date). The file is
+read twice, streaming both times: a validation pass against the current
+templates, employees, positions and tip requirements, then - only if there
+were no errors - an import pass that inserts BATCH_DAYS days per transaction
+with executemany. Derived data (analytics cache, planner statistics) is
+rebuilt once at the end rather than per day. Daily CSV report files are not
+generated for imported days.
+
+Command line:
+
+    python -m app.utils.ledger_import FILE [--replace] [--dry-run] [--not-finalized]
+"""
+import csv
+import json
+import logging
+import os
+import time
+from datetime import date, datetime
+
+from sqlalchemy import text
+
+from app.database import SessionLocal, write_engine
+from app.utils.archive import archive_scope
+
+IMPORT_DIR = os.path.join("data", "imports")
+BATCH_DAYS = 250
+MAX_REPORTED_ERRORS = 50
+
+DAYS_OF_WEEK = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+logger = logging.getLogger(__name__)
+
+_last_import = None
+
+
+class LedgerImportError(ValueError):
+    """Raised when an import file cannot be read at all (unknown format, missing columns)."""
+
+
+def read_ledger_rows(path):
+    """Yield (line_number, row dict) from a ledger CSV or JSON Lines file."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".csv":
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            reader = csv.DictReader(f)
+            missing = {"date", "record_type", "amount"} - set(reader.fieldnames or [])
+            if missing:
+                raise LedgerImportError(f"CSV is missing required column(s): {', '.join(sorted(missing))}")
+            for line_number, row in enumerate(reader, start=2):
+                yield line_number, {key: (value if value != "" else None) for key, value in row.items()}
+    elif extension in (".jsonl", ".ndjson"):
+        with open(path, encoding="utf-8") as f:
+            for line_number, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    yield line_number, json.loads(line)
+                except json.JSONDecodeError as e:
+                    raise LedgerImportError(f"Line {line_number}: invalid JSON ({e})")
+    else:
+        raise LedgerImportError(f"Unsupported import file type '{extension}' (use .csv or .jsonl)")
+
+
+def group_days(rows):
+    """Group consecutive rows by date. Yields (date string, [(line_number, row)])."""
+    seen = set()
+    current, group = None, []
+    for line_number, row in rows:
+        day = str(row.get("date") or "")[:10]
+        if day != current:
+            if group:
+                yield current, group
+            if day in seen:
+                raise LedgerImportError(f"Line {line_number}: rows for {day} are not contiguous (sort the file by date)")
+            seen.add(day)
+            current, group = day, []
+        group.append((line_number, row))
+    if group:
+        yield current, group
+
+
+class ReferenceData:
+    """Templates, employees, positions and tip requirements, loaded once per import."""
+
+    def __init__(self, db):
+        self.templates = {}
+        self.templates_by_name = {}
+        for row in db.execute(text(
+            "SELECT id, name, category, display_order FROM financial_line_item_templates ORDER BY display_order"
+        )):
+            template = {"id": row[0], "name": row[1], "category": row[2], "display_order": row[3]}
+            self.templates[str(row[0])] = template
+            self.templates_by_name[(row[2], row[1].strip().lower())] = template
+
+        self.employees = {}
+        self.employees_by_name = {}
+        for row in db.execute(text("SELECT id, name, first_name, last_name FROM employees")):
+            employee_id, name, first_name, last_name = row
+            # Same as Employee.display_name
+            if first_name and last_name:
+                display_name = f"{last_name}, {first_name}"
+            else:
+                display_name = last_name or first_name or name
+            self.employees[str(employee_id)] = {"id": employee_id, "name": display_name}
+            for alias in {name, display_name}:
+                if alias:
+                    self.employees_by_name.setdefault(alias.strip().lower(), self.employees[str(employee_id)])
+
+        self.positions = {}
+        self.positions_by_name = {}
+        for row in db.execute(text("SELECT id, name FROM positions")):
+            self.positions[str(row[0])] = {"id": row[0], "name": row[1], "requirements": []}
+            self.positions_by_name[row[1].strip().lower()] = self.positions[str(row[0])]
+
+        for row in db.execute(text("""
+            SELECT ptr.position_id, r.field_name, r.name, r.is_total, r.is_deduction, r.no_input, r.record_data,
+                   r.apply_to_revenue, r.revenue_is_deduction, r.apply_to_expense, r.expense_is_deduction
+            FROM position_tip_requirements ptr
+            JOIN tip_entry_requirements r ON r.id = ptr.tip_requirement_id
+            ORDER BY r.display_order
+        """)):
+            position = self.positions.get(str(row[0]))
+            if position:
+                position["requirements"].append({
+                    "field_name": row[1], "name": row[2], "is_total": bool(row[3]), "is_deduction": bool(row[4]),
+                    "no_input": bool(row[5]), "record_data": bool(row[6]), "apply_to_revenue": bool(row[7]),
+                    "revenue_is_deduction": bool(row[8]), "apply_to_expense": bool(row[9]),
+                    "expense_is_deduction": bool(row[10]),
+                })
+
+    def find(self, by_id, by_name, key, name):
+        if key not in (None, ""):
+            found = by_id.get(str(key).split(".")[0])
+            if found:
+                return found
+        if name:
+            return by_name.get(str(name).strip().lower())
+        return None
+
+
+def _amount(value):
+    if value is None or value == "":
+        raise ValueError("amount is blank")
+    return round(float(value), 2)
+
+
+def build_day(day, rows, ref, finalized=True):
+    """
+    Validate one day's rows and turn them into table rows.
+
+    Returns:
+        (day dict, errors, warnings) - errors are "line N: message" strings
+    """
+    errors, warnings = [], []
+    try:
+        day_date = date.fromisoformat(day)
+    except ValueError:
+        return None, [f"line {rows[0][0]}: invalid date '{day}'"], warnings
+
+    values = {}
+    entries = {}
+    checks, efts = [], []
+
+    for line_number, row in rows:
+        record_type = row.get("record_type")
+        try:
+            amount = _amount(row.get("amount"))
+        except (TypeError, ValueError):
+            errors.append(f"line {line_number}: amount '{row.get('amount')}' is not a number")
+            continue
+
+        if record_type == "line_item":
+            category = row.get("category")
+            if category not in ("revenue", "expense"):
+                errors.append(f"line {line_number}: line item category must be revenue or expense")
+                continue
+            template = ref.find(ref.templates, {}, row.get("item_key"), None) or \
+                ref.templates_by_name.get((category, str(row.get("item_name") or "").strip().lower()))
+            if template is None:
+                if row.get("employee_id") or row.get("employee_name"):
+                    continue  # Employee tip line item - rebuilt from the tip rows
+                errors.append(f"line {line_number}: unknown {category} item '{row.get('item_name') or row.get('item_key')}'")
+            elif template["category"] != category:
+                errors.append(f"line {line_number}: '{template['name']}' is a {template['category']} item, not {category}")
+            else:
+                values[template["id"]] = amount
+
+        elif record_type == "tip":
+            employee = ref.find(ref.employees, ref.employees_by_name, row.get("employee_id"), row.get("employee_name"))
+            position = ref.find(ref.positions, ref.positions_by_name, row.get("position_id"), row.get("position_name"))
+            if employee is None:
+                errors.append(f"line {line_number}: unknown employee '{row.get('employee_name') or row.get('employee_id')}'")
+                continue
+            if position is None:
+                errors.append(f"line {line_number}: unknown position '{row.get('position_name') or row.get('position_id')}'")
+                continue
+            field = row.get("item_key")
+            requirement = next((req for req in position["requirements"] if req["field_name"] == field), None)
+            if requirement is None:
+                errors.append(f"line {line_number}: '{field}' is not a tip field for {position['name']}")
+                continue
+            entry = entries.setdefault((employee["id"], position["id"]), {"employee": employee, "position": position, "values": {}})
+            if not requirement["is_total"] and not requirement["no_input"]:
+                entry["values"][field] = amount
+
+        elif record_type in ("check", "eft"):
+            payable_to = (row.get("item_name") or "").strip()
+            if not payable_to:
+                errors.append(f"line {line_number}: {record_type} is missing item_name (payable to)")
+                continue
+            target = checks if record_type == "check" else efts
+            target.append((row.get("reference") or None, payable_to, amount, row.get("memo") or None))
+
+        else:
+            errors.append(f"line {line_number}: unknown record_type '{record_type}'")
+
+    missing = [template["name"] for template in ref.templates.values() if template["id"] not in values]
+    if missing and not errors:
+        warnings.append(f"{day}: {len(missing)} financial item(s) missing, imported as 0")
+
+    line_items = [
+        (template["id"], template["name"], template["category"], values.get(template["id"], 0.0), template["display_order"], 0, None, None, None, None)
+        for template in ref.templates.values()
+    ]
+    employee_entries = []
+    max_order = len(ref.templates)
+    for entry in entries.values():
+        employee, position, tip_values = entry["employee"], entry["position"], dict(entry["values"])
+        for req in position["requirements"]:
+            if req["no_input"] or req["is_total"]:
+                continue
+            value = tip_values.setdefault(req["field_name"], 0.0)
+            for category, applies, is_deduction in (
+                ("revenue", req["apply_to_revenue"], req["revenue_is_deduction"]),
+                ("expense", req["apply_to_expense"], req["expense_is_deduction"]),
+            ):
+                if applies and value != 0:
+                    max_order += 1
+                    line_items.append((
+                        None, f"{employee['name']} ({position['name']}) - {req['name']}", category,
+                        -value if is_deduction else value, max_order, 1, employee["id"], employee["name"],
+                        position["id"], req["field_name"]
+                    ))
+        for req in position["requirements"]:
+            if req["is_total"]:
+                total = sum(
+                    -tip_values.get(other["field_name"], 0.0) if other["is_deduction"] else tip_values.get(other["field_name"], 0.0)
+                    for other in position["requirements"]
+                    if not other["no_input"] and not other["is_total"] and not other["record_data"]
+                )
+                tip_values[req["field_name"]] = round(total, 2)
+        employee_entries.append((employee["id"], position["id"], json.dumps(tip_values), employee["name"], position["name"]))
+
+    return {
+        "date": day,
+        "day_of_week": DAYS_OF_WEEK[day_date.weekday()],
+        "finalized": 1 if finalized else 0,
+        "line_items": line_items,
+        "entries": employee_entries,
+        "checks": checks,
+        "efts": efts,
+    }, errors, warnings
+
+
+def _write_batch(conn, days, replace):
+    """Insert a batch of built days in the current transaction."""
+    dates = [day["date"] for day in days]
+    if replace:
+        placeholders = ", ".join("?" for _ in dates)
+        existing = [row[0] for row in conn.exec_driver_sql(
+            f"SELECT id FROM daily_balance WHERE date IN ({placeholders})", tuple(dates)
+        )]
+        if existing:
+            ids = ", ".join(str(day_id) for day_id in existing)
+            for table in ("daily_employee_entries", "daily_financial_line_items", "daily_balance_checks", "daily_balance_efts"):
+                conn.exec_driver_sql(f"DELETE FROM {table} WHERE daily_balance_id IN ({ids})")
+            conn.exec_driver_sql(f"DELETE FROM daily_balance WHERE id IN ({ids})")
+
+    # The writer transaction holds the write lock, so ids can be assigned up
+    # front. sqlite_sequence also covers ids that now live in an archive.
+    next_id = conn.exec_driver_sql("""
+        SELECT MAX(
+            COALESCE((SELECT MAX(id) FROM daily_balance), 0),
+            COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'daily_balance'), 0)
+        ) + 1
+    """).scalar()
+    now = datetime.now().isoformat(sep=" ")
+
+    balances, line_items, entries, checks, efts = [], [], [], [], []
+    for offset, day in enumerate(days):
+        day_id = next_id + offset
+        balances.append((day_id, day["date"], day["day_of_week"], day["finalized"], now if day["finalized"] else None))
+        line_items.extend((day_id, *item) for item in day["line_items"])
+        entries.extend((day_id, *entry) for entry in day["entries"])
+        checks.extend((day_id, number, day["date"], payable_to, total, memo) for number, payable_to, total, memo in day["checks"])
+        efts.extend((day_id, day["date"], number, payable_to, total, memo) for number, payable_to, total, memo in day["efts"])
+
+    conn.exec_driver_sql(
+        "INSERT INTO daily_balance (id, date, day_of_week, finalized, finalized_at, created_by_source) "
+        "VALUES (?, ?, ?, ?, ?, 'import')", balances
+    )
+    if line_items:
+        conn.exec_driver_sql(
+            "INSERT INTO daily_financial_line_items (daily_balance_id, template_id, name, category, value, "
+            "display_order, is_employee_tip, employee_id, employee_name_snapshot, position_id, tip_field_name) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            line_items
+        )
+    if entries:
+        conn.exec_driver_sql(
+            "INSERT INTO daily_employee_entries (daily_balance_id, employee_id, position_id, tip_values, "
+            "employee_name_snapshot, position_name_snapshot) VALUES (?, ?, ?, ?, ?, ?)",
+            entries
+        )
+    if checks:
+        conn.exec_driver_sql(
+            "INSERT INTO daily_balance_checks (daily_balance_id, check_number, date, payable_to, total, memo) "
+            "VALUES (?, ?, ?, ?, ?, ?)", checks
+        )
+    if efts:
+        conn.exec_driver_sql(
+            "INSERT INTO daily_balance_efts (daily_balance_id, date, card_number, payable_to, total, memo) "
+            "VALUES (?, ?, ?, ?, ?, ?)", efts
+        )
+    return len(balances) + len(line_items) + len(entries) + len(checks) + len(efts)
+
+
+def import_ledger(path, replace=False, dry_run=False, finalized=True, progress=None):
+    """
+    Validate and import a ledger file.
+
+    Args:
+        path: .csv or .jsonl file in the ledger export format
+        replace: Replace days that already exist (archived days are never replaced)
+        dry_run: Validate only
+        finalized: Mark imported days as finalized
+        progress: Optional callable(days_imported) called after each batch
+
+    Returns:
+        Dict with success, days, rows, seconds, days_per_sec, errors, warnings
+    """
+    global _last_import
+
+    started = time.perf_counter()
+    result = {"file": os.path.basename(path), "success": False, "days": 0, "rows": 0, "errors": [], "warnings": [], "dry_run": dry_run}
+
+    db = SessionLocal()
+    try:
+        ref = ReferenceData(db)
+        main_dates = {str(row[0]) for row in db.execute(text("SELECT date FROM daily_balance"))}
+        with archive_scope(db, date.min, date.max) as scoped:
+            archived_dates = {str(row[0]) for row in scoped.execute(text("SELECT date FROM daily_balance"))} - main_dates
+    finally:
+        db.close()
+
+    # Pass 1: validate everything before writing anything
+    error_count = 0
+    day_count = 0
+    try:
+        for day, rows in group_days(read_ledger_rows(path)):
+            day_count += 1
+            built, errors, warnings = build_day(day, rows, ref, finalized)
+            if day in archived_dates:
+                errors.append(f"{day}: date is archived and cannot be imported")
+            elif day in main_dates and not replace:
+                errors.append(f"{day}: date already exists (use replace to overwrite)")
+            error_count += len(errors)
+            result["errors"].extend(errors[:MAX_REPORTED_ERRORS - len(result["errors"])])
+            result["warnings"].extend(warnings[:MAX_REPORTED_ERRORS - len(result["warnings"])])
+    except LedgerImportError as e:
+        result["errors"].append(str(e))
+        error_count += 1
+
+    result["error_count"] = error_count
+    if error_count or dry_run:
+        result["success"] = not error_count
+        result["days"] = day_count
+        result["seconds"] = round(time.perf_counter() - started, 3)
+        _last_import = result
+        return result
+
+    # Pass 2: import in batched transactions. The writer connection is checked
+    # out per batch, so other requests can write in between batches.
+    def write(batch):
+        with write_engine.begin() as conn:
+            result["rows"] += _write_batch(conn, batch, replace)
+        result["days"] += len(batch)
+        if progress:
+            progress(result["days"])
+
+    batch = []
+    for day, rows in group_days(read_ledger_rows(path)):
+        batch.append(build_day(day, rows, ref, finalized)[0])
+        if len(batch) >= BATCH_DAYS:
+            write(batch)
+            batch = []
+    if batch:
+        write(batch)
+
+    import_seconds = time.perf_counter() - started
+    rebuild_after_import()
+
+    result["success"] = True
+    result["seconds"] = round(time.perf_counter() - started, 3)
+    result["days_per_sec"] = round(result["days"] / import_seconds, 1) if import_seconds else None
+    logger.info(
+        "Imported %s day(s), %s row(s) from %s in %.2fs (%.1f days/sec)",
+        result["days"], result["rows"], path, result["seconds"], result["days_per_sec"] or 0
+    )
+    _last_import = result
+    return result
+
+
+def rebuild_after_import():
+    """Refresh derived data once after a bulk import."""
+    from app.services.analytics import invalidate_analytics_cache
+    from app.utils.db_maintenance import run_maintenance
+
+    invalidate_analytics_cache()
+    # New rows change table statistics; refresh them and fold the WAL back in
+    run_maintenance(force=True)
+
+
+def get_last_import():
+    """Result of the most recent import in this process (None if none yet)."""
+    return _last_import
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Import historical daily balances from a ledger CSV or JSONL file")
+    parser.add_argument("file", help="Ledger file (.csv or .jsonl)")
+    parser.add_argument("--replace", action="store_true", help="Replace days that already exist")
+    parser.add_argument("--dry-run", action="store_true", help="Validate without importing")
+    parser.add_argument("--not-finalized", action="store_true", help="Import days as not finalized")
+    args = parser.parse_args()
+
+    result = import_ledger(
+        args.file, replace=args.replace, dry_run=args.dry_run, finalized=not args.not_finalized,
+        progress=lambda days: print(f"  {days} day(s) imported")
+    )
+
+    for warning in result["warnings"]:
+        print(f"⚠ {warning}")
+    for error in result["errors"]:
+        print(f"✗ {error}")
+    if result["success"] and not args.dry_run:
+        print(f"✓ Imported {result['days']} day(s), {result['rows']} row(s) in {result['seconds']}s "
+              f"({result['days_per_sec']} days/sec)")
+    elif result["success"]:
+        print(f"✓ {result['days']} day(s) validated, no errors")
+    else:
+        print(f"✗ {result['error_count']} error(s); nothing imported")
+        raise SystemExit(1)
@@ -0,0 +1,353 @@
+import json
+import logging
+import sqlite3
+import threading
+from datetime import datetime
+
+from app.utils.logging_config import LOG_DIR, list_log_files
+
+STRUCTURED_LOG_NAME = "error_log.jsonl"
+STRUCTURED_LOG_FILE = LOG_DIR / STRUCTURED_LOG_NAME
+INDEX_DB_PATH = LOG_DIR / "log_index.db"
+
+INDEX_POLL_SECONDS = 2.0
+INDEX_BATCH_SIZE = 500
+HEAD_SIGNATURE_BYTES = 128
+
+_indexer_thread = None
+_indexer_stop = threading.Event()
+_index_lock = threading.Lock()
+_fts_available = None
+
+
+class JSONLineFormatter(logging.Formatter):
+    """Format log records as one JSON object per line for the log indexer."""
+
+    def format(self, record):
+        entry = {
+            "ts": record.created,
+            "time": self.formatTime(record, '%Y-%m-%d %H:%M:%S'),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+def _connect():
+    conn = sqlite3.connect(str(INDEX_DB_PATH), timeout=30, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+def _init_index(conn):
+    """Create index tables, using FTS5 for message text when SQLite supports it."""
+    global _fts_available
+
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS log_entries (
+            id INTEGER PRIMARY KEY,
+            ts REAL NOT NULL,
+            time TEXT NOT NULL,
+            level TEXT NOT NULL,
+            logger TEXT NOT NULL,
+            message TEXT NOT NULL,
+            file_inode INTEGER NOT NULL
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_log_entries_ts ON log_entries (ts)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_log_entries_level_ts ON log_entries (level, ts)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_log_entries_inode ON log_entries (file_inode)")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS index_state (
+            file_inode INTEGER PRIMARY KEY,
+            file_offset INTEGER NOT NULL,
+            file_head BLOB
+        )
+    """)
+
+    if _fts_available is None:
+        try:
+            conn.execute("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS log_entries_fts USING fts5(
+                    message, logger, content='log_entries', content_rowid='id'
+                )
+            """)
+            _fts_available = True
+        except sqlite3.OperationalError:
+            # SQLite built without FTS5 - text search falls back to LIKE
+            _fts_available = False
+
+    conn.commit()
+
+
+def _insert_entries(conn, rows):
+    cursor = conn.executemany(
+        "INSERT INTO log_entries (ts, time, level, logger, message, file_inode) VALUES (?, ?, ?, ?, ?, ?)",
+        rows
+    )
+    if _fts_available and rows:
+        # Rows were appended in one statement, so their ids are contiguous
+        last_id = conn.execute("SELECT MAX(id) FROM log_entries").fetchone()[0]
+        first_id = last_id - len(rows) + 1
+        conn.execute(
+            "INSERT INTO log_entries_fts (rowid, message, logger) "
+            "SELECT id, message, logger FROM log_entries WHERE id >= ?",
+            (first_id,)
+        )
+    return cursor
+
+
+def _delete_inode(conn, inode):
+    if _fts_available:
+        conn.execute(
+            "INSERT INTO log_entries_fts (log_entries_fts, rowid, message, logger) "
+            "SELECT 'delete', id, message, logger FROM log_entries WHERE file_inode = ?",
+            (inode,)
+        )
+    conn.execute("DELETE FROM log_entries WHERE file_inode = ?", (inode,))
+    conn.execute("DELETE FROM index_state WHERE file_inode = ?", (inode,))
+
+
+def _parse_line(raw_line, inode):
+    try:
+        entry = json.loads(raw_line)
+    except ValueError:
+        return None
+    message = entry.get("message", "")
+    if entry.get("exc"):
+        message = f"{message}\n{entry['exc']}"
+    return (
+        float(entry.get("ts", 0)),
+        entry.get("time", ""),
+        entry.get("level", ""),
+        entry.get("logger", ""),
+        message,
+        inode
+    )
+
+
+def index_new_entries():
+    """
+    Index any structured log lines written since the last pass.
+
+    Files are tracked by inode so rotation (rename) does not cause re-indexing;
+    entries for files removed by rotation are dropped from the index.
+
+    Returns:
+        Number of entries added
+    """
+    if not LOG_DIR.exists():
+        return 0
+
+    added = 0
+    with _index_lock:
+        conn = _connect()
+        try:
+            _init_index(conn)
+            state = {
+                row[0]: (row[1], row[2])
+                for row in conn.execute("SELECT file_inode, file_offset, file_head FROM index_state")
+            }
+
+            live_inodes = set()
+            for log_file in list_log_files(STRUCTURED_LOG_NAME):
+                try:
+                    stat = log_file.stat()
+                except FileNotFoundError:
+                    continue
+                inode = stat.st_ino
+                live_inodes.add(inode)
+
+                with open(log_file, 'rb') as f:
+                    head = f.read(HEAD_SIGNATURE_BYTES)
+                    offset, known_head = state.get(inode, (0, None))
+
+                    # A truncated file, or an inode reused by a new file after
+                    # rotation deleted the old one, is re-indexed from scratch
+                    if stat.st_size < offset or (known_head is not None and not head.startswith(known_head[:len(head)])):
+                        _delete_inode(conn, inode)
+                        offset = 0
+                    if stat.st_size == offset:
+                        continue
+
+                    f.seek(offset)
+                    data = f.read(stat.st_size - offset)
+
+                # Only consume complete lines; a partial trailing write is picked up next pass
+                complete = data.rfind(b'\n') + 1
+                if complete == 0:
+                    continue
+
+                batch = []
+                for raw_line in data[:complete].split(b'\n'):
+                    if not raw_line.strip():
+                        continue
+                    row = _parse_line(raw_line.decode('utf-8', errors='replace'), inode)
+                    if row:
+                        batch.append(row)
+                    if len(batch) >= INDEX_BATCH_SIZE:
+                        _insert_entries(conn, batch)
+                        added += len(batch)
+                        batch = []
+                if batch:
+                    _insert_entries(conn, batch)
+                    added += len(batch)
+
+                conn.execute(
+                    "INSERT OR REPLACE INTO index_state (file_inode, file_offset, file_head) VALUES (?, ?, ?)",
+                    (inode, offset + complete, head)
+                )
+
+            for inode in set(state) - live_inodes:
+                _delete_inode(conn, inode)
+
+            conn.commit()
+        finally:
+            conn.close()
+
+    return added
+
+
+def _parse_time_filter(value):
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        return value.timestamp()
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        return None
+
+
+def _fts_query(text):
+    # Quote each term so user input cannot inject FTS5 query syntax
+    terms = [term.replace('"', '""') for term in text.split()]
+    return " ".join(f'"{term}"' for term in terms)
+
+
+def search_logs(level=None, logger=None, start=None, end=None, text=None, limit=200):
+    """
+    Search the structured log index.
+
+    Args:
+        level: Exact level name (e.g. "ERROR")
+        logger: Logger name prefix (e.g. "app.services")
+        start: Earliest time (ISO string or datetime)
+        end: Latest time (ISO string or datetime)
+        text: Free text matched against message and logger name
+        limit: Maximum number of entries to return
+
+    Returns:
+        List of dicts (newest first)
+    """
+    if not INDEX_DB_PATH.exists():
+        return []
+
+    conditions = []
+    params = []
+
+    if level:
+        conditions.append("e.level = ?")
+        params.append(level.upper())
+    if logger:
+        conditions.append("e.logger LIKE ?")
+        params.append(f"{logger}%")
+
+    start_ts = _parse_time_filter(start)
+    if start_ts is not None:
+        conditions.append("e.ts >= ?")
+        params.append(start_ts)
+    end_ts = _parse_time_filter(end)
+    if end_ts is not None:
+        conditions.append("e.ts <= ?")
+        params.append(end_ts)
+
+    with _index_lock:
+        conn = _connect()
+        try:
+            # Sets _fts_available, which is unknown until the index is opened once
+            _init_index(conn)
+
+            join = ""
+            if text and text.strip():
+                if _fts_available:
+                    join = "JOIN log_entries_fts f ON f.rowid = e.id"
+                    conditions.append("log_entries_fts MATCH ?")
+                    params.append(_fts_query(text))
+                else:
+                    conditions.append("(e.message LIKE ? OR e.logger LIKE ?)")
+                    params.extend([f"%{text.strip()}%", f"%{text.strip()}%"])
+
+            where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+            params.append(limit)
+
+            rows = conn.execute(f"""
+                SELECT e.time, e.level, e.logger, e.message
+                FROM log_entries e
+                {join}
+                {where}
+                ORDER BY e.ts DESC, e.id DESC
+                LIMIT ?
+            """, params).fetchall()
+        finally:
+            conn.close()
+
+    return [
+        {"time": row[0], "level": row[1], "logger": row[2], "message": row[3]}
+        for row in rows
+    ]
+
+
+def get_index_stats():
+    """Get entry counts for the structured log index."""
+    if not INDEX_DB_PATH.exists():
+        return {"total_entries": 0, "fts": bool(_fts_available)}
+
+    with _index_lock:
+        conn = _connect()
+        try:
+            _init_index(conn)
+            total = conn.execute("SELECT COUNT(*) FROM log_entries").fetchone()[0]
+        finally:
+            conn.close()
+
+    return {"total_entries": total, "fts": bool(_fts_available)}
+
+
+def _indexer_loop():
+    while not _indexer_stop.is_set():
+        try:
+            index_new_entries()
+        except Exception as e:
+            print(f"Log indexer error: {e}")
+        _indexer_stop.wait(INDEX_POLL_SECONDS)
+
+
+def start_log_indexer():
+    """Start the background thread that feeds the structured log index."""
+    global _indexer_thread
+
+    if _indexer_thread and _indexer_thread.is_alive():
+        return
+
+    LOG_DIR.mkdir(parents=True, exist_ok=True)
+    _indexer_stop.clear()
+    _indexer_thread = threading.Thread(target=_indexer_loop, name="log-indexer", daemon=True)
+    _indexer_thread.start()
+    print("✓ Structured log indexer started")
+
+
+def stop_log_indexer():
+    """Stop the background log indexer thread."""
+    global _indexer_thread
+
+    if not _indexer_thread:
+        return
+
+    _indexer_stop.set()
+    _indexer_thread.join(timeout=5)
+    _indexer_thread = None
@@ -1,12 +1,17 @@
 import logging
-from logging.handlers import RotatingFileHandler
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
 import os
+import queue
 from pathlib import Path
 
 LOG_DIR = Path("data/logs")
 LOG_FILE = LOG_DIR / "error_log.txt"
 
 _file_handler = None
+_console_handler = None
+_structured_handler = None
+_queue_handler = None
+_queue_listener = None
 
 
 class NoiseFilter(logging.Filter):
@@ -37,16 +42,55 @@ class SuppressRootRedirectFilter(logging.Filter):
         # Suppress only "GET / HTTP/1.1" with 302 response
         return not ('"GET / HTTP/1.1" 302' in message)
 
-def setup_error_logging(max_bytes=10485760, backup_count=5, log_level=logging.ERROR):
+def _create_structured_handler(max_bytes, backup_count, log_level):
+    """Build the rotating JSON-lines handler that feeds the searchable log index."""
+    from app.utils.log_index import STRUCTURED_LOG_FILE, JSONLineFormatter
+
+    LOG_DIR.mkdir(parents=True, exist_ok=True)
+    handler = RotatingFileHandler(
+        STRUCTURED_LOG_FILE,
+        maxBytes=max_bytes,
+        backupCount=backup_count,
+        encoding='utf-8'
+    )
+    handler.setLevel(log_level)
+    handler.addFilter(NoiseFilter())
+    handler.setFormatter(JSONLineFormatter())
+    return handler
+
+
+def _output_handlers():
+    """Handlers that do the actual I/O, fed by the queue listener thread."""
+    return [h for h in (_file_handler, _console_handler, _structured_handler) if h is not None]
+
+
+def _restart_queue_listener():
+    """(Re)start the listener thread so it drains into the current output handlers."""
+    global _queue_listener
+
+    if _queue_listener is not None:
+        # stop() drains everything already queued before returning
+        _queue_listener.stop()
+
+    _queue_listener = QueueListener(_queue_handler.queue, *_output_handlers(), respect_handler_level=True)
+    _queue_listener.start()
+
+
+def setup_error_logging(max_bytes=10485760, backup_count=5, log_level=logging.ERROR, structured=False):
     """
     Configure rotating file handler and console handler for error logging.
 
+    Loggers only get a QueueHandler, so a log call on a request or scheduler
+    thread just enqueues the record; a QueueListener thread does the file I/O,
+    rotation checks and console writes.
+
     Args:
         max_bytes: Maximum size of log file before rotation (default 10MB)
         backup_count: Number of backup files to keep (default 5)
         log_level: Minimum log level to capture (default ERROR)
+        structured: Also write JSON-lines records for the searchable log index
     """
-    global _file_handler
+    global _file_handler, _console_handler, _structured_handler, _queue_handler
 
     LOG_DIR.mkdir(parents=True, exist_ok=True)
 
@@ -72,62 +116,213 @@ def setup_error_logging(max_bytes=10485760, backup_count=5, log_level=logging.ER
     console_handler.addFilter(NoiseFilter())
     console_handler.setFormatter(formatter)
 
+    _file_handler = file_handler
+    _console_handler = console_handler
+    if structured:
+        _structured_handler = _create_structured_handler(max_bytes, backup_count, log_level)
+
+    # Records below the level are dropped before they are enqueued
+    _queue_handler = QueueHandler(queue.Queue(-1))
+    _queue_handler.setLevel(log_level)
+    _restart_queue_listener()
+
     root_logger = logging.getLogger()
-    root_logger.addHandler(file_handler)
-    root_logger.addHandler(console_handler)
+    root_logger.addHandler(_queue_handler)
 
     if root_logger.level > log_level:
         root_logger.setLevel(log_level)
 
     uvicorn_access = logging.getLogger("uvicorn.access")
-    uvicorn_access.addHandler(file_handler)
-    uvicorn_access.addHandler(console_handler)
+    uvicorn_access.addHandler(_queue_handler)
     uvicorn_access.addFilter(SuppressRootRedirectFilter())
     uvicorn_access.setLevel(log_level)
 
-    _file_handler = file_handler
     return file_handler
 
 
-def get_log_files():
-    """Get all log files (main and rotated)."""
+def shutdown_logging():
+    """Flush queued log records and stop the listener thread."""
+    global _queue_listener
+
+    if _queue_listener is not None:
+        _queue_listener.stop()
+        _queue_listener = None
+
+    for handler in _output_handlers():
+        handler.close()
+
+
+def list_log_files(base_name=LOG_FILE.name):
+    """
+    List a log file and its rotated backups (base, base.1, base.2, ...), newest first.
+
+    Reads the log directory once rather than probing each rotated filename.
+    """
     if not LOG_DIR.exists():
         return []
 
-    log_files = []
-    if LOG_FILE.exists():
-        log_files.append(LOG_FILE)
+    rotated = []
+    prefix = f"{base_name}."
+    with os.scandir(LOG_DIR) as entries:
+        for entry in entries:
+            if not entry.is_file():
+                continue
+            if entry.name == base_name:
+                rotated.append((0, entry.name))
+            elif entry.name.startswith(prefix) and entry.name[len(prefix):].isdigit():
+                rotated.append((int(entry.name[len(prefix):]), entry.name))
+
+    return [LOG_DIR / name for _, name in sorted(rotated)]
+
 
-    for i in range(1, 100):
-        rotated_file = Path(f"{LOG_FILE}.{i}")
-        if rotated_file.exists():
-            log_files.append(rotated_file)
-        else:
-            break
+def get_log_files():
+    """Get all log files (main and rotated)."""
+    return list_log_files(LOG_FILE.name)
 
-    return log_files
 
+LOG_LEVELS = ["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"]
+READ_BLOCK_SIZE = 64 * 1024
 
-def read_log_file(file_path, max_lines=1000):
+
+def _iter_lines_reverse(file_path, end_offset=None, block_size=READ_BLOCK_SIZE):
+    """
+    Yield (offset, line) pairs from a log file, newest line first.
+
+    Seeks from the end (or from end_offset) and reads fixed-size blocks
+    backwards, so only the blocks needed to produce the requested lines
+    are ever read. The offset is the byte position where the line starts,
+    which doubles as a pagination cursor for older lines.
+    """
+    with open(file_path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        file_size = f.tell()
+        position = file_size if end_offset is None else min(end_offset, file_size)
+        remainder = b''
+
+        while position > 0:
+            read_size = min(block_size, position)
+            position -= read_size
+            f.seek(position)
+            block = f.read(read_size) + remainder
+
+            lines = block.split(b'\n')
+            # The first piece may be the tail of a line that starts in an
+            # earlier block; carry it over to the next iteration.
+            remainder = lines.pop(0)
+
+            line_end = position + len(block)
+            for raw_line in reversed(lines):
+                line_end -= len(raw_line) + 1
+                if raw_line.strip():
+                    yield line_end + 1, raw_line.decode('utf-8', errors='replace')
+
+        if remainder.strip():
+            yield 0, remainder.decode('utf-8', errors='replace')
+
+
+def _line_matches(line, level=None, search=None):
+    """Check a raw log line against optional level and substring filters."""
+    if level and f" - {level} - " not in line:
+        return False
+    if search and search.lower() not in line.lower():
+        return False
+    return True
+
+
+def read_log_file(file_path, max_lines=1000, level=None, search=None):
     """
     Read log file and return lines in reverse order (newest first).
 
     Args:
         file_path: Path to log file
         max_lines: Maximum number of lines to return
+        level: Only return lines logged at this level (e.g. "ERROR")
+        search: Only return lines containing this text (case-insensitive)
 
     Returns:
         List of log lines (newest first)
     """
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-            return lines[-max_lines:][::-1]
+        lines = []
+        for _, line in _iter_lines_reverse(file_path):
+            if _line_matches(line, level, search):
+                lines.append(line)
+                if len(lines) >= max_lines:
+                    break
+        return lines
     except Exception as e:
         logging.error(f"Error reading log file {file_path}: {e}")
         return []
 
 
+def encode_log_cursor(file_name, offset=None):
+    """
+    Build a pagination cursor pointing at a byte offset in a log file.
+
+    An offset of None means "start from the end of this file".
+    """
+    return f"{file_name}:{'' if offset is None else offset}"
+
+
+def decode_log_cursor(cursor):
+    """Parse a cursor produced by encode_log_cursor into (file_name, offset)."""
+    if not cursor:
+        return None, None
+    try:
+        file_name, offset = cursor.rsplit(":", 1)
+        return file_name, (int(offset) if offset else None)
+    except ValueError:
+        return None, None
+
+
+def read_log_page(max_lines=500, cursor=None, level=None, search=None):
+    """
+    Read a page of log lines across the main and rotated log files, newest first.
+
+    Pagination uses a byte-offset cursor so each page only reads the blocks
+    it returns, regardless of how large the log files are.
+
+    Args:
+        max_lines: Maximum number of lines in the page
+        cursor: Cursor returned as next_cursor by a previous call (None for newest)
+        level: Only return lines logged at this level
+        search: Only return lines containing this text (case-insensitive)
+
+    Returns:
+        Dict with 'lines' (newest first) and 'next_cursor' (None when exhausted)
+    """
+    log_files = get_log_files()
+    cursor_file, cursor_offset = decode_log_cursor(cursor)
+
+    start_index = 0
+    if cursor_file:
+        names = [log_file.name for log_file in log_files]
+        if cursor_file not in names:
+            return {'lines': [], 'next_cursor': None}
+        start_index = names.index(cursor_file)
+
+    lines = []
+    for index in range(start_index, len(log_files)):
+        log_file = log_files[index]
+        end_offset = cursor_offset if index == start_index else None
+
+        try:
+            for offset, line in _iter_lines_reverse(log_file, end_offset=end_offset):
+                if not _line_matches(line, level, search):
+                    continue
+                lines.append(line)
+                if len(lines) >= max_lines:
+                    if offset > 0:
+                        return {'lines': lines, 'next_cursor': encode_log_cursor(log_file.name, offset)}
+                    if index + 1 < len(log_files):
+                        return {'lines': lines, 'next_cursor': encode_log_cursor(log_files[index + 1].name)}
+                    return {'lines': lines, 'next_cursor': None}
+        except Exception as e:
+            logging.error(f"Error reading log file {log_file}: {e}")
+
+    return {'lines': lines, 'next_cursor': None}
+
+
 def get_log_stats():
     """Get statistics about log files."""
     log_files = get_log_files()
@@ -158,10 +353,16 @@ def clear_log_file():
     Clear the current log file by truncating it.
     This preserves the file but removes all content.
     """
+    from app.utils.log_index import STRUCTURED_LOG_FILE
+
     try:
         if LOG_FILE.exists():
             with open(LOG_FILE, 'w', encoding='utf-8') as f:
                 f.truncate(0)
+            # Keep the structured log in step; the indexer drops truncated entries
+            if STRUCTURED_LOG_FILE.exists():
+                with open(STRUCTURED_LOG_FILE, 'w', encoding='utf-8') as f:
+                    f.truncate(0)
             logging.info("Log file cleared by administrator")
             return True
         return False
@@ -196,9 +397,10 @@ def reconfigure_logging():
             else:
                 new_level = logging.WARNING
 
-            # Update all handlers on root logger
+            # Update all handlers on root logger, plus the output handlers
+            # behind the queue listener
             root_logger = logging.getLogger()
-            for handler in root_logger.handlers:
+            for handler in root_logger.handlers + _output_handlers():
                 handler.setLevel(new_level)
 
             if root_logger.level > new_level:
@@ -221,3 +423,37 @@ def reconfigure_logging():
 
     except Exception as e:
         logging.error(f"Error reconfiguring logging: {e}")
+
+
+def reconfigure_structured_logging(enabled):
+    """
+    Attach or detach the JSON-lines handler and its background indexer.
+    Called when the structured logging setting is updated.
+    """
+    global _structured_handler
+
+    from app.utils.log_index import start_log_indexer, stop_log_indexer
+
+    try:
+        if enabled and _structured_handler is None:
+            _structured_handler = _create_structured_handler(
+                _file_handler.maxBytes if _file_handler else 10485760,
+                _file_handler.backupCount if _file_handler else 5,
+                _file_handler.level if _file_handler else logging.WARNING
+            )
+            if _queue_handler is not None:
+                _restart_queue_listener()
+            start_log_indexer()
+
+        elif not enabled and _structured_handler is not None:
+            structured_handler = _structured_handler
+            _structured_handler = None
+            if _queue_handler is not None:
+                _restart_queue_listener()
+            structured_handler.close()
+            stop_log_indexer()
+
+        logging.info(f"Structured logging {'enabled' if enabled else 'disabled'}")
+
+    except Exception as e:
+        logging.error(f"Error reconfiguring structured logging: {e}")
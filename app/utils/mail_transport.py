@@ -0,0 +1,269 @@
+"""
+Mail transports used by the email outbox worker.
+
+MAIL_TRANSPORT selects the backend:
+
+- resend (default): the Resend HTTP API (RESEND_API_KEY)
+- smtp: relay through an MTA. One authenticated connection is opened per
+  delivery batch and reused for every message in it
+  (SMTP_HOST, SMTP_PORT, SMTP_USERNAME, SMTP_PASSWORD,
+  SMTP_SECURITY=starttls|ssl|none, SMTP_TIMEOUT)
+- file: write each message to a local Maildir (MAIL_FILE_DIR, default
+  data/mail) for offline testing and benchmarking
+
+Every transport is used as
+
+    with transport.session():
+        transport.send(message)
+
+and returns an id for each delivered message. Sender addresses come from
+MAIL_FROM_EMAIL_DAILY / MAIL_FROM_EMAIL_TIPS, falling back to the
+RESEND_FROM_EMAIL_* variables.
+"""
+import base64
+import hashlib
+import mailbox
+import os
+import smtplib
+import ssl
+import threading
+from contextlib import contextmanager
+from email.message import EmailMessage
+from email.utils import formatdate
+
+from app.utils.metrics import EMAIL_SEND_SECONDS
+
+DEFAULT_MAIL_DIR = os.path.join("data", "mail")
+
+_transport = None
+_transport_lock = threading.Lock()
+
+
+def _load_env():
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
+
+def from_address_setting(report_type):
+    """(environment variable, value) for the sender of a report type."""
+    suffix = "DAILY" if report_type == "daily" else "TIPS"
+    for key in (f"MAIL_FROM_EMAIL_{suffix}", f"RESEND_FROM_EMAIL_{suffix}"):
+        value = os.getenv(key)
+        if value:
+            return key, value
+    return f"MAIL_FROM_EMAIL_{suffix}", None
+
+
+def build_mime_message(message):
+    """RFC 5322 message for an outbox row, with a Message-ID stable across retries."""
+    mime = EmailMessage()
+    mime["From"] = message["from_email"]
+    mime["To"] = message["to_email"]
+    mime["Subject"] = message["subject"]
+    mime["Date"] = formatdate(localtime=True)
+
+    key = message.get("idempotency_key")
+    if key:
+        domain = message["from_email"].rsplit("@", 1)[-1].strip(" >")
+        mime["Message-ID"] = f"<{hashlib.sha256(key.encode()).hexdigest()[:32]}@{domain}>"
+
+    mime.set_content("This report is best viewed in an HTML email client.")
+    mime.add_alternative(message["html_body"], subtype="html")
+
+    attachment = _read_attachment(message)
+    if attachment:
+        filename, content = attachment
+        mime.add_attachment(content, maintype="text", subtype="csv", filename=filename)
+    return mime
+
+
+def _read_attachment(message):
+    attachment_path = message.get("attachment_path")
+    if not attachment_path:
+        return None
+    try:
+        with open(attachment_path, "rb") as f:
+            return os.path.basename(attachment_path), f.read()
+    except Exception as e:
+        # Send without the attachment rather than not at all
+        print(f"  ⚠ Warning: Failed to attach CSV to email for {message['to_email']}: {e}")
+        return None
+
+
+class MailTransport:
+    name = "base"
+
+    def configuration_error(self):
+        """Message describing missing configuration, or None if ready to send."""
+        return None
+
+    @contextmanager
+    def session(self):
+        yield self
+
+    def send(self, message):
+        with EMAIL_SEND_SECONDS.time(report_type=message["report_type"]):
+            return self._send(message)
+
+    def _send(self, message):
+        raise NotImplementedError
+
+
+class ResendTransport(MailTransport):
+    """Resend HTTP API, one request per message."""
+
+    name = "resend"
+
+    def __init__(self):
+        import resend
+
+        resend.api_key = os.getenv("RESEND_API_KEY")
+        self.resend = resend
+
+    def configuration_error(self):
+        if not self.resend.api_key:
+            return "RESEND_API_KEY is not configured in environment variables"
+        return None
+
+    def _send(self, message):
+        if not self.resend.api_key:
+            raise RuntimeError(self.configuration_error())
+
+        params = {
+            "from": message["from_email"],
+            "to": [message["to_email"]],
+            "subject": message["subject"],
+            "html": message["html_body"]
+        }
+
+        attachment = _read_attachment(message)
+        if attachment:
+            filename, content = attachment
+            params["attachments"] = [{
+                "content": base64.b64encode(content).decode("utf-8"),
+                "filename": filename
+            }]
+
+        response = self.resend.Emails.send(params)
+        return str(response.get("id", "")) if isinstance(response, dict) else ""
+
+
+class SmtpTransport(MailTransport):
+    """SMTP relay that keeps one authenticated connection open per session."""
+
+    name = "smtp"
+
+    def __init__(self):
+        self.host = os.getenv("SMTP_HOST", "")
+        self.port = int(os.getenv("SMTP_PORT", "587"))
+        self.username = os.getenv("SMTP_USERNAME", "")
+        self.password = os.getenv("SMTP_PASSWORD", "")
+        self.security = os.getenv("SMTP_SECURITY", "starttls").lower()
+        self.timeout = float(os.getenv("SMTP_TIMEOUT", "30"))
+        self._connection = None
+
+    def configuration_error(self):
+        if not self.host:
+            return "SMTP_HOST is not configured in environment variables"
+        if self.security not in ("starttls", "ssl", "none"):
+            return f"Invalid SMTP_SECURITY: {self.security} (use starttls, ssl or none)"
+        return None
+
+    def _connect(self):
+        if self.security == "ssl":
+            connection = smtplib.SMTP_SSL(self.host, self.port, timeout=self.timeout, context=ssl.create_default_context())
+        else:
+            connection = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+            if self.security == "starttls":
+                connection.starttls(context=ssl.create_default_context())
+        if self.username:
+            connection.login(self.username, self.password)
+        return connection
+
+    def _disconnect(self):
+        connection, self._connection = self._connection, None
+        if connection is not None:
+            try:
+                connection.quit()
+            except Exception:
+                connection.close()
+
+    @contextmanager
+    def session(self):
+        try:
+            yield self
+        finally:
+            self._disconnect()
+
+    def _send(self, message):
+        mime = build_mime_message(message)
+        for attempt in range(2):
+            if self._connection is None:
+                self._connection = self._connect()
+            try:
+                refused = self._connection.send_message(mime)
+                break
+            except smtplib.SMTPServerDisconnected:
+                # The server dropped an idle connection; reconnect once
+                self._connection = None
+                if attempt:
+                    raise
+            except smtplib.SMTPResponseException as e:
+                # Server rejected this message; the connection is still usable
+                # unless the error is a connection-level one (421)
+                if e.smtp_code == 421:
+                    self._disconnect()
+                raise
+
+        if refused:
+            raise RuntimeError(f"Recipient refused: {refused}")
+        return mime["Message-ID"] or ""
+
+
+class FileTransport(MailTransport):
+    """Delivers to a local Maildir instead of sending anything."""
+
+    name = "file"
+
+    def __init__(self):
+        self.directory = os.getenv("MAIL_FILE_DIR", DEFAULT_MAIL_DIR)
+        self._maildir = None
+
+    @contextmanager
+    def session(self):
+        self._maildir = mailbox.Maildir(self.directory, create=True)
+        try:
+            yield self
+        finally:
+            self._maildir = None
+
+    def _send(self, message):
+        maildir = self._maildir or mailbox.Maildir(self.directory, create=True)
+        return maildir.add(build_mime_message(message))
+
+
+TRANSPORTS = {
+    "resend": ResendTransport,
+    "smtp": SmtpTransport,
+    "file": FileTransport,
+}
+
+
+def get_transport():
+    """
+    The configured mail transport, created on first use.
+
+    Loading .env and importing the transport's client library is deferred
+    until an email is queued or sent, keeping it off the startup path.
+    """
+    global _transport
+
+    with _transport_lock:
+        if _transport is None:
+            _load_env()
+            name = os.getenv("MAIL_TRANSPORT", "resend").lower()
+            if name not in TRANSPORTS:
+                raise ValueError(f"Unknown MAIL_TRANSPORT: {name} (use {', '.join(TRANSPORTS)})")
+            _transport = TRANSPORTS[name]()
+        return _transport
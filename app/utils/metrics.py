@@ -0,0 +1,399 @@
+"""
+In-process metrics with Prometheus text exposition output.
+
+No external client library is needed: counters, gauges and histograms are
+kept in memory behind a lock and rendered by render_metrics() for the
+/metrics endpoint.
+"""
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_registry = []
+_registry_lock = threading.Lock()
+
+
+def _format_labels(label_names, label_values, extra=None):
+    pairs = list(zip(label_names, label_values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    escaped = [
+        (name, str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"'))
+        for name, value in pairs
+    ]
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    metric_type = None
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+        with _registry_lock:
+            _registry.append(self)
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+
+    def render(self):
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.metric_type}",
+        ]
+        lines.extend(self._render_samples())
+        return lines
+
+
+class Counter(_Metric):
+    """Monotonically increasing count."""
+
+    metric_type = "counter"
+
+    def __init__(self, name, documentation, labels=()):
+        super().__init__(name, documentation, labels)
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def _render_samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"
+            for key, value in items
+        ]
+
+
+class Gauge(_Metric):
+    """
+    Value that can go up and down.
+
+    If a callback is given it is called at scrape time and must return either
+    a number (unlabelled gauge) or a dict mapping label-value tuples to numbers.
+    """
+
+    metric_type = "gauge"
+
+    def __init__(self, name, documentation, labels=(), callback=None):
+        super().__init__(name, documentation, labels)
+        self._values = {}
+        self._callback = callback
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def _render_samples(self):
+        if self._callback is not None:
+            try:
+                result = self._callback()
+            except Exception:
+                return []
+            items = sorted(result.items()) if isinstance(result, dict) else [((), result)]
+        else:
+            with self._lock:
+                items = sorted(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"
+            for key, value in items
+        ]
+
+
+class Histogram(_Metric):
+    """Distribution of observed values (e.g. durations in seconds)."""
+
+    metric_type = "histogram"
+
+    def __init__(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self._values = {}
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of a block, in seconds."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def timed(self, **labels):
+        """Decorator form of time()."""
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.time(**labels):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def _render_samples(self):
+        with self._lock:
+            items = sorted((key, ([*state[0]], state[1], state[2])) for key, state in self._values.items())
+
+        lines = []
+        for key, (bucket_counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, bucket_counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.label_names, key, ("le", _format_value(bound)))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+def render_metrics():
+    """Render all registered metrics in Prometheus text exposition format."""
+    with _registry_lock:
+        metrics = list(_registry)
+
+    lines = []
+    for metric in metrics:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# HTTP
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    labels=("method", "route", "status")
+)
+HTTP_REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "HTTP requests currently being handled"
+)
+
+# Database
+DB_QUERIES_PER_REQUEST = Histogram(
+    "db_queries_per_request",
+    "Number of SQL statements executed per HTTP request",
+    labels=("route",),
+    buckets=(1, 2, 5, 10, 20, 50, 100, 250, 500)
+)
+DB_QUERY_SECONDS_PER_REQUEST = Histogram(
+    "db_query_seconds_per_request",
+    "Total SQL execution time per HTTP request",
+    labels=("route",)
+)
+DB_QUERIES = Counter(
+    "db_queries_total",
+    "SQL statements executed, by statement type",
+    labels=("statement",)
+)
+SQLITE_LOCK_RETRIES = Counter(
+    "sqlite_lock_retries_total",
+    "Commits retried because the SQLite database was locked or busy"
+)
+SQLITE_COMMIT_FAILURES = Counter(
+    "sqlite_commit_failures_total",
+    "Commits that failed after exhausting retries"
+)
+DB_WRITER_QUEUE_SECONDS = Histogram(
+    "db_writer_queue_seconds",
+    "Time spent waiting for the single writer connection",
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0)
+)
+DB_WRITER_HOLD_SECONDS = Histogram(
+    "db_writer_hold_seconds",
+    "Time the writer connection was held per checkout (write transaction length)"
+)
+DB_WRITERS_WAITING = Gauge(
+    "db_writers_waiting",
+    "Sessions currently queued for the writer connection"
+)
+
+# Reports and email
+REPORT_GENERATION_SECONDS = Histogram(
+    "report_generation_seconds",
+    "Time spent generating report files, by report type",
+    labels=("report_type",)
+)
+EMAIL_SEND_SECONDS = Histogram(
+    "email_send_seconds",
+    "Latency of individual email provider send calls",
+    labels=("report_type",)
+)
+EMAILS_SENT = Counter(
+    "emails_sent_total",
+    "Emails sent, by report type and outcome",
+    labels=("report_type", "outcome")
+)
+EMAIL_DELIVERY_SECONDS = Histogram(
+    "email_delivery_seconds",
+    "Time from queueing an email to its successful delivery",
+    labels=("report_type",),
+    buckets=(1.0, 5.0, 15.0, 60.0, 300.0, 900.0, 3600.0, 21600.0)
+)
+
+
+def _email_outbox_depth():
+    """Outbox messages by status (pending, sending, sent, dead)."""
+    from sqlalchemy import text
+    from app.database import read_engine
+
+    try:
+        with read_engine.connect() as conn:
+            rows = conn.execute(text("SELECT status, COUNT(*) FROM email_outbox GROUP BY status")).fetchall()
+    except Exception:
+        return {}
+    return {(status,): count for status, count in rows}
+
+
+EMAIL_OUTBOX_MESSAGES = Gauge(
+    "email_outbox_messages",
+    "Queued report emails by delivery status",
+    labels=("status",),
+    callback=_email_outbox_depth
+)
+
+# Database maintenance
+DB_MAINTENANCE_SECONDS = Histogram(
+    "db_maintenance_seconds",
+    "Time spent in database maintenance steps",
+    labels=("step",),
+    buckets=(0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0)
+)
+
+
+def _sqlite_wal_bytes():
+    import os
+    from app.database import DATABASE_PATH
+
+    try:
+        return os.path.getsize(f"{DATABASE_PATH}-wal")
+    except OSError:
+        return 0
+
+
+SQLITE_WAL_BYTES = Gauge(
+    "sqlite_wal_bytes",
+    "Size of the main database write-ahead log",
+    callback=_sqlite_wal_bytes
+)
+
+
+# Scheduler
+def count_running_jobs(scheduler):
+    """Number of job instances currently executing across the scheduler's executors."""
+    running = 0
+    for executor in scheduler._executors.values():
+        running += sum(getattr(executor, "_instances", {}).values())
+    return running
+
+
+def _scheduler_queue_depth():
+    """Scheduler jobs by state: scheduled, due (past their run time) and running."""
+    from datetime import datetime
+    from app.scheduler import scheduler
+
+    if not scheduler.running:
+        return {}
+
+    now = datetime.now(scheduler.timezone)
+    jobs = scheduler.get_jobs()
+    due = sum(1 for job in jobs if job.next_run_time and job.next_run_time <= now)
+
+    return {("scheduled",): len(jobs), ("due",): due, ("running",): count_running_jobs(scheduler)}
+
+
+SCHEDULER_JOBS = Gauge(
+    "scheduler_jobs",
+    "APScheduler jobs by state",
+    labels=("state",),
+    callback=_scheduler_queue_depth
+)
+
+
+class RequestQueryStats:
+    """Per-request SQL statement count and time, filled in by cursor events."""
+
+    __slots__ = ("count", "seconds")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+
+current_query_stats = contextvars.ContextVar("current_query_stats", default=None)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_start_time"].pop()
+    elapsed = time.perf_counter() - started
+
+    keyword = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "OTHER"
+    DB_QUERIES.inc(statement=keyword)
+
+    stats = current_query_stats.get()
+    if stats is not None:
+        stats.count += 1
+        stats.seconds += elapsed
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_cursor_error(exception_context):
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_start_time"):
+        conn.info["query_start_time"].pop()
@@ -0,0 +1,199 @@
+"""
+Per-request SQL profiler and N+1 detector.
+
+Enabled with SQL_PROFILE=1. Every statement executed while handling a request
+is recorded with its duration, grouped by statement shape (literals and bind
+values stripped), and any shape repeated at least SQL_PROFILE_N1_THRESHOLD
+times is flagged as a likely N+1 pattern. Results are returned in X-SQL-*
+response headers and kept in a ring buffer for the /admin/sql-profile page.
+
+assert_query_budget() applies the same recording to any block of code, so
+scripts and CI checks can fail when a code path exceeds its query budget.
+"""
+import contextvars
+import logging
+import os
+import re
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+SQL_PROFILE_ENABLED = os.getenv("SQL_PROFILE", "0") == "1"
+N1_THRESHOLD = int(os.getenv("SQL_PROFILE_N1_THRESHOLD", "5"))
+RECENT_PROFILE_LIMIT = 200
+
+logger = logging.getLogger(__name__)
+
+_current_profile = contextvars.ContextVar("current_sql_profile", default=None)
+_recent_profiles = deque(maxlen=RECENT_PROFILE_LIMIT)
+_recent_lock = threading.Lock()
+
+# Budgets are process-wide so statements run on other threads (e.g. the
+# TestClient's event loop thread) are still counted
+_active_budgets = []
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN\s*\((?:\s*\?\s*,)*\s*\?\s*\)", re.IGNORECASE)
+_NAMED_PARAM = re.compile(r"(?<!:):\w+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised by assert_query_budget when a block runs too many statements."""
+
+
+class SQLProfile:
+    """Statements recorded while a request (or budgeted block) ran."""
+
+    def __init__(self, label):
+        self.label = label
+        self.statements = []
+        self.started_at = time.time()
+
+    def record(self, statement, duration):
+        self.statements.append((normalize_statement(statement), duration))
+
+    @property
+    def query_count(self):
+        return len(self.statements)
+
+    @property
+    def total_ms(self):
+        return sum(duration for _, duration in self.statements) * 1000
+
+    def repeated_shapes(self, threshold=N1_THRESHOLD):
+        """Return [(shape, count)] for shapes executed at least `threshold` times."""
+        counts = Counter(shape for shape, _ in self.statements)
+        return [(shape, count) for shape, count in counts.most_common() if count >= threshold]
+
+    def summary(self, threshold=N1_THRESHOLD):
+        shape_times = {}
+        for shape, duration in self.statements:
+            shape_times[shape] = shape_times.get(shape, 0.0) + duration
+
+        return {
+            "label": self.label,
+            "started_at": self.started_at,
+            "query_count": self.query_count,
+            "total_ms": round(self.total_ms, 2),
+            "n_plus_one": [
+                {"shape": shape, "count": count, "total_ms": round(shape_times[shape] * 1000, 2)}
+                for shape, count in self.repeated_shapes(threshold)
+            ],
+        }
+
+
+def normalize_statement(statement):
+    """Reduce a SQL statement to its shape so repeats with different values group together."""
+    shape = _STRING_LITERAL.sub("?", statement)
+    shape = _NAMED_PARAM.sub("?", shape)
+    shape = _NUMBER_LITERAL.sub("?", shape)
+    shape = _WHITESPACE.sub(" ", shape).strip()
+    return _IN_LIST.sub("IN (?)", shape)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _profile_before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_profile.get() is not None or _active_budgets:
+        conn.info.setdefault("sql_profile_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _profile_after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if not conn.info.get("sql_profile_start"):
+        return
+    duration = time.perf_counter() - conn.info["sql_profile_start"].pop()
+
+    profile = _current_profile.get()
+    if profile is not None:
+        profile.record(statement, duration)
+    for budget in list(_active_budgets):
+        budget.record(statement, duration)
+
+
+@event.listens_for(Engine, "handle_error")
+def _profile_handle_error(exception_context):
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("sql_profile_start"):
+        conn.info["sql_profile_start"].pop()
+
+
+def get_recent_profiles():
+    """Return summaries of recently profiled requests, newest first."""
+    with _recent_lock:
+        return list(reversed(_recent_profiles))
+
+
+def clear_recent_profiles():
+    with _recent_lock:
+        _recent_profiles.clear()
+
+
+async def profile_request(request, call_next):
+    """HTTP middleware: record SQL for the request and attach X-SQL-* headers."""
+    profile = SQLProfile(f"{request.method} {request.url.path}")
+    token = _current_profile.set(profile)
+    try:
+        response = await call_next(request)
+    finally:
+        _current_profile.reset(token)
+
+    summary = profile.summary()
+    route = request.scope.get("route")
+    summary["route"] = getattr(route, "path", None) or request.url.path
+    summary["status"] = response.status_code
+
+    response.headers["X-SQL-Queries"] = str(summary["query_count"])
+    response.headers["X-SQL-Time-ms"] = f"{summary['total_ms']:.2f}"
+    response.headers["X-SQL-N1"] = str(len(summary["n_plus_one"]))
+
+    if summary["n_plus_one"]:
+        worst = summary["n_plus_one"][0]
+        logger.warning(
+            "Possible N+1 on %s: %s statements, shape repeated %sx: %s",
+            profile.label, summary["query_count"], worst["count"], worst["shape"][:200]
+        )
+
+    if not request.url.path.startswith(("/static", "/admin/sql-profile")):
+        with _recent_lock:
+            _recent_profiles.append(summary)
+
+    return response
+
+
+@contextmanager
+def assert_query_budget(max_queries, allow_n_plus_one=False, threshold=N1_THRESHOLD, label="budget"):
+    """
+    Fail if the enclosed block executes more than `max_queries` statements,
+    or (unless allowed) repeats any statement shape `threshold` or more times.
+
+    Statements from every thread are counted while the block runs, so this
+    also works around a TestClient call.
+
+    Example:
+        with assert_query_budget(10):
+            client.get("/daily-balance")
+    """
+    profile = SQLProfile(label)
+    _active_budgets.append(profile)
+    try:
+        yield profile
+    finally:
+        _active_budgets.remove(profile)
+
+    if profile.query_count > max_queries:
+        raise QueryBudgetExceeded(
+            f"{label}: {profile.query_count} queries executed, budget is {max_queries}"
+        )
+
+    repeated = profile.repeated_shapes(threshold)
+    if repeated and not allow_n_plus_one:
+        shape, count = repeated[0]
+        raise QueryBudgetExceeded(
+            f"{label}: statement shape repeated {count}x (possible N+1): {shape}"
+        )
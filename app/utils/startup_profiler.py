@@ -0,0 +1,91 @@
+"""
+Startup-time profiling helpers.
+
+Phase timings are collected with startup_phase() during application startup
+and printed as a summary once startup completes. The module can also be run
+as a script to summarize a `python -X importtime` log:
+
+    python -X importtime -c "import app.main" 2> importtime.log
+    python -m app.utils.startup_profiler importtime.log
+"""
+import re
+import sys
+import time
+from contextlib import contextmanager
+
+_process_started = time.perf_counter()
+_phases = []
+
+IMPORTTIME_PATTERN = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+@contextmanager
+def startup_phase(name):
+    """Time a named startup phase."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        _phases.append((name, (time.perf_counter() - started) * 1000))
+
+
+def get_startup_phases():
+    """Return recorded (phase name, milliseconds) pairs in the order they ran."""
+    return list(_phases)
+
+
+def print_startup_summary():
+    """Print per-phase startup timings and time since the app module was imported."""
+    if not _phases:
+        return
+
+    print("Startup phases:")
+    for name, elapsed_ms in _phases:
+        print(f"   {elapsed_ms:8.1f} ms  {name}")
+    print(f"✓ Startup complete in {(time.perf_counter() - _process_started) * 1000:.0f} ms since app import")
+
+
+def summarize_importtime(lines, top=25):
+    """
+    Summarize `-X importtime` output.
+
+    Args:
+        lines: Iterable of lines from the importtime stderr log
+        top: Number of modules to return
+
+    Returns:
+        List of dicts with module, self_ms, cumulative_ms and depth,
+        sorted by cumulative time (slowest first)
+    """
+    modules = []
+    for line in lines:
+        match = IMPORTTIME_PATTERN.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, module = match.groups()
+        modules.append({
+            "module": module,
+            "self_ms": int(self_us) / 1000,
+            "cumulative_ms": int(cumulative_us) / 1000,
+            "depth": len(indent) // 2
+        })
+
+    modules.sort(key=lambda m: m["cumulative_ms"], reverse=True)
+    return modules[:top]
+
+
+def print_importtime_summary(path, top=25):
+    """Print the slowest imports from an `-X importtime` log file."""
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        modules = summarize_importtime(f, top=top)
+
+    print(f"Slowest imports (top {len(modules)}, cumulative):")
+    for m in modules:
+        print(f"   {m['cumulative_ms']:8.1f} ms  (self {m['self_ms']:6.1f} ms)  {m['module']}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python -m app.utils.startup_profiler <importtime.log> [top]")
+        sys.exit(1)
+    print_importtime_summary(sys.argv[1], int(sys.argv[2]) if len(sys.argv) > 2 else 25)
@@ -1,5 +1,4 @@
 import os
-import httpx
 from typing import Optional, Tuple
 
 GITHUB_VERSION_URL = "https://raw.githubusercontent.com/Xaque8787/dailydough/refs/heads/main/.dockerversion"
@@ -16,6 +15,8 @@ def get_local_version() -> str:
 
 def get_remote_version() -> Optional[str]:
     try:
+        # Imported lazily: httpx is only needed for this check, not at startup
+        import httpx
         response = httpx.get(GITHUB_VERSION_URL, timeout=5.0)
         if response.status_code == 200:
             return response.text.strip()
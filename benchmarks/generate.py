@@ -0,0 +1,304 @@
+"""
+Seedable synthetic-restaurant data generator for benchmarks.
+
+Fills a SQLite database (created from the app models) with realistic volumes:
+positions and tip requirements, staff with position schedules, financial
+line item templates, and one finalized daily balance per day with employee
+tip entries, derived tip line items, checks and EFTs.
+
+Usage:
+    python -m benchmarks.generate --db data/database.db --years 5 --staff 80 --seed 42
+"""
+import argparse
+import json
+import random
+import sqlite3
+import time
+from datetime import date, datetime, timedelta
+
+DAYS_OF_WEEK = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+FIRST_NAMES = [
+    "Alex", "Jordan", "Taylor", "Morgan", "Casey", "Riley", "Jamie", "Avery", "Quinn", "Drew",
+    "Sam", "Charlie", "Reese", "Skyler", "Rowan", "Emerson", "Finley", "Hayden", "Parker", "Sage"
+]
+LAST_NAMES = [
+    "Garcia", "Nguyen", "Smith", "Patel", "Kim", "Lopez", "Brown", "Chen", "Martin", "Davis",
+    "Wilson", "Moore", "Clark", "Lewis", "Walker", "Young", "Allen", "King", "Scott", "Green"
+]
+
+# (name, field_name, flags)
+TIP_REQUIREMENTS = [
+    ("Credit Card Tips", "cc_tips", {"apply_to_expense": True}),
+    ("Cash Tips", "cash_tips", {}),
+    ("Tip Out Received", "tip_out_received", {}),
+    ("Tip Out Given", "tip_out_given", {"is_deduction": True}),
+    ("Bar Tip Share", "bar_share", {"is_deduction": True}),
+    ("Support Tip Share", "support_share", {"is_deduction": True}),
+    ("Service Charge", "service_charge", {"apply_to_revenue": True}),
+    ("Food Sales", "food_sales", {"record_data": True}),
+    ("Bar Sales", "bar_sales", {"record_data": True}),
+    ("Total Tips", "total_tips", {"is_total": True, "include_in_payroll_summary": True}),
+]
+
+# position name -> tip requirement field names (total is always added)
+POSITIONS = {
+    "Server": ["cc_tips", "cash_tips", "tip_out_given", "service_charge", "food_sales", "bar_sales"],
+    "Bartender": ["cc_tips", "cash_tips", "tip_out_given", "bar_share", "bar_sales"],
+    "Busser": ["tip_out_received", "cash_tips"],
+    "Runner": ["tip_out_received", "support_share"],
+    "Host": ["tip_out_received"],
+    "Barback": ["tip_out_received", "bar_share"],
+    "Cook": ["tip_out_received"],
+    "Manager": ["cc_tips", "cash_tips", "tip_out_received", "tip_out_given", "food_sales", "bar_sales"],
+}
+POSITION_WEIGHTS = {"Server": 30, "Bartender": 12, "Busser": 12, "Runner": 10, "Host": 8, "Barback": 6, "Cook": 18, "Manager": 4}
+
+# (name, category, flags)
+FINANCIAL_TEMPLATES = [
+    ("Starting Till", "revenue", {"is_starting_till": True}),
+    ("Food Sales", "revenue", {}),
+    ("Beverage Sales", "revenue", {}),
+    ("Gift Cards Sold", "revenue", {}),
+    ("Discounts", "revenue", {"is_deduction": True}),
+    ("Credit Card Deposits", "expense", {}),
+    ("Cash Deposit", "expense", {}),
+    ("Paid Outs", "expense", {}),
+    ("Gift Cards Redeemed", "expense", {}),
+    ("Ending Till", "expense", {"is_ending_till": True}),
+]
+
+CHECK_PAYEES = ["Sysco", "US Foods", "Southern Glazer's", "City Utilities", "Linen Service", "Pest Control"]
+EFT_PAYEES = ["Payroll Provider", "Sales Tax", "Insurance", "POS Subscription"]
+EFT_CARDS = ["4111", "5500", "3400"]
+
+
+def _slug(value):
+    return "".join(c if c.isalnum() else "-" for c in value.lower()).strip("-")
+
+
+def _create_schema(db_path):
+    from sqlalchemy import create_engine
+    from app.database import Base
+    import app.models  # noqa: F401 - registers tables on Base.metadata
+
+    engine = create_engine(f"sqlite:///{db_path}")
+    Base.metadata.create_all(bind=engine)
+    engine.dispose()
+
+
+def _tip_value(rng, field_name):
+    busy = rng.uniform(0.6, 1.4)
+    if field_name == "cc_tips":
+        return round(rng.uniform(60, 260) * busy, 2)
+    if field_name == "cash_tips":
+        return round(rng.uniform(0, 80) * busy, 2)
+    if field_name == "tip_out_given":
+        return round(rng.uniform(10, 60) * busy, 2)
+    if field_name == "tip_out_received":
+        return round(rng.uniform(15, 90) * busy, 2)
+    if field_name in ("bar_share", "support_share"):
+        return round(rng.uniform(5, 40) * busy, 2)
+    if field_name == "service_charge":
+        return round(rng.choice([0, 0, 0, rng.uniform(20, 120)]), 2)
+    if field_name == "food_sales":
+        return round(rng.uniform(400, 1800) * busy, 2)
+    if field_name == "bar_sales":
+        return round(rng.uniform(150, 900) * busy, 2)
+    return 0.0
+
+
+def generate_dataset(db_path, years=5, staff=80, seed=42, end_date=None, checks_per_day=2, efts_per_day=1):
+    """
+    Populate db_path with synthetic data.
+
+    Args:
+        db_path: SQLite file to create or extend (schema is created from the models)
+        years: Number of years of daily history, ending at end_date
+        staff: Number of employee/position combos working each day
+        seed: Random seed; the same seed and parameters give identical data
+        end_date: Last day of history (default: today)
+        checks_per_day: Maximum checks per day (0..n, uniformly)
+        efts_per_day: Maximum EFTs per day (0..n, uniformly)
+
+    Returns:
+        Dict of row counts and generation time
+    """
+    started = time.perf_counter()
+    rng = random.Random(seed)
+    end_date = end_date or date.today()
+    start_date = end_date - timedelta(days=int(365 * years) - 1)
+
+    _create_schema(db_path)
+
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=OFF")
+    conn.execute("PRAGMA foreign_keys=OFF")
+    cur = conn.cursor()
+
+    # Reference data
+    req_ids = {}
+    for order, (name, field_name, flags) in enumerate(TIP_REQUIREMENTS):
+        cur.execute("""
+            INSERT INTO tip_entry_requirements (
+                name, slug, field_name, display_order, is_total, is_deduction,
+                apply_to_revenue, revenue_is_deduction, apply_to_expense, expense_is_deduction,
+                no_null_value, no_input, record_data, include_in_payroll_summary
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, 0, ?, 0, 0, 0, ?, ?)
+        """, (
+            name, _slug(name), field_name, order,
+            int(flags.get("is_total", False)), int(flags.get("is_deduction", False)),
+            int(flags.get("apply_to_revenue", False)), int(flags.get("apply_to_expense", False)),
+            int(flags.get("record_data", False)), int(flags.get("include_in_payroll_summary", False))
+        ))
+        req_ids[field_name] = cur.lastrowid
+    req_by_field = {field_name: (name, flags) for name, field_name, flags in TIP_REQUIREMENTS}
+
+    position_ids = {}
+    for name, fields in POSITIONS.items():
+        cur.execute("INSERT INTO positions (name, slug) VALUES (?, ?)", (name, _slug(name)))
+        position_ids[name] = cur.lastrowid
+        for field_name in fields + ["total_tips"]:
+            cur.execute(
+                "INSERT INTO position_tip_requirements (position_id, tip_requirement_id) VALUES (?, ?)",
+                (position_ids[name], req_ids[field_name])
+            )
+
+    template_ids = []
+    for order, (name, category, flags) in enumerate(FINANCIAL_TEMPLATES):
+        cur.execute("""
+            INSERT INTO financial_line_item_templates (
+                name, category, display_order, is_default, is_deduction, is_starting_till, is_ending_till
+            ) VALUES (?, ?, ?, 1, ?, ?, ?)
+        """, (
+            name, category, order, int(flags.get("is_deduction", False)),
+            int(flags.get("is_starting_till", False)), int(flags.get("is_ending_till", False))
+        ))
+        template_ids.append((cur.lastrowid, name, category, order))
+
+    position_names = list(POSITION_WEIGHTS)
+    weights = [POSITION_WEIGHTS[p] for p in position_names]
+    employees = []
+    for i in range(staff):
+        first = rng.choice(FIRST_NAMES)
+        last = rng.choice(LAST_NAMES)
+        position = rng.choices(position_names, weights)[0]
+        slug = f"{_slug(first)}-{_slug(last)}-{i + 1}"
+        cur.execute("""
+            INSERT INTO employees (name, first_name, last_name, slug, is_active, position_id, scheduled_days)
+            VALUES (?, ?, ?, ?, 1, ?, ?)
+        """, (f"{first} {last}", first, last, slug, position_ids[position], json.dumps(DAYS_OF_WEEK)))
+        employee_id = cur.lastrowid
+        cur.execute(
+            "INSERT INTO employee_position_schedule (employee_id, position_id, days_of_week) VALUES (?, ?, ?)",
+            (employee_id, position_ids[position], json.dumps(DAYS_OF_WEEK))
+        )
+        employees.append((employee_id, f"{last}, {first}", position))
+
+    for name in CHECK_PAYEES:
+        cur.execute("INSERT INTO check_payees (name) VALUES (?)", (name,))
+    for name in EFT_PAYEES:
+        cur.execute("INSERT INTO eft_payees (name) VALUES (?)", (name,))
+    for number in EFT_CARDS:
+        cur.execute("INSERT INTO eft_card_numbers (number) VALUES (?)", (number,))
+
+    # Daily history
+    counts = {"days": 0, "employee_entries": 0, "line_items": 0, "checks": 0, "efts": 0}
+    day = start_date
+    while day <= end_date:
+        finalized_at = datetime.combine(day, datetime.min.time()) + timedelta(hours=23, minutes=30)
+        cur.execute("""
+            INSERT INTO daily_balance (date, day_of_week, notes, finalized, created_by_source, finalized_at)
+            VALUES (?, ?, '', 1, 'user', ?)
+        """, (day.isoformat(), DAYS_OF_WEEK[day.weekday()], finalized_at.isoformat(sep=" ")))
+        balance_id = cur.lastrowid
+
+        line_items = []
+        for template_id, name, category, order in template_ids:
+            line_items.append((balance_id, template_id, name, category, round(rng.uniform(50, 6000), 2), order, 0, None, None))
+
+        entries = []
+        max_order = len(template_ids)
+        for employee_id, display_name, position in employees:
+            tip_values = {}
+            total = 0.0
+            for field_name in POSITIONS[position]:
+                req_name, flags = req_by_field[field_name]
+                value = _tip_value(rng, field_name)
+                tip_values[field_name] = value
+                if not flags.get("record_data"):
+                    total += -value if flags.get("is_deduction") else value
+                for flag, category in (("apply_to_revenue", "revenue"), ("apply_to_expense", "expense")):
+                    if flags.get(flag) and value != 0:
+                        max_order += 1
+                        line_items.append((
+                            balance_id, None, f"{display_name} ({position}) - {req_name}", category,
+                            value, max_order, 1, employee_id, display_name
+                        ))
+            tip_values["total_tips"] = round(total, 2)
+            entries.append((balance_id, employee_id, position_ids[position], json.dumps(tip_values), display_name, position))
+
+        cur.executemany("""
+            INSERT INTO daily_employee_entries (
+                daily_balance_id, employee_id, position_id, tip_values, employee_name_snapshot, position_name_snapshot
+            ) VALUES (?, ?, ?, ?, ?, ?)
+        """, entries)
+        cur.executemany("""
+            INSERT INTO daily_financial_line_items (
+                daily_balance_id, template_id, name, category, value, display_order,
+                is_employee_tip, employee_id, employee_name_snapshot
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, line_items)
+
+        checks = [
+            (balance_id, str(1000 + counts["checks"] + n), day.isoformat(), rng.choice(CHECK_PAYEES), round(rng.uniform(80, 2500), 2), None)
+            for n in range(rng.randint(0, checks_per_day))
+        ]
+        cur.executemany("""
+            INSERT INTO daily_balance_checks (daily_balance_id, check_number, date, payable_to, total, memo)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, checks)
+
+        efts = [
+            (balance_id, day.isoformat(), rng.choice(EFT_CARDS), rng.choice(EFT_PAYEES), round(rng.uniform(50, 3000), 2), None)
+            for _ in range(rng.randint(0, efts_per_day))
+        ]
+        cur.executemany("""
+            INSERT INTO daily_balance_efts (daily_balance_id, date, card_number, payable_to, total, memo)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, efts)
+
+        counts["days"] += 1
+        counts["employee_entries"] += len(entries)
+        counts["line_items"] += len(line_items)
+        counts["checks"] += len(checks)
+        counts["efts"] += len(efts)
+        day += timedelta(days=1)
+
+    conn.commit()
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    conn.close()
+
+    counts["start_date"] = start_date.isoformat()
+    counts["end_date"] = end_date.isoformat()
+    counts["seconds"] = round(time.perf_counter() - started, 2)
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic restaurant database for benchmarks")
+    parser.add_argument("--db", default="data/database.db", help="SQLite file to create")
+    parser.add_argument("--years", type=float, default=5)
+    parser.add_argument("--staff", type=int, default=80, help="Employee/position combos per day")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--end-date", help="Last day of history (YYYY-MM-DD, default today)")
+    args = parser.parse_args()
+
+    end_date = datetime.strptime(args.end_date, "%Y-%m-%d").date() if args.end_date else None
+    counts = generate_dataset(args.db, years=args.years, staff=args.staff, seed=args.seed, end_date=end_date)
+    print(json.dumps(counts, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,442 @@
+"""
+Benchmark runner for the application's hot paths.
+
+Creates an isolated working directory (the app uses paths relative to the
+current directory), generates a synthetic dataset with benchmarks.generate,
+then times:
+
+- GET /daily-balance (finalized day, edit mode, and an empty day)
+- save_daily_balance_data
+- every csv_generator function (range reports also on the read-only report engine)
+- the analytics frame load and each analytics query over the full history
+- parse_tip_report_csv / parse_daily_balance_csv
+- get_saved_daily_balance_reports / get_saved_tip_reports
+- the scheduled task runners
+- before/after probes for each tunable connection pragma, ANALYZE +
+  PRAGMA optimize, and a WAL checkpoint (skip with --skip-maintenance)
+
+Results are written as JSON so runs can be compared across releases:
+
+    python -m benchmarks.run --years 1 --staff 80 --output bench.json
+    python -m benchmarks.run --years 1 --staff 80 --compare bench.json
+"""
+import argparse
+import contextlib
+import json
+import logging
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+
+def _stats(samples_ms):
+    ordered = sorted(samples_ms)
+    p95_index = max(0, int(round(0.95 * len(ordered))) - 1)
+    return {
+        "n": len(ordered),
+        "min_ms": round(ordered[0], 3),
+        "median_ms": round(statistics.median(ordered), 3),
+        "mean_ms": round(statistics.fmean(ordered), 3),
+        "p95_ms": round(ordered[p95_index], 3),
+        "max_ms": round(ordered[-1], 3),
+    }
+
+
+def bench(results, name, func, repeat, warmup=1):
+    """Run func warmup + repeat times and record timing statistics under name."""
+    samples = []
+    # The app prints heavily while generating/parsing reports; keep that off the terminal
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for _ in range(warmup):
+            func()
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            samples.append((time.perf_counter() - started) * 1000)
+    results[name] = _stats(samples)
+    print(f"  {name:<45} median {results[name]['median_ms']:>10.2f} ms   p95 {results[name]['p95_ms']:>10.2f} ms")
+
+
+def prepare_workdir(workdir=None):
+    """Create a working directory with the app linked in, and chdir into it."""
+    workdir = Path(workdir or tempfile.mkdtemp(prefix="dailydough-bench-"))
+    workdir.mkdir(parents=True, exist_ok=True)
+    app_link = workdir / "app"
+    if not app_link.exists():
+        app_link.symlink_to(REPO_ROOT / "app", target_is_directory=True)
+    os.chdir(workdir)
+    if str(workdir) not in sys.path:
+        sys.path.insert(0, str(workdir))
+    return workdir
+
+
+def _find_report(filename):
+    for root, _, files in os.walk(os.path.join("data", "reports")):
+        if filename in files:
+            return os.path.join(root, filename)
+    raise FileNotFoundError(filename)
+
+
+def build_save_form(db, source_date):
+    """Build the form payload the daily balance page would post for an existing day."""
+    from starlette.datastructures import FormData
+    from app.models import DailyBalance, FinancialLineItemTemplate, Position
+
+    balance = db.query(DailyBalance).filter(DailyBalance.date == source_date).first()
+    items = []
+
+    values_by_template = {
+        item.template_id: item.value for item in balance.financial_line_items if item.template_id
+    }
+    for template in db.query(FinancialLineItemTemplate).all():
+        items.append((f"financial_item_{template.id}", str(values_by_template.get(template.id, 0))))
+
+    positions = {p.id: p for p in db.query(Position).all()}
+    for entry in balance.employee_entries:
+        combo = f"{entry.employee_id}-{entry.position_id}"
+        items.append(("employee_ids", combo))
+        for req in positions[entry.position_id].tip_requirements:
+            if not req.no_input and not req.is_total:
+                items.append((f"tip_{req.field_name}_{combo}", str(entry.tip_values.get(req.field_name, 0))))
+
+    for index, check in enumerate(balance.checks):
+        items.extend([
+            (f"check_number_{index}", check.check_number or ""),
+            (f"check_date_{index}", check.date),
+            (f"check_payable_to_{index}", check.payable_to),
+            (f"check_total_{index}", str(check.total)),
+            (f"check_memo_{index}", ""),
+        ])
+    for index, eft in enumerate(balance.efts):
+        items.extend([
+            (f"eft_date_{index}", eft.date),
+            (f"eft_card_number_{index}", eft.card_number or ""),
+            (f"eft_payable_to_{index}", eft.payable_to),
+            (f"eft_total_{index}", str(eft.total)),
+            (f"eft_memo_{index}", ""),
+        ])
+
+    items.append(("notes", "benchmark"))
+    return FormData(items)
+
+
+def run_benchmarks(args):
+    results = {}
+
+    from fastapi.testclient import TestClient
+    from sqlalchemy import text
+    from app.database import SessionLocal, ReportSessionLocal
+    from app.models import User, Employee, DailyBalance, DailyEmployeeEntry
+    from app.auth.jwt_handler import get_password_hash, create_access_token
+    from app.routes.daily_balance import save_daily_balance_data
+    from app.utils.csv_generator import (
+        generate_daily_balance_csv, generate_tip_report_csv,
+        generate_consolidated_daily_balance_csv, generate_employee_tip_report_csv
+    )
+    from app.utils.csv_reader import (
+        parse_tip_report_csv, parse_daily_balance_csv,
+        get_saved_daily_balance_reports, get_saved_tip_reports
+    )
+    from app.services.scheduler_tasks import (
+        run_tip_report_task, run_daily_balance_report_task,
+        run_employee_tip_report_task, run_backup_task
+    )
+
+    db = SessionLocal()
+    try:
+        if not db.query(User).filter(User.username == "bench").first():
+            db.add(User(username="bench", password_hash=get_password_hash("bench"), slug="bench", is_admin=True))
+            db.commit()
+
+        end_date = db.query(DailyBalance.date).order_by(DailyBalance.date.desc()).first()[0]
+        range_start = end_date - timedelta(days=args.range_days - 1)
+        employee = db.query(Employee).first()
+
+        # Page rendering
+        from app.main import app
+        client = TestClient(app)
+        client.cookies.set("access_token", create_access_token({"sub": "bench"}))
+
+        print("Page rendering:")
+        bench(results, "daily_balance_page.finalized", lambda: client.get(f"/daily-balance?date={end_date}"), args.repeat)
+        bench(results, "daily_balance_page.edit", lambda: client.get(f"/daily-balance?date={end_date}&edit=true"), args.repeat)
+        empty_day = end_date + timedelta(days=30)
+        bench(results, "daily_balance_page.new_day", lambda: client.get(f"/daily-balance?date={empty_day}"), args.repeat)
+
+        # Saving a day (delete + recreate of all child rows)
+        print("Saving:")
+        form = build_save_form(db, end_date)
+        save_day = end_date + timedelta(days=1)
+
+        def save():
+            session = SessionLocal()
+            try:
+                save_daily_balance_data(session, save_day, "Monday", form, finalized=False, source="benchmark")
+            finally:
+                session.close()
+
+        bench(results, "save_daily_balance_data", save, args.repeat)
+
+        # CSV generation
+        print("CSV generation:")
+        balance = db.query(DailyBalance).filter(DailyBalance.date == end_date).first()
+        entries = db.query(DailyEmployeeEntry).filter(DailyEmployeeEntry.daily_balance_id == balance.id).all()
+        bench(results, "generate_daily_balance_csv", lambda: generate_daily_balance_csv(balance, entries, source="benchmark"), args.repeat)
+        bench(results, f"generate_tip_report_csv.{args.range_days}d", lambda: generate_tip_report_csv(db, range_start, end_date, source="benchmark"), args.repeat)
+        bench(results, f"generate_consolidated_daily_balance_csv.{args.range_days}d", lambda: generate_consolidated_daily_balance_csv(db, range_start, end_date, source="benchmark"), args.repeat)
+        bench(results, f"generate_employee_tip_report_csv.{args.range_days}d", lambda: generate_employee_tip_report_csv(db, employee, range_start, end_date, source="benchmark"), args.repeat)
+
+        # Same range reports on the read-only mmap report engine
+        report_db = ReportSessionLocal()
+        try:
+            bench(results, f"report_engine.generate_tip_report_csv.{args.range_days}d", lambda: generate_tip_report_csv(report_db, range_start, end_date, source="benchmark"), args.repeat)
+            bench(results, f"report_engine.generate_consolidated_daily_balance_csv.{args.range_days}d", lambda: generate_consolidated_daily_balance_csv(report_db, range_start, end_date, source="benchmark"), args.repeat)
+        finally:
+            report_db.close()
+
+        # Analytics: cold load of the columnar history, then warm full-history queries
+        print("Analytics:")
+        from app.services import analytics
+
+        report_db = ReportSessionLocal()
+        try:
+            def load_frame():
+                analytics.invalidate_analytics_cache()
+                return analytics.get_analytics_frame(report_db)
+
+            bench(results, "analytics.load_frame", load_frame, args.repeat)
+            frame = analytics.get_analytics_frame(report_db)
+            first, last = frame.first_date, frame.last_date
+            bench(results, "analytics.trends.28d_window", lambda: analytics.rolling_trend(frame, "revenue", first, last, 28), args.repeat)
+            bench(results, "analytics.seasonality", lambda: analytics.weekday_profile(frame, ["revenue", "expense"], first, last), args.repeat)
+            bench(results, "analytics.tips_per_shift.position", lambda: analytics.tips_per_shift(frame, first, last, "position"), args.repeat)
+            bench(results, "analytics.tips_per_shift.employee", lambda: analytics.tips_per_shift(frame, first, last, "employee"), args.repeat)
+            bench(results, "analytics.year_over_year", lambda: analytics.year_over_year(frame, ["revenue", "expense"], first, last), args.repeat)
+        finally:
+            report_db.close()
+
+        # CSV parsing
+        print("CSV parsing:")
+        tip_path = _find_report(generate_tip_report_csv(db, range_start, end_date, source="benchmark"))
+        daily_path = _find_report(generate_consolidated_daily_balance_csv(db, range_start, end_date, source="benchmark"))
+        bench(results, f"parse_tip_report_csv.{args.range_days}d", lambda: parse_tip_report_csv(tip_path), args.repeat)
+        bench(results, f"parse_daily_balance_csv.{args.range_days}d", lambda: parse_daily_balance_csv(daily_path), args.repeat)
+
+        # Saved report listings (one daily report per day of the range, plus range reports)
+        print("Saved report listings:")
+        for balance in db.query(DailyBalance).filter(DailyBalance.date >= range_start).all():
+            generate_daily_balance_csv(balance, balance.employee_entries, source="benchmark")
+        bench(results, "get_saved_daily_balance_reports", get_saved_daily_balance_reports, args.repeat)
+        bench(results, "get_saved_tip_reports", get_saved_tip_reports, args.repeat)
+
+        # Scheduled task runners (no recipients, so nothing is emailed)
+        print("Scheduled task runners:")
+        now = datetime.now().isoformat(sep=" ")
+        task_ids = {}
+        for task_type in ("tip_report", "daily_balance_report", "employee_tip_report", "backup"):
+            task_id = db.execute(
+                text("""
+                    INSERT INTO scheduled_tasks (name, task_type, schedule_type, cron_expression, date_range_type,
+                                                 email_list, bypass_opt_in, is_active, created_at, updated_at, employee_id)
+                    VALUES (:name, :task_type, 'cron', '0 6 * * *', 'previous_30_days', '[]', 1, 0, :now, :now, :employee_id)
+                    RETURNING id
+                """),
+                {"name": f"bench {task_type}", "task_type": task_type, "now": now, "employee_id": employee.id}
+            ).scalar()
+            task_ids[task_type] = task_id
+        db.commit()
+
+        runner_repeat = max(1, args.repeat // 2)
+        bench(results, "run_tip_report_task", lambda: run_tip_report_task(task_ids["tip_report"], "bench", "previous_30_days", "[]", 1), runner_repeat)
+        bench(results, "run_daily_balance_report_task", lambda: run_daily_balance_report_task(task_ids["daily_balance_report"], "bench", "previous_30_days", "[]", 1), runner_repeat)
+        bench(results, "run_employee_tip_report_task", lambda: run_employee_tip_report_task(task_ids["employee_tip_report"], "bench", "previous_30_days", "[]", 1, employee.id), runner_repeat)
+        bench(results, "run_backup_task", lambda: run_backup_task(task_ids["backup"], "bench"), runner_repeat)
+
+        if not args.skip_maintenance:
+            probes = {
+                "daily_balance_page": lambda: client.get(f"/daily-balance?date={end_date}"),
+                "tip_report": lambda: generate_tip_report_csv(db, range_start, end_date, source="benchmark"),
+                "consolidated_report": lambda: generate_consolidated_daily_balance_csv(db, range_start, end_date, source="benchmark"),
+            }
+            results["_maintenance"] = run_maintenance_benchmarks(results, args, probes, save)
+    finally:
+        db.close()
+
+    return results
+
+
+def run_maintenance_benchmarks(results, args, probes, write_load):
+    """
+    Before/after timings for each tunable connection pragma, for ANALYZE +
+    PRAGMA optimize, and for a WAL checkpoint after a burst of writes.
+    """
+    from app.database import DATABASE_PATH, engine
+    from app.utils.db_maintenance import pragmas_from_settings, apply_connection_pragmas, checkpoint_wal
+
+    def probe_all(prefix):
+        for probe_name, probe in probes.items():
+            bench(results, f"{prefix}.{probe_name}", probe, args.repeat)
+
+    def wal_bytes():
+        try:
+            return os.path.getsize(f"{DATABASE_PATH}-wal")
+        except OSError:
+            return 0
+
+    # Connection pragmas: SQLite defaults, each tuned pragma alone, then all together
+    print("Connection pragmas:")
+    tuned = pragmas_from_settings({"sqlite_mmap_size_mb": str(args.mmap_mb)})
+    cases = [("baseline", {})] + [(name, {name: value}) for name, value in tuned.items()] + [("all", tuned)]
+    for case, pragmas in cases:
+        apply_connection_pragmas(pragmas)
+        probe_all(f"pragma.{case}")
+    apply_connection_pragmas({})
+
+    # Planner statistics
+    print("ANALYZE / PRAGMA optimize:")
+    probe_all("analyze.before")
+
+    def analyze():
+        with engine.connect() as conn:
+            conn.exec_driver_sql("ANALYZE")
+            conn.exec_driver_sql("PRAGMA optimize")
+            conn.commit()
+
+    bench(results, "maintenance.analyze_optimize", analyze, repeat=1, warmup=0)
+    probe_all("analyze.after")
+
+    # WAL growth from repeated saves, then a truncating checkpoint
+    print("WAL checkpoint:")
+    checkpoint_wal()
+    for _ in range(args.wal_writes):
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            write_load()
+    wal_before = wal_bytes()
+    probe_all("checkpoint.before")
+
+    bench(results, "maintenance.wal_checkpoint", checkpoint_wal, repeat=1, warmup=0)
+    wal_after = wal_bytes()
+    probe_all("checkpoint.after")
+    print(f"  WAL size {wal_before / 1048576:.1f} MB -> {wal_after / 1048576:.1f} MB after {args.wal_writes} saves")
+
+    return {"tuned_pragmas": tuned, "wal_bytes_before_checkpoint": wal_before, "wal_bytes_after_checkpoint": wal_after}
+
+
+def compare_results(current, baseline_path, max_regression):
+    """Print median deltas against a previous results file; return names that regressed."""
+    with open(baseline_path) as f:
+        baseline = json.load(f)["results"]
+
+    regressions = []
+    print(f"\nComparison with {baseline_path} (median):")
+    for name, stats in current.items():
+        if name not in baseline:
+            continue
+        before = baseline[name]["median_ms"]
+        after = stats["median_ms"]
+        change = (after - before) / before if before else 0.0
+        flag = ""
+        if change > max_regression:
+            regressions.append(name)
+            flag = "  <-- REGRESSION"
+        print(f"  {name:<45} {before:>10.2f} -> {after:>10.2f} ms  ({change:+.0%}){flag}")
+    return regressions
+
+
+def _git_revision():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run application hot-path benchmarks")
+    parser.add_argument("--years", type=float, default=1, help="Years of synthetic history")
+    parser.add_argument("--staff", type=int, default=80, help="Employee/position combos per day")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--end-date", default="2025-12-31", help="Last day of history (fixed so runs are comparable)")
+    parser.add_argument("--repeat", type=int, default=10, help="Timed iterations per benchmark")
+    parser.add_argument("--range-days", type=int, default=30, help="Report range length in days")
+    parser.add_argument("--skip-maintenance", action="store_true", help="Skip pragma/ANALYZE/checkpoint before-after timings")
+    parser.add_argument("--mmap-mb", type=int, default=256, help="mmap_size used for the mmap pragma timing")
+    parser.add_argument("--wal-writes", type=int, default=50, help="Saves run to grow the WAL before the checkpoint timing")
+    parser.add_argument("--workdir", help="Working directory (default: a new temp directory)")
+    parser.add_argument("--reuse-db", action="store_true", help="Reuse an existing database in the workdir")
+    parser.add_argument("--output", help="Write JSON results to this file")
+    parser.add_argument("--compare", help="Compare against a previous JSON results file")
+    parser.add_argument("--max-regression", type=float, default=0.25, help="Allowed median slowdown for --compare (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    output_path = os.path.abspath(args.output) if args.output else None
+    compare_path = os.path.abspath(args.compare) if args.compare else None
+
+    workdir = prepare_workdir(args.workdir)
+    print(f"Working directory: {workdir}")
+
+    # Keep application logging out of the timings
+    logging.disable(logging.CRITICAL)
+
+    from benchmarks.generate import generate_dataset
+
+    db_path = os.path.join("data", "database.db")
+    dataset = None
+    if not (args.reuse_db and os.path.exists(db_path)):
+        if os.path.exists(db_path):
+            os.remove(db_path)
+        print(f"Generating dataset: {args.years} year(s), {args.staff} staff, seed {args.seed}...")
+        dataset = generate_dataset(
+            db_path, years=args.years, staff=args.staff, seed=args.seed,
+            end_date=datetime.strptime(args.end_date, "%Y-%m-%d").date()
+        )
+        print(f"  {dataset['days']} days, {dataset['employee_entries']} employee entries, "
+              f"{dataset['line_items']} line items in {dataset['seconds']}s")
+
+    results = run_benchmarks(args)
+    maintenance = results.pop("_maintenance", None)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "git_revision": _git_revision(),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "params": {
+                "years": args.years, "staff": args.staff, "seed": args.seed, "end_date": args.end_date,
+                "repeat": args.repeat, "range_days": args.range_days
+            },
+            "dataset": dataset,
+            "maintenance": maintenance,
+            "database_bytes": os.path.getsize(db_path),
+        },
+        "results": results,
+    }
+
+    if output_path:
+        with open(output_path, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {output_path}")
+
+    if compare_path:
+        regressions = compare_results(results, compare_path, args.max_regression)
+        if regressions:
+            print(f"\n{len(regressions)} benchmark(s) regressed by more than {args.max_regression:.0%}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
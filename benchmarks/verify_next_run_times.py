@@ -0,0 +1,161 @@
+"""
+Check app.scheduler.get_next_run_times against the original step-by-step
+interval calculation, across DST transitions, and time both.
+
+The reference implementation below is the loop get_next_run_times used
+before interval schedules were fast-forwarded arithmetically: it advances
+from starts_at one interval at a time until it passes "now". Every case in
+the matrix (time zones x start times around DST changes x units/values x
+reference times) must produce identical datetimes, including tzinfo.
+
+    python -m benchmarks.verify_next_run_times
+    python -m benchmarks.verify_next_run_times --quick
+
+Exits with status 1 if any case differs.
+"""
+import argparse
+import itertools
+import sys
+import time
+from datetime import datetime, timedelta
+
+import pytz
+
+from benchmarks.run import prepare_workdir
+
+TIMEZONES = ["America/Los_Angeles", "America/New_York", "Europe/London", "Australia/Sydney", "UTC"]
+
+# Local wall-clock times around DST changes (spring forward gaps, fall back
+# overlaps), in both hemispheres, plus ordinary times
+START_TIMES = [
+    "2024-03-10 01:30", "2024-03-10 02:30", "2024-03-09 02:30", "2024-11-03 01:30",
+    "2024-11-02 01:30", "2024-03-31 01:30", "2024-10-27 01:30", "2024-04-07 02:30",
+    "2024-10-06 02:30", "2024-01-15 09:00", "2024-06-30 23:45", "2023-12-31 00:00",
+]
+
+INTERVALS = [
+    ("minutes", 5), ("minutes", 7), ("minutes", 90),
+    ("hours", 1), ("hours", 5), ("hours", 24),
+    ("days", 1), ("days", 3), ("weeks", 1), ("weeks", 2),
+]
+
+# Reference "now" values, relative to each start time
+NOW_OFFSETS = [
+    timedelta(hours=-3), timedelta(0), timedelta(minutes=1), timedelta(hours=23),
+    timedelta(days=1, minutes=30), timedelta(days=40), timedelta(days=237, hours=5),
+]
+
+
+def reference_next_run_times(tz, interval_value, interval_unit, starts_at, count, now):
+    """The original interval calculation, stepping one interval at a time."""
+    start_date = datetime.fromisoformat(starts_at.replace('Z', '+00:00'))
+    if start_date.tzinfo is None:
+        start_date = tz.localize(start_date)
+    else:
+        start_date = start_date.astimezone(tz)
+
+    if interval_unit == 'weeks':
+        interval_delta = timedelta(days=interval_value * 7)
+    elif interval_unit == 'days':
+        interval_delta = timedelta(days=interval_value)
+    elif interval_unit == 'hours':
+        interval_delta = timedelta(hours=interval_value)
+    else:
+        interval_delta = timedelta(minutes=interval_value)
+
+    def step(current):
+        if interval_unit in ['days', 'weeks']:
+            naive_next = current.replace(tzinfo=None) + interval_delta
+            try:
+                return tz.localize(naive_next, is_dst=None)
+            except Exception:
+                return tz.localize(naive_next, is_dst=False)
+        return current + interval_delta
+
+    current = start_date
+    while current <= now:
+        current = step(current)
+
+    next_runs = []
+    for _ in range(count):
+        next_runs.append(current)
+        current = step(current)
+    return next_runs
+
+
+def run_matrix(scheduler_module, quick=False):
+    timezones = TIMEZONES[:2] if quick else TIMEZONES
+    cases = 0
+    mismatches = []
+
+    for zone in timezones:
+        tz = pytz.timezone(zone)
+        scheduler_module.tz = tz
+        for starts_at, (unit, value), offset in itertools.product(START_TIMES, INTERVALS, NOW_OFFSETS):
+            start = datetime.fromisoformat(starts_at)
+            # "now" is an absolute instant; take it relative to the start's wall time
+            now = tz.normalize(tz.localize(start, is_dst=False) + offset)
+            for second in (0, 59):
+                now = now.replace(second=second)
+                expected = reference_next_run_times(tz, value, unit, starts_at, 6, now)
+                actual = scheduler_module.get_next_run_times("interval", None, value, unit, starts_at, count=6, now=now)
+                cases += 1
+                if [(d, d.tzinfo) for d in expected] != [(d, d.tzinfo) for d in actual]:
+                    mismatches.append((zone, starts_at, unit, value, now, expected, actual))
+
+    return cases, mismatches
+
+
+def time_long_running_schedule(scheduler_module):
+    """A 5-minute task that started two years ago: the worst case for the old loop."""
+    tz = pytz.timezone(TIMEZONES[0])
+    scheduler_module.tz = tz
+    now = tz.localize(datetime(2026, 3, 20, 12, 0, 30))
+    starts_at = "2024-03-20 08:00"
+
+    started = time.perf_counter()
+    expected = reference_next_run_times(tz, 5, "minutes", starts_at, 5, now)
+    reference_ms = (time.perf_counter() - started) * 1000
+
+    scheduler_module._run_preview_cache.clear()
+    started = time.perf_counter()
+    actual = scheduler_module.get_next_run_times("interval", None, 5, "minutes", starts_at, count=5, now=now)
+    closed_form_ms = (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    scheduler_module.get_next_run_times("interval", None, 5, "minutes", starts_at, count=5, now=now)
+    cached_ms = (time.perf_counter() - started) * 1000
+
+    assert expected == actual
+    print(f"5-minute schedule started 2 years ago: step loop {reference_ms:.1f} ms, "
+          f"closed form {closed_form_ms:.3f} ms, memoized {cached_ms:.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verify interval next-run calculation across DST transitions")
+    parser.add_argument("--quick", action="store_true", help="Only two time zones")
+    args = parser.parse_args()
+
+    prepare_workdir()
+    from app import scheduler as scheduler_module
+
+    original_tz = scheduler_module.tz
+    try:
+        cases, mismatches = run_matrix(scheduler_module, quick=args.quick)
+        time_long_running_schedule(scheduler_module)
+    finally:
+        scheduler_module.tz = original_tz
+
+    for zone, starts_at, unit, value, now, expected, actual in mismatches[:20]:
+        print(f"✗ {zone} start={starts_at} every {value} {unit} now={now.isoformat()}")
+        print(f"    expected {[d.isoformat() for d in expected]}")
+        print(f"    actual   {[d.isoformat() for d in actual]}")
+
+    if mismatches:
+        print(f"✗ {len(mismatches)} of {cases} cases differ")
+        sys.exit(1)
+    print(f"✓ {cases} cases match the step-by-step calculation")
+
+
+if __name__ == "__main__":
+    main()
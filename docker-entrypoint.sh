@@ -28,6 +28,15 @@ echo ""
 echo "Checking for database migrations..."
 python3 run_migrations.py
 
+# Optional import-time profile of the application module
+if [ "${PROFILE_IMPORTS:-0}" = "1" ]; then
+    echo ""
+    echo "Profiling application imports..."
+    mkdir -p data/logs
+    python3 -X importtime -c "import app.main" 2> data/logs/importtime.log
+    python3 -m app.utils.startup_profiler data/logs/importtime.log 20
+fi
+
 echo "=========================================="
 echo "Starting application..."
 echo "=========================================="
@@ -0,0 +1,40 @@
+"""
+Migration: Add archive_manifest table
+
+Tracks which years of finalized daily data have been moved out of the main
+database into per-year archive databases (data/archive/archive_YYYY.db).
+Report queries read this table to decide whether an archive needs to be
+attached for the requested date range.
+
+Changes:
+- Creates archive_manifest (one row per archived year)
+"""
+
+MIGRATION_ID = "2026_10_19_add_archive_manifest"
+
+
+def upgrade(conn, column_exists, table_exists):
+    """Create archive_manifest table"""
+    cursor = conn.cursor()
+
+    if not table_exists('archive_manifest'):
+        cursor.execute("""
+            CREATE TABLE archive_manifest (
+                year INTEGER PRIMARY KEY,
+                file_path VARCHAR NOT NULL,
+                first_date DATE NOT NULL,
+                last_date DATE NOT NULL,
+                day_count INTEGER NOT NULL DEFAULT 0,
+                archived_at DATETIME
+            )
+        """)
+        print("  ✓ Created archive_manifest table")
+    else:
+        print("  ℹ️  archive_manifest table already exists, skipping")
+
+
+def downgrade(conn, column_exists, table_exists):
+    """Drop archive_manifest table"""
+    cursor = conn.cursor()
+    cursor.execute("DROP TABLE IF EXISTS archive_manifest")
+    print("  ✓ Dropped archive_manifest table")
@@ -0,0 +1,56 @@
+"""
+Migration: Add email_outbox table
+
+Report emails are queued here (one row per recipient) and delivered by a
+background worker, instead of being sent inline from request handlers and
+scheduler jobs.
+
+Changes:
+- Creates email_outbox with a unique idempotency_key per message
+- Index on (status, next_attempt_at) for the worker's due-message query
+"""
+
+MIGRATION_ID = "2026_10_19_add_email_outbox"
+
+
+def upgrade(conn, column_exists, table_exists):
+    """Create email_outbox table"""
+    cursor = conn.cursor()
+
+    if not table_exists('email_outbox'):
+        cursor.execute("""
+            CREATE TABLE email_outbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                idempotency_key VARCHAR NOT NULL UNIQUE,
+                report_type VARCHAR NOT NULL,
+                from_email VARCHAR NOT NULL,
+                to_email VARCHAR NOT NULL,
+                subject VARCHAR NOT NULL,
+                html_body TEXT,
+                attachment_path VARCHAR,
+                status VARCHAR NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                last_error TEXT,
+                provider_message_id VARCHAR,
+                created_at DATETIME NOT NULL,
+                next_attempt_at DATETIME NOT NULL,
+                sent_at DATETIME
+            )
+        """)
+        print("  ✓ Created email_outbox table")
+    else:
+        print("  ℹ️  email_outbox table already exists, skipping")
+
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_email_outbox_status_next_attempt
+        ON email_outbox(status, next_attempt_at)
+    """)
+    print("  ✓ Created index on email_outbox")
+
+
+def downgrade(conn, column_exists, table_exists):
+    """Drop email_outbox table"""
+    cursor = conn.cursor()
+    cursor.execute("DROP INDEX IF EXISTS idx_email_outbox_status_next_attempt")
+    cursor.execute("DROP TABLE IF EXISTS email_outbox")
+    print("  ✓ Dropped email_outbox table")
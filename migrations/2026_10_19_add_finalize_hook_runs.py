@@ -0,0 +1,59 @@
+"""
+Migration: Add finalize_hook_runs table
+
+Work that follows finalizing a day (writing the day's CSV, rebuilding the
+analytics frame, emailing the report) is queued here and run by a background
+worker after the finalize request has committed.
+
+Changes:
+- Creates finalize_hook_runs, one row per hook per finalize (grouped by run_id)
+- Index on (status, id) for the worker's claim query
+- Index on (daily_balance_id, id) for the latest run of a day
+"""
+
+MIGRATION_ID = "2026_10_19_add_finalize_hook_runs"
+
+
+def upgrade(conn, column_exists, table_exists):
+    """Create finalize_hook_runs table"""
+    cursor = conn.cursor()
+
+    if not table_exists('finalize_hook_runs'):
+        cursor.execute("""
+            CREATE TABLE finalize_hook_runs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                run_id VARCHAR NOT NULL,
+                daily_balance_id INTEGER NOT NULL REFERENCES daily_balance(id) ON DELETE CASCADE,
+                hook VARCHAR NOT NULL,
+                params TEXT,
+                status VARCHAR NOT NULL DEFAULT 'pending',
+                detail TEXT,
+                error TEXT,
+                requested_by_user_id INTEGER REFERENCES users(id) ON DELETE SET NULL,
+                created_at DATETIME NOT NULL,
+                started_at DATETIME,
+                finished_at DATETIME
+            )
+        """)
+        print("  ✓ Created finalize_hook_runs table")
+    else:
+        print("  ℹ️  finalize_hook_runs table already exists, skipping")
+
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_finalize_hook_runs_status
+        ON finalize_hook_runs(status, id)
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_finalize_hook_runs_daily_balance
+        ON finalize_hook_runs(daily_balance_id, id)
+    """)
+    print("  ✓ Created indexes on finalize_hook_runs")
+
+
+def downgrade(conn, column_exists, table_exists):
+    """Drop finalize_hook_runs table"""
+    cursor = conn.cursor()
+    cursor.execute("DROP INDEX IF EXISTS idx_finalize_hook_runs_status")
+    cursor.execute("DROP INDEX IF EXISTS idx_finalize_hook_runs_daily_balance")
+    cursor.execute("DROP TABLE IF EXISTS finalize_hook_runs")
+    print("  ✓ Dropped finalize_hook_runs table")
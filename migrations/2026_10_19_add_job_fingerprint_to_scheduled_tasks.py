@@ -0,0 +1,32 @@
+"""
+Migration: Add job_fingerprint column to scheduled_tasks
+
+Stores a hash of the trigger and arguments each task's APScheduler job was
+last written with. At startup the scheduler only rewrites jobs whose task
+definition no longer matches its fingerprint.
+
+Changes:
+- Adds job_fingerprint VARCHAR column to scheduled_tasks (NULL until the job is next written)
+"""
+
+MIGRATION_ID = "2026_10_19_add_job_fingerprint_to_scheduled_tasks"
+
+def upgrade(conn, column_exists, table_exists):
+    """Add job_fingerprint column to scheduled_tasks table"""
+    cursor = conn.cursor()
+
+    if not column_exists('scheduled_tasks', 'job_fingerprint'):
+        cursor.execute("""
+            ALTER TABLE scheduled_tasks
+            ADD COLUMN job_fingerprint VARCHAR;
+        """)
+        print("  ✓ Added job_fingerprint column to scheduled_tasks table")
+    else:
+        print("  ⚠ job_fingerprint column already exists, skipping")
+
+def downgrade(conn, column_exists, table_exists):
+    """Remove job_fingerprint column from scheduled_tasks table"""
+    cursor = conn.cursor()
+
+    # SQLite doesn't support DROP COLUMN directly, would need to recreate table
+    print("  ⚠ Downgrade not implemented (SQLite limitation)")
@@ -0,0 +1,85 @@
+"""
+Migration: Record which tip field a tip line item comes from
+
+Tip fields that apply to revenue or expense add a line item per employee
+entry, named "<employee> (<position>) - <tip field>". Autosave updates these
+lines in place, and matching them by name breaks as soon as a position or
+tip field is renamed. The lines now carry the position and tip field they
+were built from.
+
+Changes:
+- Adds position_id INTEGER column to daily_financial_line_items
+- Adds tip_field_name VARCHAR column to daily_financial_line_items
+- Backfills both for existing tip lines whose name still matches one of the
+  day's employee entries and a current tip field; the rest keep NULL and
+  are matched by name until the day is next saved
+"""
+
+MIGRATION_ID = "2026_10_19_add_tip_source_to_line_items"
+
+def upgrade(conn, column_exists, table_exists):
+    """Add position_id and tip_field_name columns to daily_financial_line_items"""
+    cursor = conn.cursor()
+
+    if not column_exists('daily_financial_line_items', 'position_id'):
+        cursor.execute("""
+            ALTER TABLE daily_financial_line_items
+            ADD COLUMN position_id INTEGER REFERENCES positions(id);
+        """)
+        print("  ✓ Added position_id column to daily_financial_line_items table")
+    else:
+        print("  ⚠ position_id column already exists, skipping")
+
+    if not column_exists('daily_financial_line_items', 'tip_field_name'):
+        cursor.execute("""
+            ALTER TABLE daily_financial_line_items
+            ADD COLUMN tip_field_name VARCHAR;
+        """)
+        print("  ✓ Added tip_field_name column to daily_financial_line_items table")
+    else:
+        print("  ⚠ tip_field_name column already exists, skipping")
+
+    _backfill_tip_sources(cursor)
+
+def _backfill_tip_sources(cursor):
+    cursor.execute("""
+        SELECT e.daily_balance_id, e.employee_id, e.position_id, COALESCE(e.position_name_snapshot, p.name)
+        FROM daily_employee_entries e
+        LEFT JOIN positions p ON p.id = e.position_id
+        WHERE e.employee_id IS NOT NULL AND e.position_id IS NOT NULL
+    """)
+    positions_by_entry = {}
+    for daily_balance_id, employee_id, position_id, position_name in cursor.fetchall():
+        positions_by_entry.setdefault((daily_balance_id, employee_id), []).append((position_id, position_name))
+
+    cursor.execute("SELECT name, field_name FROM tip_entry_requirements")
+    requirements = cursor.fetchall()
+
+    cursor.execute("""
+        SELECT id, daily_balance_id, employee_id, name FROM daily_financial_line_items
+        WHERE is_employee_tip = 1 AND tip_field_name IS NULL AND employee_id IS NOT NULL
+    """)
+    updates = []
+    for line_id, daily_balance_id, employee_id, name in cursor.fetchall():
+        for position_id, position_name in positions_by_entry.get((daily_balance_id, employee_id), []):
+            match = next(
+                (field_name for req_name, field_name in requirements
+                 if name.endswith(f" ({position_name}) - {req_name}")),
+                None
+            )
+            if match:
+                updates.append((position_id, match, line_id))
+                break
+
+    cursor.executemany(
+        "UPDATE daily_financial_line_items SET position_id = ?, tip_field_name = ? WHERE id = ?",
+        updates
+    )
+    print(f"  ✓ Backfilled tip source for {len(updates)} tip line item(s)")
+
+def downgrade(conn, column_exists, table_exists):
+    """Remove the tip source columns from daily_financial_line_items table"""
+    cursor = conn.cursor()
+
+    # SQLite doesn't support DROP COLUMN directly, would need to recreate table
+    print("  ⚠ Downgrade not implemented (SQLite limitation)")
@@ -0,0 +1,33 @@
+"""
+Migration: Add version column to daily_balance
+
+A per-day version number for optimistic concurrency: every write to a day
+bumps it with a conditional UPDATE (WHERE version = <version the editor
+loaded>), so a write based on an outdated copy of the day is detected and
+rejected instead of silently overwriting someone else's changes.
+
+Changes:
+- Adds version INTEGER NOT NULL column to daily_balance (existing days start at 1)
+"""
+
+MIGRATION_ID = "2026_10_19_add_version_to_daily_balance"
+
+def upgrade(conn, column_exists, table_exists):
+    """Add version column to daily_balance table"""
+    cursor = conn.cursor()
+
+    if not column_exists('daily_balance', 'version'):
+        cursor.execute("""
+            ALTER TABLE daily_balance
+            ADD COLUMN version INTEGER NOT NULL DEFAULT 1;
+        """)
+        print("  ✓ Added version column to daily_balance table")
+    else:
+        print("  ⚠ version column already exists, skipping")
+
+def downgrade(conn, column_exists, table_exists):
+    """Remove version column from daily_balance table"""
+    cursor = conn.cursor()
+
+    # SQLite doesn't support DROP COLUMN directly, would need to recreate table
+    print("  ⚠ Downgrade not implemented (SQLite limitation)")
@@ -0,0 +1,140 @@
+"""
+Migration: Make daily balance ids AUTOINCREMENT
+
+Archiving moves old days (and their child rows) out of the main database.
+Without AUTOINCREMENT SQLite hands out MAX(id) + 1 for new rows, so once the
+highest ids have been archived they get reused, and the UNION views over the
+main and archive tables see two rows with the same id.
+
+Changes:
+- Recreates daily_balance, daily_employee_entries, daily_financial_line_items,
+  daily_balance_checks and daily_balance_efts with
+  "id INTEGER PRIMARY KEY AUTOINCREMENT" (indexes are recreated as they were)
+- Seeds sqlite_sequence with the highest id in the main table or any archive
+  listed in archive_manifest, so new ids stay above every archived id
+"""
+import os
+import re
+import sqlite3
+
+MIGRATION_ID = "2026_10_19_make_daily_ids_autoincrement"
+
+# Parent first: children are rebuilt after the table they reference
+TABLES = [
+    "daily_balance",
+    "daily_employee_entries",
+    "daily_financial_line_items",
+    "daily_balance_checks",
+    "daily_balance_efts",
+]
+
+
+def _archived_max_ids(cursor):
+    """Highest id per table across the archive databases in archive_manifest."""
+    max_ids = {table: 0 for table in TABLES}
+
+    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='archive_manifest'")
+    if not cursor.fetchone():
+        return max_ids
+
+    # Manifest paths are relative to the app root (the parent of data/)
+    cursor.execute("SELECT file FROM pragma_database_list WHERE name = 'main'")
+    app_root = os.path.dirname(os.path.dirname(cursor.fetchone()[0]))
+
+    cursor.execute("SELECT year, file_path FROM archive_manifest ORDER BY year")
+    for year, file_path in cursor.fetchall():
+        if not os.path.isabs(file_path):
+            file_path = os.path.join(app_root, file_path)
+        if not os.path.exists(file_path):
+            print(f"  ⚠ Archive for {year} is missing ({file_path}), its ids are not accounted for")
+            continue
+
+        archive = sqlite3.connect(f"file:{file_path}?mode=ro", uri=True)
+        try:
+            for table in TABLES:
+                exists = archive.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (table,)
+                ).fetchone()
+                if exists:
+                    archived_max = archive.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}").fetchone()[0]
+                    max_ids[table] = max(max_ids[table], archived_max)
+        finally:
+            archive.close()
+
+    return max_ids
+
+
+def _autoincrement_sql(create_sql, table):
+    """Rewrite a CREATE TABLE statement so that id is INTEGER PRIMARY KEY AUTOINCREMENT."""
+    new_sql = re.sub(
+        rf"CREATE TABLE\s+\"?{table}\"?",
+        f"CREATE TABLE {table}_new",
+        create_sql,
+        count=1
+    )
+    if re.search(r"\bid\s+INTEGER\s+PRIMARY\s+KEY", new_sql, re.IGNORECASE):
+        # Migration-created tables declare the key inline
+        return re.sub(
+            r"\bid\s+INTEGER\s+PRIMARY\s+KEY\b",
+            "id INTEGER PRIMARY KEY AUTOINCREMENT",
+            new_sql,
+            count=1,
+            flags=re.IGNORECASE
+        )
+
+    # create_all() tables: "id INTEGER NOT NULL, ..., PRIMARY KEY (id), ..."
+    new_sql = re.sub(
+        r"\bid\s+INTEGER\s+NOT\s+NULL\b",
+        "id INTEGER PRIMARY KEY AUTOINCREMENT",
+        new_sql,
+        count=1,
+        flags=re.IGNORECASE
+    )
+    return re.sub(r",\s*PRIMARY\s+KEY\s*\(\s*id\s*\)", "", new_sql, count=1, flags=re.IGNORECASE)
+
+
+def upgrade(conn, column_exists, table_exists):
+    """Recreate the daily balance tables with AUTOINCREMENT ids"""
+    cursor = conn.cursor()
+
+    # The parent is dropped while its children still reference it
+    cursor.execute("PRAGMA defer_foreign_keys=ON")
+
+    archived_max_ids = _archived_max_ids(cursor)
+
+    for table in TABLES:
+        if not table_exists(table):
+            print(f"  ℹ️  {table} table does not exist, skipping")
+            continue
+
+        cursor.execute("SELECT sql FROM sqlite_master WHERE type='table' AND name=?", (table,))
+        create_sql = cursor.fetchone()[0]
+
+        if "AUTOINCREMENT" in create_sql.upper():
+            print(f"  ℹ️  {table}.id is already AUTOINCREMENT")
+        else:
+            cursor.execute("SELECT sql FROM sqlite_master WHERE type='index' AND tbl_name=? AND sql IS NOT NULL", (table,))
+            index_sql = [row[0] for row in cursor.fetchall()]
+
+            cursor.execute(f"PRAGMA table_info({table})")
+            columns = ", ".join(row[1] for row in cursor.fetchall())
+
+            cursor.execute(_autoincrement_sql(create_sql, table))
+            cursor.execute(f"INSERT INTO {table}_new ({columns}) SELECT {columns} FROM {table}")
+            cursor.execute(f"DROP TABLE {table}")
+            cursor.execute(f"ALTER TABLE {table}_new RENAME TO {table}")
+            for sql in index_sql:
+                cursor.execute(sql)
+            print(f"  ✓ Recreated {table} with AUTOINCREMENT ids")
+
+        cursor.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}")
+        floor = max(cursor.fetchone()[0], archived_max_ids[table])
+        cursor.execute("UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = ?", (floor, table))
+        if cursor.rowcount == 0:
+            cursor.execute("INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)", (table, floor))
+        print(f"  ✓ New {table} ids start above {floor}")
+
+
+def downgrade(conn, column_exists, table_exists):
+    """AUTOINCREMENT is left in place"""
+    print("  ℹ️  AUTOINCREMENT ids are kept; nothing to undo")
@@ -5,20 +5,30 @@ Database-backed migration runner.
 This runner:
 - Tracks applied migrations in the `schema_migrations` table
 - Keeps migration files immutable (never moves or deletes them)
-- Runs migrations in transaction with redundant safety checks
+- Only imports migration files whose ID (the filename stem) is not yet applied
+- Holds an exclusive file lock so concurrent containers don't race
+- Applies all pending migrations in a single transaction
 - Is safe to run repeatedly (idempotent)
 
 Each migration file must define:
-- MIGRATION_ID: A unique, sortable identifier (e.g., "2026_01_28_add_settings_table")
-- upgrade(conn): Function that applies the migration
+- MIGRATION_ID: A unique, sortable identifier matching the filename
+  (e.g., "2026_01_28_add_settings_table" in 2026_01_28_add_settings_table.py)
+- upgrade(conn): Function that applies the migration (must not commit)
 """
 import os
 import sys
+import time
 import sqlite3
 import importlib.util
+from contextlib import contextmanager
 from pathlib import Path
 from datetime import datetime, timezone
 
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms
+    fcntl = None
+
 
 def get_migrations_dir():
     """Get the migrations directory path."""
@@ -54,6 +64,30 @@ def get_applied_migrations(conn):
     return {row[0] for row in cursor.fetchall()}
 
 
+@contextmanager
+def migration_lock(db_path):
+    """
+    Hold an exclusive lock file next to the database while migrating.
+
+    A second container starting at the same time blocks here until the first
+    one finishes, then sees its migrations as already applied.
+    """
+    lock_path = f"{db_path}.migrate.lock"
+    lock_file = open(lock_path, "w")
+    try:
+        if fcntl is not None:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                print("⏳ Another migration run holds the lock, waiting...")
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+        yield
+    finally:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+        lock_file.close()
+
+
 def load_migration_module(migration_file):
     """Load a migration file as a Python module."""
     spec = importlib.util.spec_from_file_location(
@@ -61,30 +95,41 @@ def load_migration_module(migration_file):
         migration_file
     )
     module = importlib.util.module_from_spec(spec)
-
-    # Make app modules available to migrations
-    sys.path.insert(0, str(Path(__file__).parent))
-
     spec.loader.exec_module(module)
     return module
 
 
-def discover_migrations(migrations_dir):
+def discover_migration_files(migrations_dir):
     """
-    Discover all migration files and return them sorted by MIGRATION_ID.
+    Find migration files without importing them.
+
+    Returns:
+        List of tuples: (migration_id, file_path), sorted by ID. The ID is the
+        filename stem, which matches MIGRATION_ID by convention.
+    """
+    migration_files = [
+        f for f in migrations_dir.glob("*.py")
+        if f.name != "__init__.py" and not f.name.startswith("_")
+    ]
+    return sorted((f.stem, f) for f in migration_files)
+
+
+def discover_migrations(migrations_dir, applied=frozenset()):
+    """
+    Load pending migration files and return them sorted by MIGRATION_ID.
+
+    Files whose filename stem is already in `applied` are skipped without
+    being imported.
 
     Returns:
         List of tuples: (migration_id, file_path, module)
     """
     migrations = []
 
-    # Find all Python files (exclude __init__.py and __pycache__)
-    migration_files = sorted([
-        f for f in migrations_dir.glob("*.py")
-        if f.name != "__init__.py" and not f.name.startswith("_")
-    ])
+    for file_id, migration_file in discover_migration_files(migrations_dir):
+        if file_id in applied:
+            continue
 
-    for migration_file in migration_files:
         try:
             module = load_migration_module(migration_file)
 
@@ -98,6 +143,11 @@ def discover_migrations(migrations_dir):
                 continue
 
             migration_id = module.MIGRATION_ID
+            if migration_id != file_id:
+                print(f"⚠️  {migration_file.name}: MIGRATION_ID '{migration_id}' does not match filename")
+                if migration_id in applied:
+                    continue
+
             migrations.append((migration_id, migration_file, module))
 
         except Exception as e:
@@ -132,10 +182,11 @@ def run_migrations():
     """
     Main migration runner.
 
-    1. Ensures database and schema_migrations table exist
-    2. Discovers all migration files
-    3. Applies unapplied migrations in order
-    4. Records successful migrations in schema_migrations
+    1. Takes an exclusive lock so concurrent runs are serialized
+    2. Ensures database and schema_migrations table exist
+    3. Discovers migration files and imports only the unapplied ones
+    4. Applies them in order inside a single transaction
+    5. Records successful migrations in schema_migrations and reports timings
     """
     db_path = get_database_path()
     migrations_dir = get_migrations_dir()
@@ -150,99 +201,114 @@ def run_migrations():
     # Ensure database directory exists
     os.makedirs(os.path.dirname(db_path), exist_ok=True)
 
-    # Connect to database
-    conn = sqlite3.connect(db_path)
+    # Make app modules available to migrations
+    app_root = str(Path(__file__).parent)
+    if app_root not in sys.path:
+        sys.path.insert(0, app_root)
 
-    try:
-        # Ensure schema_migrations table exists
-        ensure_schema_migrations_table(conn)
+    run_started = time.perf_counter()
 
-        # Get already-applied migrations
-        applied = get_applied_migrations(conn)
-        if applied:
-            print(f"✓ Found {len(applied)} previously applied migration(s)")
+    with migration_lock(db_path):
+        # Autocommit mode: transactions are managed explicitly below
+        conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
 
-        # Discover all migrations
-        migrations = discover_migrations(migrations_dir)
+        try:
+            # Ensure schema_migrations table exists
+            ensure_schema_migrations_table(conn)
+
+            # Get already-applied migrations (read after taking the lock, so a
+            # run that finished while we waited is accounted for)
+            applied = get_applied_migrations(conn)
+            if applied:
+                print(f"✓ Found {len(applied)} previously applied migration(s)")
+
+            migration_files = discover_migration_files(migrations_dir)
+            if not migration_files:
+                print("ℹ️  No migration files found")
+                print("=" * 70)
+                return True
 
-        if not migrations:
-            print("ℹ️  No migration files found")
-            print("=" * 70)
-            return True
+            print(f"✓ Discovered {len(migration_files)} migration file(s)")
+            print()
 
-        print(f"✓ Discovered {len(migrations)} migration file(s)")
-        print()
+            # Only pending files are imported
+            pending = discover_migrations(migrations_dir, applied)
 
-        # Filter to only unapplied migrations
-        pending = [
-            (mid, mfile, mmod) for mid, mfile, mmod in migrations
-            if mid not in applied
-        ]
+            if not pending:
+                print(f"✅ All migrations already applied. Database is up to date. ({(time.perf_counter() - run_started) * 1000:.0f} ms)")
+                print("=" * 70)
+                return True
 
-        if not pending:
-            print("✅ All migrations already applied. Database is up to date.")
-            print("=" * 70)
-            return True
+            print(f"📋 {len(pending)} migration(s) to apply:")
+            for mid, mfile, _ in pending:
+                print(f"   • {mid} ({mfile.name})")
+            print()
 
-        print(f"📋 {len(pending)} migration(s) to apply:")
-        for mid, mfile, _ in pending:
-            print(f"   • {mid} ({mfile.name})")
-        print()
+            # Inject helper functions into the upgrade function's context
+            # This allows migrations to use column_exists(), table_exists(), etc.
+            upgrade_kwargs = {
+                'column_exists': lambda table, column: column_exists(conn, table, column),
+                'table_exists': lambda table: table_exists(conn, table),
+            }
 
-        # Apply each pending migration
-        for migration_id, migration_file, module in pending:
-            print(f"▶️  Applying: {migration_id}")
-            print(f"   File: {migration_file.name}")
+            timings = []
+            current_id = None
 
             try:
-                # Begin transaction
-                conn.execute("BEGIN")
-
-                # Inject helper functions into the upgrade function's context
-                # This allows migrations to use column_exists(), table_exists(), etc.
-                upgrade_kwargs = {
-                    'column_exists': lambda table, column: column_exists(conn, table, column),
-                    'table_exists': lambda table: table_exists(conn, table),
-                }
-
-                # Call the migration's upgrade function
-                # Pass connection and helpers
-                module.upgrade(conn, **upgrade_kwargs)
-
-                # Record migration as applied
-                cursor = conn.cursor()
-                cursor.execute(
-                    "INSERT INTO schema_migrations (id, applied_at) VALUES (?, ?)",
-                    (migration_id, datetime.now(timezone.utc).isoformat())
-                )
-
-                # Commit transaction
-                conn.commit()
-
-                print(f"   ✅ Success")
-                print()
+                # One write transaction for the whole batch: either every
+                # pending migration is applied and recorded, or none is
+                conn.execute("BEGIN IMMEDIATE")
+
+                for migration_id, migration_file, module in pending:
+                    current_id = migration_id
+                    print(f"▶️  Applying: {migration_id}")
+                    print(f"   File: {migration_file.name}")
+
+                    started = time.perf_counter()
+
+                    # Call the migration's upgrade function
+                    # Pass connection and helpers
+                    module.upgrade(conn, **upgrade_kwargs)
+
+                    # Record migration as applied
+                    conn.execute(
+                        "INSERT INTO schema_migrations (id, applied_at) VALUES (?, ?)",
+                        (migration_id, datetime.now(timezone.utc).isoformat())
+                    )
+
+                    elapsed_ms = (time.perf_counter() - started) * 1000
+                    timings.append((migration_id, elapsed_ms))
+                    print(f"   ✅ Done in {elapsed_ms:.1f} ms")
+                    print()
+
+                conn.execute("COMMIT")
 
             except Exception as e:
-                # Rollback on error
-                conn.rollback()
-                print(f"   ❌ FAILED: {e}")
+                # Rollback the whole batch on error
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                print(f"   ❌ FAILED ({current_id}): {e}")
                 print()
                 print("=" * 70)
-                print("Migration failed. Stopping.")
+                print("Migration failed. No migrations from this batch were applied.")
                 print("=" * 70)
                 return False
 
-        print("=" * 70)
-        print("✅ All migrations applied successfully!")
-        print("=" * 70)
-        return True
+            print("Migration timings:")
+            for migration_id, elapsed_ms in sorted(timings, key=lambda t: t[1], reverse=True):
+                print(f"   {elapsed_ms:8.1f} ms  {migration_id}")
+            print()
+            print("=" * 70)
+            print(f"✅ All migrations applied successfully! ({(time.perf_counter() - run_started) * 1000:.0f} ms total)")
+            print("=" * 70)
+            return True
 
-    except Exception as e:
-        print(f"❌ Migration runner error: {e}", file=sys.stderr)
-        return False
+        except Exception as e:
+            print(f"❌ Migration runner error: {e}", file=sys.stderr)
+            return False
 
-    finally:
-        conn.close()
+        finally:
+            conn.close()
 
 
 if __name__ == "__main__":